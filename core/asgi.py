@@ -2,6 +2,9 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The schedule page's server-sent event stream is routed to
+mentorship.live.slot_events_app, which holds thousands of idle connections
+on the event loop; everything else goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +16,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once get_asgi_application() has set Django up
+from mentorship.live import SLOT_EVENTS_PATH, slot_events_app  # noqa: E402
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == SLOT_EVENTS_PATH:
+        return await slot_events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,91 @@
+"""
+Authentication backend that keeps users in the project cache.
+
+Django's AuthenticationMiddleware loads request.user at most once per
+request, but that still costs an auth_user query on every authenticated
+request. CachedModelBackend serves get_user() from core.caching instead,
+under a per-user tag that is invalidated whenever the user is saved or
+deleted (a login, password change or deactivation) or their groups or
+permissions change. Changes made with QuerySet.update() bypass the signals
+and show up after USER_CACHE_TIMEOUT.
+
+The shared tier is a plain file or table, so the password hash is never
+cached: entries hold the other fields and the session auth hash Django
+checks on every request, and the password stays deferred on the rebuilt
+user (reading it costs a query).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from .caching import MISSING, project_cache
+
+USER_KEY = 'auth:user:{}'
+UserModel = get_user_model()
+# Concrete fields in model order, as Model.from_db() expects them
+USER_FIELDS = [field.attname for field in UserModel._meta.concrete_fields if field.attname != 'password']
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+def cached_user(values, session_auth_hash):
+    user = UserModel.from_db(None, USER_FIELDS, values)
+    user.get_session_auth_hash = lambda: session_auth_hash
+    return user
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        entry = project_cache.get(USER_KEY.format(user_id), MISSING, tags=[user_tag(user_id)])
+        if entry is MISSING:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            project_cache.set(
+                USER_KEY.format(user_id),
+                ([getattr(user, field) for field in USER_FIELDS], user.get_session_auth_hash()),
+                getattr(settings, 'USER_CACHE_TIMEOUT', 300),
+                tags=[user_tag(user_id)],
+            )
+        else:
+            user = cached_user(*entry)
+        return user if self.user_can_authenticate(user) else None
+
+def user_changed(sender, instance, **kwargs):
+    project_cache.invalidate_tags(user_tag(instance.pk))
+
+def related_ids(instance, action, pk_set, related):
+    """
+    The ids added or removed by an m2m change seen from the reverse side.
+    A clear is handled before it runs, while ``related`` still lists them.
+    """
+    if action == 'pre_clear':
+        return list(getattr(instance, related).values_list('pk', flat=True))
+    if action in ('post_add', 'post_remove'):
+        return list(pk_set)
+    return []
+
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """A user's groups or permissions changed, from either side of the relation."""
+    if not reverse:
+        user_ids = [instance.pk] if action.startswith('post_') else []
+    else:
+        user_ids = related_ids(instance, action, pk_set, 'user_set')
+    if user_ids:
+        project_cache.invalidate_tags(*map(user_tag, user_ids))
+
+def group_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """A group's permissions changed; every member's cached user is dropped."""
+    if not reverse:
+        group_ids = [instance.pk] if action.startswith('post_') else []
+    else:
+        group_ids = related_ids(instance, action, pk_set, 'group_set')
+    if group_ids:
+        user_ids = UserModel.objects.filter(groups__in=group_ids).values_list('pk', flat=True).distinct()
+        project_cache.invalidate_tags(*map(user_tag, user_ids))
+
+post_save.connect(user_changed, sender=UserModel)
+post_delete.connect(user_changed, sender=UserModel)
+m2m_changed.connect(user_permissions_changed, sender=UserModel.groups.through)
+m2m_changed.connect(user_permissions_changed, sender=UserModel.user_permissions.through)
+m2m_changed.connect(group_permissions_changed, sender=Group.permissions.through)
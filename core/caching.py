@@ -0,0 +1,173 @@
+"""
+Project cache layer over Django's configured caches.
+
+Values are looked up tier by tier (CACHE_TIERS, fastest first: a
+per-process local-memory cache, then a cache shared by every worker on the
+box) and a hit in a slower tier is copied into the faster ones.
+
+Entries can carry tags. A tag's version lives in the last (shared) tier and
+is folded into the stored key, so invalidating a tag is a single write that
+every process sees at once; entries stored under the old version are never
+read again and simply age out. Tag versions are timestamps rather than
+counters so that a version lost to eviction cannot come back and revive
+stale entries.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.test.utils import override_settings
+
+MISSING = object()
+TAG_KEY = 'tag:{}'
+
+class TieredCache:
+    def __init__(self, aliases=None, backfill_timeout=None):
+        self._aliases = aliases
+        self._backfill_timeout = backfill_timeout
+        self._lock = threading.Lock()
+        self._hits = Counter()
+        self._misses = Counter()
+
+    @property
+    def aliases(self):
+        return self._aliases or getattr(settings, 'CACHE_TIERS', ['default'])
+
+    @property
+    def backfill_timeout(self):
+        if self._backfill_timeout is not None:
+            return self._backfill_timeout
+        return getattr(settings, 'CACHE_BACKFILL_TIMEOUT', 60)
+
+    def tiers(self):
+        return [(alias, caches[alias]) for alias in self.aliases]
+
+    def tag_tier(self):
+        return caches[self.aliases[-1]]
+
+    def tag_versions(self, tags):
+        """Returns the current version of each tag, creating missing ones."""
+        if not tags:
+            return []
+        tier = self.tag_tier()
+        keys = [TAG_KEY.format(tag) for tag in tags]
+        versions = tier.get_many(keys)
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            now = time.time_ns()
+            for key in missing:
+                # add() keeps a version another process created in the meantime
+                tier.add(key, now, None)
+            versions.update(tier.get_many(missing))
+        return [versions.get(key, 0) for key in keys]
+
+    def tag_version(self, tag):
+        return self.tag_versions([tag])[0]
+
+    def invalidate_tags(self, *tags):
+        now = time.time_ns()
+        self.tag_tier().set_many({TAG_KEY.format(tag): now for tag in tags}, None)
+
+    def make_key(self, key, tags=()):
+        versions = self.tag_versions(tags)
+        if not versions:
+            return key
+        return f'{key}@' + '.'.join(f'{version:x}' for version in versions)
+
+    def get(self, key, default=None, tags=()):
+        key = self.make_key(key, tags)
+        tiers = self.tiers()
+        for i, (alias, tier) in enumerate(tiers):
+            value = tier.get(key, MISSING)
+            if value is MISSING:
+                self._count(self._misses, alias)
+                continue
+            self._count(self._hits, alias)
+            for _, faster in tiers[:i]:
+                faster.set(key, value, self.backfill_timeout)
+            return value
+        return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, tags=()):
+        key = self.make_key(key, tags)
+        for _, tier in self.tiers():
+            tier.set(key, value, timeout)
+
+    def delete(self, key):
+        for _, tier in self.tiers():
+            tier.delete(key)
+
+    def get_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT, tags=()):
+        """Returns the cached value for ``key``, calling ``compute()`` and storing its result on a miss."""
+        value = self.get(key, MISSING, tags)
+        if value is MISSING:
+            value = compute()
+            self.set(key, value, timeout, tags)
+        return value
+
+    async def aget_or_set(self, key, compute, timeout=DEFAULT_TIMEOUT, tags=()):
+        """Async get_or_set; ``compute`` is a coroutine function."""
+        value = await sync_to_async(self.get)(key, MISSING, tags)
+        if value is MISSING:
+            value = await compute()
+            await sync_to_async(self.set)(key, value, timeout, tags)
+        return value
+
+    def clear(self):
+        for _, tier in self.tiers():
+            tier.clear()
+
+    def _count(self, counter, alias):
+        with self._lock:
+            counter[alias] += 1
+
+    def stats(self):
+        """Per-tier hit/miss counts for this process."""
+        with self._lock:
+            stats = {}
+            for alias in self.aliases:
+                hits, misses = self._hits[alias], self._misses[alias]
+                stats[alias] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+                }
+            return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+project_cache = TieredCache()
+
+@contextmanager
+def isolated_caches():
+    """
+    Points every configured cache at a throwaway location for the block:
+    file tiers at a temporary directory, local-memory tiers at a fresh
+    namespace. Tests and benchmarks clear caches freely, and on the real
+    shared tier that would drop the sessions and cached users of running
+    workers. A "db" tier already lives in the throwaway test database.
+    """
+    directory = tempfile.mkdtemp(prefix='mentorship-cache-')
+    isolated = {}
+    for alias, config in settings.CACHES.items():
+        config = dict(config)
+        if config['BACKEND'].endswith('.FileBasedCache'):
+            config['LOCATION'] = os.path.join(directory, alias)
+        elif config['BACKEND'].endswith('.LocMemCache'):
+            config['LOCATION'] = f'{config.get("LOCATION", "")}-isolated'
+        isolated[alias] = config
+    try:
+        with override_settings(CACHES=isolated):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,16 @@
+"""
+Per-connection database tuning. SQLite pragmas apply to a single
+connection (except journal_mode, which is stored in the file), so they
+are set on every new connection from SQLITE_PRAGMAS.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Straight on the driver connection, so the pragmas are not counted as queries
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+connection_created.connect(apply_sqlite_pragmas)
@@ -0,0 +1,176 @@
+"""
+Lightweight request profiling: query count, DB time, duplicate queries and
+view time per URL name, reported as Server-Timing headers and aggregated
+in-process for the /metrics/ endpoint alongside the project cache's
+hit/miss counts.
+
+Queries are observed through a database execute wrapper installed on every
+connection. The wrapper looks up the current request's recorder in a
+context variable, which asgiref carries into sync_to_async threads, so the
+async ORM's queries are attributed to the right request too. Only a
+sample of requests (PROFILING_SAMPLE_RATE) is recorded; for the rest the
+wrapper is a single context variable lookup.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from .caching import project_cache
+
+logger = logging.getLogger(__name__)
+
+current_recorder = ContextVar('current_recorder', default=None)
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """SQL statements executed at least ``threshold`` times (e.g. a query inside a loop)."""
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+def profiling_wrapper(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+def install_wrapper(connection, **kwargs):
+    if profiling_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profiling_wrapper)
+
+connection_created.connect(install_wrapper)
+
+class Metrics:
+    """Thread-safe per-URL-name aggregates of sampled requests."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: {
+            'requests': 0,
+            'queries': 0,
+            'db_ms': 0.0,
+            'view_ms': 0.0,
+            'max_view_ms': 0.0,
+            'duplicate_requests': 0,
+        })
+
+    def record(self, name, queries, db_ms, view_ms, has_duplicates):
+        with self._lock:
+            view = self._views[name]
+            view['requests'] += 1
+            view['queries'] += queries
+            view['db_ms'] += db_ms
+            view['view_ms'] += view_ms
+            view['max_view_ms'] = max(view['max_view_ms'], view_ms)
+            view['duplicate_requests'] += has_duplicates
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    'requests': view['requests'],
+                    'avg_queries': round(view['queries'] / view['requests'], 2),
+                    'avg_db_ms': round(view['db_ms'] / view['requests'], 3),
+                    'avg_view_ms': round(view['view_ms'] / view['requests'], 3),
+                    'max_view_ms': round(view['max_view_ms'], 3),
+                    'duplicate_requests': view['duplicate_requests'],
+                }
+                for name, view in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+metrics = Metrics()
+
+class ProfilingMiddleware:
+    """
+    Records a sample of requests and adds a Server-Timing header, e.g.
+    ``db;dur=3.2;desc="5 queries", view;dur=12.8, dup;desc="1 repeated query"``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+        self.duplicate_threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 3)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.sampled():
+            return self.get_response(request)
+
+        install_wrapper(connection)
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def finish(self, request, response, recorder, seconds):
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else 'unresolved'
+        db_ms = recorder.db_seconds * 1000
+        view_ms = seconds * 1000
+        duplicates = recorder.duplicates(self.duplicate_threshold)
+
+        timings = [
+            f'db;dur={db_ms:.2f};desc="{recorder.count} queries"',
+            f'view;dur={view_ms:.2f};desc="{name}"',
+        ]
+        if duplicates:
+            timings.append(f'dup;desc="{len(duplicates)} repeated queries"')
+            for sql, n in duplicates.items():
+                logger.warning('%s ran the same query %s times: %s', name, n, sql)
+        response['Server-Timing'] = ', '.join(timings)
+
+        metrics.record(name, recorder.count, db_ms, view_ms, bool(duplicates))
+        return response
+
+@staff_member_required
+def metrics_view(request):
+    return JsonResponse({'views': metrics.snapshot(), 'cache': project_cache.stats()})
@@ -39,11 +39,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'core',
     'users',
     'mentorship',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,8 +63,14 @@ TEMPLATES = [
         'DIRS': [
             os.path.join(BASE_DIR, 'templates')
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory for the life of the process
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -79,14 +87,136 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_PROFILE selects the database: "sqlite" (default) or "postgres".
+#
+# SQLite runs in WAL mode so readers never block the writer, waits up to
+# SQLITE_BUSY_TIMEOUT_MS for a lock instead of failing with "database is
+# locked", and starts write transactions with BEGIN IMMEDIATE so two
+# writers cannot deadlock upgrading their read locks. Pragmas are applied
+# to every new connection by core.db.
+#
+# The app is served through core.asgi, where every request may run in its
+# own thread, so persistent connections would pile up rather than be
+# reused: DB_CONN_MAX_AGE defaults to 0 and is only worth raising under a
+# WSGI server.
+#
+# PostgreSQL uses Django's native psycopg connection pool (requires
+# "psycopg[pool]"; POSTGRES_POOL_MAX_SIZE per process). With
+# POSTGRES_POOL=0 it opens a connection per request, or under WSGI keeps
+# one per thread for DB_CONN_MAX_AGE seconds; Django does not allow a
+# pool and persistent connections at once.
+
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgres':
+    POSTGRES_POOL = os.environ.get('POSTGRES_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'mentorship'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if POSTGRES_POOL else int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+            'CONN_HEALTH_CHECKS': not POSTGRES_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+                    'timeout': 10,
+                },
+            } if POSTGRES_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 10000)) / 1000,
+            },
+        }
     }
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # WAL makes NORMAL safe against corruption; only the last commits can be lost on power failure
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 10000)),
+    'cache_size': -20000,  # KiB
+    'temp_store': 'MEMORY',
+    'mmap_size': 128 * 1024 * 1024,
 }
 
 
+# Caches
+# The project cache layer (core.caching) reads CACHE_TIERS fastest first: a
+# per-process local-memory tier, then a tier shared by every worker on the
+# box. SHARED_CACHE selects the shared tier: "file" (default), "db" (the
+# SQLite database; run "python manage.py createcachetable" once) or "none".
+
+SHARED_CACHE = os.environ.get('SHARED_CACHE', 'file')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mentorship-local',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+if SHARED_CACHE == 'file':
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SHARED_CACHE_DIR', BASE_DIR / '.cache'),
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+elif SHARED_CACHE == 'db':
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'mentorship_cache',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+
+CACHE_TIERS = ['default', 'shared'] if 'shared' in CACHES else ['default']
+
+# Lifetime of a shared-tier hit copied into the local tier
+CACHE_BACKFILL_TIMEOUT = 60
+
+# Runs the tests against throwaway caches (core.caching.isolated_caches)
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+
+# Sessions and authentication
+# SESSION_BACKEND selects the session engine: "cached_db" (default; reads
+# come from the shared cache tier and only fall back to the django_session
+# table on a miss, writes go to both), "db" (one query per request) or
+# "signed_cookies" (no server-side storage at all, but a session cannot be
+# revoked before it expires). Without a shared tier (SHARED_CACHE=none)
+# cached_db sessions live in each process's local memory, which is only
+# correct with a single worker.
+#
+# Authenticated users are cached for USER_CACHE_TIMEOUT seconds by
+# core.auth.CachedModelBackend; 0 goes back to one auth_user query per
+# request.
+
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+SESSION_CACHE_ALIAS = CACHE_TIERS[-1]
+
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', 300))
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend' if USER_CACHE_TIMEOUT else 'django.contrib.auth.backends.ModelBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -143,3 +273,7 @@ MESSAGE_TAGS = {
 
 # Login URL
 LOGIN_URL = 'login'
+
+# Request profiling (Server-Timing headers and /metrics/)
+PROFILING_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+PROFILING_DUPLICATE_THRESHOLD = 3
@@ -0,0 +1,12 @@
+"""
+Settings for benchmark runs:
+
+    DJANGO_SETTINGS_MODULE=core.settings_benchmark python manage.py benchmark
+
+Everything else matches core.settings, so the numbers describe the real
+configuration; only the password hasher is swapped for a fast one so logins
+measure the view rather than PBKDF2's deliberate cost.
+"""
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,14 @@
+from contextlib import ExitStack
+from django.test.runner import DiscoverRunner
+from .caching import isolated_caches
+
+class TestRunner(DiscoverRunner):
+    """Django's test runner, with the caches moved off the live shared tier for the run."""
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = ExitStack()
+        self._caches.enter_context(isolated_caches())
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.close()
+        super().teardown_test_environment(**kwargs)
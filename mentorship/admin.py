@@ -1,7 +1,10 @@
 from django.contrib import admin
-from .models import Meeting, Mentorship, Navigator, AppointmentAvailability
+from .models import AvailabilityRule, Meeting, MediaJob, Mentorship, Navigator, AppointmentAvailability, TaskTemplate
 # Register your models here.
 admin.site.register(Mentorship)
 admin.site.register(Navigator)
 admin.site.register(AppointmentAvailability)
-admin.site.register(Meeting)
\ No newline at end of file
+admin.site.register(Meeting)
+admin.site.register(MediaJob)
+admin.site.register(TaskTemplate)
+admin.site.register(AvailabilityRule)
@@ -0,0 +1,256 @@
+"""
+Mentor analytics rollups. MentorDailyStats and MenteeTaskStats are kept up
+to date on write: single-row changes adjust the counters in place, bulk
+writes recount only the days or mentees they touched, and the
+rebuild_analytics command recomputes everything from the source tables.
+Reading a report therefore costs O(days in range + mentees), whatever the
+size of the history.
+"""
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from core.caching import project_cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from .models import AppointmentAvailability, Meeting, MenteeTaskStats, MentorDailyStats, Task
+from .recurrence import rule_slot_counts, window_slots
+from .services import availability_tag, mentor_rules
+
+SLOTS_TAG = ''
+
+def add_counts(model, key, **deltas):
+    """Adds ``deltas`` to the counters of the row identified by ``key``, creating it if needed."""
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Created concurrently; the row exists now
+        model.objects.filter(**key).update(**changes)
+
+def slot_day(slot_id):
+    return AppointmentAvailability.objects.filter(id=slot_id).values_list('mentor_id', 'appointment_date').first()
+
+def slot_changed(slot, sign):
+    if slot.appointment_date:
+        add_counts(
+            MentorDailyStats,
+            {'mentor_id': slot.mentor_id, 'day': slot.appointment_date.date(), 'tag': SLOTS_TAG},
+            slots=sign,
+        )
+
+def meeting_changed(meeting, sign):
+    if type(meeting).date.is_cached(meeting):
+        mentor_id, when = meeting.date.mentor_id, meeting.date.appointment_date
+    else:
+        slot = slot_day(meeting.date_id)
+        if slot is None:
+            return
+        mentor_id, when = slot
+    if when:
+        add_counts(MentorDailyStats, {'mentor_id': mentor_id, 'day': when.date(), 'tag': meeting.tag}, meetings=sign)
+
+def task_changed(mentee_id, tasks=0, done=0):
+    add_counts(MenteeTaskStats, {'mentee_id': mentee_id}, tasks=tasks, done=done)
+
+def refresh_slot_days(mentor_id, days):
+    """Recounts the mentor's slots on ``days`` with one grouped query and one upsert."""
+    days = sorted(days)
+    if not days:
+        return
+    counts = dict(
+        AppointmentAvailability.objects.filter(
+            mentor_id=mentor_id,
+            appointment_date__gte=days[0],
+            appointment_date__lt=days[-1] + timedelta(days=1),
+        )
+        .annotate(day=TruncDate('appointment_date'))
+        .values_list('day')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    MentorDailyStats.objects.bulk_create(
+        [
+            MentorDailyStats(mentor_id=mentor_id, day=day, tag=SLOTS_TAG, slots=counts.get(day, 0))
+            for day in days
+        ],
+        update_conflicts=True,
+        unique_fields=['mentor', 'day', 'tag'],
+        update_fields=['slots'],
+    )
+
+def refresh_mentee_tasks(mentee_ids):
+    """Recounts tasks for ``mentee_ids`` with one grouped query and one upsert."""
+    mentee_ids = set(mentee_ids)
+    if not mentee_ids:
+        return
+    counts = {
+        row['mentee_id']: row
+        for row in Task.objects.filter(mentee_id__in=mentee_ids)
+        .values('mentee_id')
+        .annotate(tasks=Count('id'), done=Count('id', filter=Q(done=True)))
+        .order_by()
+    }
+    MenteeTaskStats.objects.bulk_create(
+        [
+            MenteeTaskStats(
+                mentee_id=mentee_id,
+                tasks=counts.get(mentee_id, {}).get('tasks', 0),
+                done=counts.get(mentee_id, {}).get('done', 0),
+            )
+            for mentee_id in mentee_ids
+        ],
+        update_conflicts=True,
+        unique_fields=['mentee'],
+        update_fields=['tasks', 'done'],
+    )
+
+def rebuild(mentor_ids=None, batch_size=5000):
+    """
+    Recomputes every rollup (or those of ``mentor_ids``) from the source
+    tables. Returns the number of daily and mentee rows written.
+    """
+    daily = MentorDailyStats.objects.all()
+    mentee_stats = MenteeTaskStats.objects.all()
+    slots = AppointmentAvailability.objects.filter(appointment_date__isnull=False)
+    meetings = Meeting.objects.filter(date__appointment_date__isnull=False)
+    tasks = Task.objects.all()
+    if mentor_ids is not None:
+        daily = daily.filter(mentor_id__in=mentor_ids)
+        mentee_stats = mentee_stats.filter(mentee__user_id__in=mentor_ids)
+        slots = slots.filter(mentor_id__in=mentor_ids)
+        meetings = meetings.filter(date__mentor_id__in=mentor_ids)
+        tasks = tasks.filter(mentee__user_id__in=mentor_ids)
+
+    rows = {}
+    slot_counts = (
+        slots.annotate(day=TruncDate('appointment_date'))
+        .values_list('mentor_id', 'day')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for mentor_id, day, total in slot_counts.iterator():
+        rows[mentor_id, day, SLOTS_TAG] = MentorDailyStats(mentor_id=mentor_id, day=day, tag=SLOTS_TAG, slots=total)
+
+    meeting_counts = (
+        meetings.annotate(day=TruncDate('date__appointment_date'))
+        .values_list('date__mentor_id', 'day', 'tag')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for mentor_id, day, tag, total in meeting_counts.iterator():
+        rows[mentor_id, day, tag] = MentorDailyStats(mentor_id=mentor_id, day=day, tag=tag, meetings=total)
+
+    task_counts = [
+        MenteeTaskStats(mentee_id=mentee_id, tasks=total, done=done)
+        for mentee_id, total, done in tasks.values_list('mentee_id')
+        .annotate(total=Count('id'), done=Count('id', filter=Q(done=True)))
+        .order_by()
+        .iterator()
+    ]
+
+    with transaction.atomic():
+        daily.delete()
+        mentee_stats.delete()
+        MentorDailyStats.objects.bulk_create(rows.values(), batch_size=batch_size)
+        MenteeTaskStats.objects.bulk_create(task_counts, batch_size=batch_size)
+    return len(rows), len(task_counts)
+
+# Longest range a report may cover
+MAX_REPORT_SPAN = timedelta(days=366)
+
+RULE_SLOT_DAYS_KEY = 'mentorship:rule_slot_days:{}:{}:{}'
+# Reports can ask for any window, so entries also expire on their own
+RULE_SLOT_DAYS_TIMEOUT = 24 * 60 * 60
+
+def rule_slot_days(mentor_id, start, end):
+    """
+    Open rule-generated slots per day from ``start`` to ``end`` (inclusive),
+    cached until the mentor's availability changes. Days are counted whole,
+    so a report costs O(days) on a miss and nothing on a hit.
+    """
+    def compute():
+        rules = mentor_rules(mentor_id)
+        if not rules:
+            return {}
+        window_start = datetime.combine(start, time.min)
+        window_end = datetime.combine(end + timedelta(days=1), time.min)
+        taken = list(window_slots(mentor_id, window_start, window_end).values_list('appointment_date', flat=True))
+        return rule_slot_counts(rules, taken, window_start, window_end)
+
+    return project_cache.get_or_set(
+        RULE_SLOT_DAYS_KEY.format(mentor_id, start.isoformat(), end.isoformat()),
+        compute,
+        RULE_SLOT_DAYS_TIMEOUT,
+        tags=[availability_tag(mentor_id)],
+    )
+
+def report_range(start=None, end=None):
+    """
+    Fills in the default range (90 days either side of today) and raises
+    ValueError for a range longer than MAX_REPORT_SPAN or ending on
+    date.max, which the per-day rule expansion could not step past.
+    """
+    today = date.today()
+    start = start or today - timedelta(days=90)
+    end = end or today + timedelta(days=90)
+    if end >= date.max or end - start > MAX_REPORT_SPAN:
+        raise ValueError(f'Reports cover at most {MAX_REPORT_SPAN.days} days.')
+    return start, end
+
+def mentor_analytics(mentor, start=None, end=None):
+    """
+    Builds the analytics report for ``mentor`` between ``start`` and
+    ``end`` (inclusive, default 90 days either side of today) from the
+    rollups, plus the open slots of the mentor's availability rules.
+    """
+    start, end = report_range(start, end)
+
+    tag_labels = dict(Meeting.tag_choices)
+    tags = Counter()
+    days = {}
+    for day, tag, slots, meetings in MentorDailyStats.objects.filter(
+        mentor=mentor, day__gte=start, day__lte=end
+    ).values_list('day', 'tag', 'slots', 'meetings'):
+        totals = days.setdefault(day, {'day': day, 'slots': 0, 'meetings': 0})
+        totals['slots'] += slots
+        totals['meetings'] += meetings
+        if tag != SLOTS_TAG and meetings:
+            tags[tag_labels.get(tag, tag)] += meetings
+
+    # Slots generated by availability rules are only stored (and counted
+    # above) once booked; the open ones are counted per day from the rules
+    for day, count in rule_slot_days(mentor.pk, start, end).items():
+        totals = days.setdefault(day, {'day': day, 'slots': 0, 'meetings': 0})
+        totals['slots'] += count
+
+    days = [days[day] for day in sorted(days)]
+    for totals in days:
+        totals['utilization'] = totals['meetings'] / totals['slots'] if totals['slots'] else 0.0
+    slots = sum(totals['slots'] for totals in days)
+    meetings = sum(totals['meetings'] for totals in days)
+
+    mentees = [
+        {
+            'mentee': stats.mentee,
+            'tasks': stats.tasks,
+            'done': stats.done,
+            'completion_rate': stats.completion_rate(),
+        }
+        for stats in MenteeTaskStats.objects.filter(mentee__user=mentor, tasks__gt=0)
+        .select_related('mentee')
+        .order_by('mentee__name')
+    ]
+
+    return {
+        'start': start,
+        'end': end,
+        'tags': tags.most_common(),
+        'days': days,
+        'slots': slots,
+        'meetings': meetings,
+        'utilization': meetings / slots if slots else 0.0,
+        'mentees': mentees,
+    }
@@ -1,5 +1,56 @@
+from django.conf import settings
+from django.core import signing
+from django.db.models import F
 from .models import Mentorship
+from .services import bump_mentor_version
 
-def validate_token(token):
-    return Mentorship.objects.filter(token=token).first()
-  
\ No newline at end of file
+MENTEE_COOKIE_SALT = 'mentorship.mentee'
+MENTEE_COOKIE_MAX_AGE = getattr(settings, 'MENTEE_COOKIE_MAX_AGE', 3600)
+
+def sign_mentee(mentee, salt=MENTEE_COOKIE_SALT):
+    """
+    Returns the auth_token cookie value for ``mentee``: its id, mentor and
+    token version, signed with SECRET_KEY and timestamped so it expires
+    after MENTEE_COOKIE_MAX_AGE seconds. Other signed mentee links (the
+    calendar feed) pass their own salt.
+    """
+    return signing.dumps(
+        {'id': mentee.pk, 'mentor': mentee.user_id, 'version': mentee.token_version},
+        salt=salt,
+    )
+
+def load_mentee(value, salt=MENTEE_COOKIE_SALT, expires=True):
+    """
+    Resolves a signed auth_token cookie without touching the database.
+    Returns a Mentorship with only id, user_id and token_version loaded
+    (every other field is deferred), or None if the cookie is missing,
+    tampered with or expired. Whether the version is still current is only
+    checked by check_mentee() on the write endpoints. Links that do not
+    expire pass their salt and ``expires=False``.
+    """
+    if not value:
+        return None
+
+    try:
+        payload = signing.loads(value, salt=salt, max_age=MENTEE_COOKIE_MAX_AGE if expires else None)
+        values = [payload['id'], payload['mentor'], payload['version']]
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    return Mentorship.from_db(None, ['id', 'user_id', 'token_version'], values)
+
+def check_mentee(mentee):
+    """Reloads ``mentee``, or returns None if it was deleted or its tokens were revoked since signing."""
+    return Mentorship.objects.filter(id=mentee.pk, token_version=mentee.token_version).first()
+
+async def acheck_mentee(mentee):
+    return await Mentorship.objects.filter(id=mentee.pk, token_version=mentee.token_version).afirst()
+
+def revoke_tokens(mentee):
+    """
+    Invalidates every cookie and calendar feed link signed for ``mentee`` so
+    far; the access token itself stays valid.
+    """
+    Mentorship.objects.filter(id=mentee.pk).update(token_version=F('token_version') + 1)
+    mentee.refresh_from_db(fields=['token_version'])
+    # Feeds answer 304 while the mentor version is unchanged, without a query
+    bump_mentor_version(mentee.user_id)
@@ -0,0 +1,384 @@
+import re
+import secrets
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.caching import isolated_caches, project_cache
+from .analytics import rebuild
+from .auth import sign_mentee
+from .ical import sign_mentor_feed
+from .models import AppointmentAvailability, Meeting, Mentorship, Navigator, Task, Upload
+
+@contextmanager
+def benchmark_database(test_name=None):
+    """
+    Runs the block against a throwaway test database and throwaway caches
+    so benchmarks never touch the project's real data or the shared cache
+    of running workers. ``test_name`` overrides the test database name,
+    e.g. to put a SQLite test database in a file instead of memory.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    if test_name:
+        test_settings['NAME'] = test_name
+    with isolated_caches():
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = old_test_name
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'seconds' key is filled in when the block exits."""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+def bulk_mentees(mentor, count, batch_size=5000, **fields):
+    """
+    Inserts ``count`` mentees for ``mentor`` with bulk_create and returns
+    their tokens. Tokens are generated up front because bulk_create skips
+    Mentorship.save().
+    """
+    tokens = []
+    seen = set()
+    stages = [stage for stage, _ in Mentorship.stage_choices]
+    for start in range(0, count, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, count)):
+            token = secrets.token_urlsafe(8)
+            while token in seen:
+                token = secrets.token_urlsafe(8)
+            seen.add(token)
+            tokens.append(token)
+            batch.append(Mentorship(
+                name=f'Mentee {i}',
+                stage=stages[i % len(stages)],
+                user=mentor,
+                token=token,
+                **fields
+            ))
+        Mentorship.objects.bulk_create(batch)
+    return tokens
+
+SCALES = {
+    'small': dict(mentors=2, mentees=10, slots=50, meetings=20, tasks=5, uploads=2),
+    'medium': dict(mentors=5, mentees=100, slots=500, meetings=200, tasks=20, uploads=5),
+    'large': dict(mentors=10, mentees=500, slots=5000, meetings=2000, tasks=50, uploads=10),
+    # 100k slots, 200k tasks and 100k uploads, for query plans rather than the regular suite
+    'xlarge': dict(mentors=10, mentees=2000, slots=10000, meetings=4000, tasks=10, uploads=5),
+}
+DEFAULT_SCALES = ['small', 'medium', 'large']
+# The first mentor's password, for the login endpoint
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+def generate_dataset(mentors, mentees, slots, meetings, tasks, uploads):
+    """
+    Builds a synthetic dataset with bulk inserts: ``mentors`` mentors, each
+    with ``mentees`` mentees, ``slots`` future slots of which ``meetings``
+    are booked, and ``tasks``/``uploads`` per mentee. Returns the first
+    mentor and mentee, which the endpoint benchmarks act as.
+    """
+    first = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    tags = [tag for tag, _ in Meeting.tag_choices]
+
+    users = User.objects.bulk_create([User(username=f'bench_mentor_{i}') for i in range(mentors)])
+    for user in users:
+        navigator = Navigator.objects.create(name=f'Navigator of {user.username}', user=user)
+        bulk_mentees(user, mentees, navigator=navigator)
+        mentee_ids = list(Mentorship.objects.filter(user=user).values_list('id', flat=True))
+
+        created = AppointmentAvailability.objects.bulk_create([
+            AppointmentAvailability(
+                appointment_date=first + timedelta(days=i // 8, minutes=50 * (i % 8)),
+                mentor=user,
+                scheduled=i < meetings,
+            )
+            for i in range(slots)
+        ], batch_size=5000)
+        Meeting.objects.bulk_create([
+            Meeting(date=slot, mentee_id=mentee_ids[i % len(mentee_ids)], tag=tags[i % len(tags)], description='Benchmark')
+            for i, slot in enumerate(created[:meetings])
+        ], batch_size=5000)
+        Task.objects.bulk_create([
+            Task(mentee_id=mentee_id, task=f'Task {i}', done=i % 3 == 0)
+            for mentee_id in mentee_ids for i in range(tasks)
+        ], batch_size=5000)
+        Upload.objects.bulk_create([
+            Upload(mentee_id=mentee_id, video=f'videos/benchmark_{mentee_id}_{i}.mp4')
+            for mentee_id in mentee_ids for i in range(uploads)
+        ], batch_size=5000)
+
+    # bulk_create skips the signals that maintain the analytics rollups
+    rebuild()
+    mentor = users[0]
+    mentor.set_password(BENCHMARK_PASSWORD)
+    mentor.save(update_fields=['password'])
+    mentee = Mentorship.objects.filter(user=mentor).order_by('id').first()
+    return mentor, mentee
+
+def endpoint_requests(mentor, mentee):
+    """The hot-path requests the suite measures, as (name, method, path, data, actor)."""
+    first_day = AppointmentAvailability.objects.filter(
+        mentor=mentor, scheduled=False
+    ).order_by('appointment_date').values_list('appointment_date', flat=True).first()
+    task = Task.objects.filter(mentee=mentee).order_by('id').first()
+    return [
+        ('mentorship', 'get', reverse('mentorship'), None, 'mentor'),
+        ('meeting', 'get', reverse('meeting'), None, 'mentor'),
+        ('analytics', 'get', reverse('analytics'), None, 'mentor'),
+        ('task', 'get', reverse('task', args=[mentee.id]), None, 'mentor'),
+        ('available_dates', 'get', reverse('available_dates'), None, 'mentee'),
+        ('schedule_meeting', 'get', reverse('schedule_meeting'), {'date': first_day.strftime('%d/%m/%Y')}, 'mentee'),
+        ('mentee_tasks', 'get', reverse('mentee_tasks'), None, 'mentee'),
+        ('task_status', 'post', reverse('task_status', args=[task.id]), None, 'mentee'),
+        ('login', 'post', reverse('login'), {'username': mentor.username, 'password': BENCHMARK_PASSWORD}, 'anonymous'),
+        ('calendar', 'get', reverse('mentor_calendar', args=[sign_mentor_feed(mentor.id)]), None, 'anonymous'),
+    ]
+
+def sender(client, method):
+    """Returns a function sending one request that also reads streamed bodies to the end."""
+    def send(path, data):
+        response = getattr(client, method)(path, data)
+        if response.streaming:
+            # Streamed bodies (the calendar feed) run their queries while being read
+            for chunk in response.streaming_content:
+                pass
+        return response
+    return send
+
+def measure_endpoint(client, method, path, data, repeat):
+    """
+    Returns query counts (cold caches and warm), median wall time and peak
+    traced allocation for one endpoint.
+    """
+    send = sender(client, method)
+
+    project_cache.clear()
+    # Count right away: under DEBUG the next request resets the query log
+    with CaptureQueriesContext(connection) as cold:
+        response = send(path, data)
+    queries_cold = len(cold.captured_queries)
+    if response.status_code >= 400:
+        raise RuntimeError(f'{method.upper()} {path} returned {response.status_code}')
+
+    with CaptureQueriesContext(connection) as warm:
+        send(path, data)
+    queries_warm = len(warm.captured_queries)
+
+    timings = []
+    for _ in range(repeat):
+        with timer() as elapsed:
+            send(path, data)
+        timings.append(elapsed['seconds'])
+
+    tracemalloc.start()
+    send(path, data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'queries_cold': queries_cold,
+        'queries_warm': queries_warm,
+        'time_ms': round(statistics.median(timings) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+def endpoint_clients(mentor, mentee):
+    mentor_client = Client()
+    mentor_client.force_login(mentor)
+    mentee_client = Client()
+    mentee_client.cookies['auth_token'] = sign_mentee(mentee)
+    return {'mentor': mentor_client, 'mentee': mentee_client, 'anonymous': Client()}
+
+def run_suite(scales, repeat=10):
+    """Runs every endpoint at each scale on a fresh throwaway database."""
+    results = {}
+    for scale in scales:
+        with benchmark_database():
+            mentor, mentee = generate_dataset(**SCALES[scale])
+            clients = endpoint_clients(mentor, mentee)
+
+            results[scale] = {
+                name: measure_endpoint(clients[actor], method, path, data, repeat)
+                for name, method, path, data, actor in endpoint_requests(mentor, mentee)
+            }
+    return results
+
+def compare_to_baseline(results, baseline, time_budget=2.0, memory_budget=1.5):
+    """
+    Lists budget violations: any extra query, or wall time / peak memory
+    above ``time_budget`` / ``memory_budget`` times the baseline.
+    """
+    failures = []
+    for scale, endpoints in results.items():
+        for name, current in endpoints.items():
+            expected = baseline.get(scale, {}).get(name)
+            if expected is None:
+                continue
+            for key in ('queries_cold', 'queries_warm'):
+                if current[key] > expected[key]:
+                    failures.append(f'{scale}/{name}: {key} {current[key]} > {expected[key]}')
+            if current['time_ms'] > expected['time_ms'] * time_budget:
+                failures.append(f'{scale}/{name}: time_ms {current["time_ms"]} > {time_budget}x {expected["time_ms"]}')
+            if current['peak_kb'] > expected['peak_kb'] * memory_budget:
+                failures.append(f'{scale}/{name}: peak_kb {current["peak_kb"]} > {memory_budget}x {expected["peak_kb"]}')
+    return failures
+
+# Statements worth a plan; INSERTs and transaction control are skipped
+PLANNED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+# SQLite: "SCAN table" / "SCAN table USING [COVERING] INDEX"; PostgreSQL: "Seq Scan on table"
+FULL_SCAN_RE = re.compile(r'\bSCAN (?!CONSTANT ROW)\S+|Seq Scan on \S+')
+# Rows sorted or grouped outside an index
+TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE FOR .+|\bSort\b')
+
+@contextmanager
+def record_statements():
+    """Collects the (sql, params) of every plannable statement run in the block."""
+    statements = []
+
+    def wrapper(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(PLANNED_STATEMENTS):
+            statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    # Not connection.execute_wrapper(): it pops the last wrapper, which is the
+    # profiler's if the request opened the connection and installed it
+    connection.execute_wrappers.append(wrapper)
+    try:
+        yield statements
+    finally:
+        connection.execute_wrappers.remove(wrapper)
+
+def explain(sql, params):
+    """Returns the database's query plan for ``sql`` as a list of lines."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        rows = cursor.fetchall()
+    # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are single text lines
+    return [row[-1] for row in rows]
+
+def plan_matches(pattern, plan):
+    return [match.group(0) for line in plan for match in [pattern.search(line)] if match]
+
+def full_scans(plan):
+    return plan_matches(FULL_SCAN_RE, plan)
+
+def temp_sorts(plan):
+    return plan_matches(TEMP_SORT_RE, plan)
+
+def time_statement(sql, params, repeat):
+    """Median seconds to run a read-only statement and fetch all its rows."""
+    timings = []
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            with timer() as elapsed:
+                cursor.execute(sql, params)
+                cursor.fetchall()
+            timings.append(elapsed['seconds'])
+    return statistics.median(timings)
+
+def analyze_database():
+    """Refreshes planner statistics so plans reflect the generated data."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+def explain_endpoints(mentor, mentee, repeat=5):
+    """
+    Requests every endpoint with cold caches and returns, per endpoint, the
+    plan of each statement it ran, the full scans and temporary sorts in
+    those plans, the median time of each read statement on its own and the
+    median cold wall time of the whole request.
+    """
+    clients = endpoint_clients(mentor, mentee)
+    report = {}
+    for name, method, path, data, actor in endpoint_requests(mentor, mentee):
+        send = sender(clients[actor], method)
+        project_cache.clear()
+        with record_statements() as statements:
+            send(path, data)
+
+        plans = []
+        for sql, params in statements:
+            plan = explain(sql, params)
+            reads = not sql.lstrip().upper().startswith(('UPDATE', 'DELETE'))
+            plans.append({
+                'sql': sql,
+                'plan': plan,
+                'full_scans': full_scans(plan),
+                'temp_sorts': temp_sorts(plan),
+                'ms': round(time_statement(sql, params, repeat) * 1000, 3) if reads else None,
+            })
+
+        timings = []
+        for _ in range(repeat):
+            project_cache.clear()
+            with timer() as elapsed:
+                send(path, data)
+            timings.append(elapsed['seconds'])
+
+        report[name] = {
+            'statements': plans,
+            'sql_ms': round(sum(statement['ms'] or 0 for statement in plans), 3),
+            'cold_ms': round(statistics.median(timings) * 1000, 3),
+        }
+    return report
+
+# Session engine and authentication backend combinations compared by bench_sessions
+SESSION_MODES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached_db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached_db+user': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['core.auth.CachedModelBackend'],
+    },
+    'signed_cookies+user': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'AUTHENTICATION_BACKENDS': ['core.auth.CachedModelBackend'],
+    },
+}
+
+def mentor_page_queries(mentor, mentee, modes=SESSION_MODES):
+    """
+    Returns {mode: {page: queries}} for every mentor GET endpoint, counted on
+    the second request of a freshly logged-in client so the page caches are
+    warm and only the session and user lookups differ between modes.
+    """
+    pages = [
+        (name, path, data)
+        for name, method, path, data, actor in endpoint_requests(mentor, mentee)
+        if actor == 'mentor' and method == 'get'
+    ]
+    results = {}
+    for mode, overrides in modes.items():
+        project_cache.clear()
+        with override_settings(**overrides):
+            # New client, so SessionMiddleware picks up the engine
+            client = Client()
+            client.force_login(mentor)
+            results[mode] = {}
+            for name, path, data in pages:
+                client.get(path, data)
+                with CaptureQueriesContext(connection) as queries:
+                    client.get(path, data)
+                results[mode][name] = len(queries.captured_queries)
+    return results
@@ -0,0 +1,121 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from .analytics import refresh_mentee_tasks, task_changed
+from .models import Mentorship, Task, TaskTemplate
+from .services import bump_mentor_version
+
+MAX_BULK_TASKS = 500
+TASK_MAX_LENGTH = Task._meta.get_field('task').max_length
+
+class BulkTaskError(Exception):
+    """Raised when a batch is rejected as a whole; nothing is written."""
+
+def owned_mentee_ids(mentor, mentee_ids):
+    """Checks in one query that every mentee belongs to ``mentor``."""
+    mentee_ids = set(mentee_ids)
+    owned = set(
+        Mentorship.objects.filter(user=mentor, id__in=mentee_ids).values_list('id', flat=True)
+    )
+    if owned != mentee_ids:
+        raise BulkTaskError('Unknown mentee: ' + ', '.join(map(str, sorted(mentee_ids - owned))))
+    return owned
+
+def clean_description(description):
+    if not isinstance(description, str) or not description.strip():
+        raise BulkTaskError('Task descriptions must be non-empty strings.')
+    if len(description) > TASK_MAX_LENGTH:
+        raise BulkTaskError(f'Task descriptions are limited to {TASK_MAX_LENGTH} characters.')
+    return description.strip()
+
+def create_tasks(mentor, items):
+    """
+    Creates tasks from (mentee_id, description) pairs in one transaction.
+    Ownership of every mentee is checked with a single query and the rows
+    are written with bulk_create, so the query count does not grow with
+    the batch (up to MAX_BULK_TASKS).
+    """
+    items = [(mentee_id, clean_description(description)) for mentee_id, description in items]
+    if not items:
+        raise BulkTaskError('No tasks given.')
+    if len(items) > MAX_BULK_TASKS:
+        raise BulkTaskError(f'At most {MAX_BULK_TASKS} tasks can be created at once.')
+
+    mentee_ids = owned_mentee_ids(mentor, [mentee_id for mentee_id, _ in items])
+    with transaction.atomic():
+        tasks = Task.objects.bulk_create([
+            Task(mentee_id=mentee_id, task=description)
+            for mentee_id, description in items
+        ])
+        # bulk_create skips post_save, so recount the mentees for analytics
+        refresh_mentee_tasks(mentee_ids)
+
+    # and drop the cached task lists here
+    bump_mentor_version(mentor.pk)
+    return tasks
+
+def assign_tasks(mentor, descriptions, mentee_ids):
+    """Gives every mentee in ``mentee_ids`` one task per description."""
+    return create_tasks(mentor, [
+        (mentee_id, description)
+        for mentee_id in dict.fromkeys(mentee_ids)
+        for description in descriptions
+    ])
+
+def apply_template(mentor, template_id, mentee_ids):
+    try:
+        template = TaskTemplate.objects.get(id=template_id, user=mentor)
+    except TaskTemplate.DoesNotExist:
+        raise BulkTaskError('Task template not found.')
+    return assign_tasks(mentor, template.tasks, mentee_ids)
+
+def update_tasks(mentor, task_ids, done=None, mentee_id=None):
+    """
+    Marks tasks done/undone and/or moves them to another of the mentor's
+    mentees with a single UPDATE scoped to the mentor's tasks. Returns the
+    number of tasks changed.
+    """
+    if done is None and mentee_id is None:
+        raise BulkTaskError('Nothing to update.')
+    if len(task_ids) > MAX_BULK_TASKS:
+        raise BulkTaskError(f'At most {MAX_BULK_TASKS} tasks can be updated at once.')
+
+    changes = {'updated_at': timezone.now()}
+    if done is not None:
+        changes['done'] = bool(done)
+    if mentee_id is not None:
+        owned_mentee_ids(mentor, [mentee_id])
+        changes['mentee_id'] = mentee_id
+
+    tasks = Task.objects.filter(id__in=task_ids, mentee__user=mentor)
+    with transaction.atomic():
+        touched = set(tasks.values_list('mentee_id', flat=True).distinct())
+        updated = tasks.update(**changes)
+        if mentee_id is not None:
+            touched.add(mentee_id)
+        refresh_mentee_tasks(touched)
+
+    if updated:
+        bump_mentor_version(mentor.pk)
+    return updated
+
+def toggle_task(mentee_id, task_id):
+    """
+    Flips one of the mentee's tasks with a single UPDATE ... SET done = NOT
+    done ... RETURNING done (SQLite 3.35+, PostgreSQL), so concurrent
+    toggles each flip the row once and the analytics counter moves by one
+    per flip, from the state the database returned. Returns the new state,
+    or None when the task is not the mentee's.
+    """
+    updated_at = Task._meta.get_field('updated_at')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {connection.ops.quote_name(Task._meta.db_table)} '
+            'SET done = NOT done, updated_at = %s WHERE id = %s AND mentee_id = %s RETURNING done',
+            [updated_at.get_db_prep_value(timezone.now(), connection), task_id, mentee_id],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    done = bool(row[0])
+    task_changed(mentee_id, done=1 if done else -1)
+    return done
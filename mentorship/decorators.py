@@ -1,31 +1,60 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.messages import constants
 from django.http import Http404
 from django.contrib.auth.decorators import login_required as django_login_required
-from .auth import validate_token
+from .auth import acheck_mentee, check_mentee, load_mentee
 from .models import Mentorship, Task
 
+# Requests that cannot change anything; all others check the token version
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
 def mentee_token_required(view_func):
     """
-    Decorator for views requiring a valid mentee token from cookies.
-    Redirects to 'auth_mentee' if token is missing or invalid.
-    Attaches the validated mentee object to request.mentee.
+    Decorator for views requiring a valid signed mentee cookie.
+    Redirects to 'auth_mentee' if the cookie is missing, invalid or expired.
+    Attaches the mentee to request.mentee: on safe methods that is the
+    id/mentor/version carried by the cookie, resolved without a query; on
+    writes the mentee is reloaded and the cookie's token version checked,
+    so revoked cookies can still read but no longer change anything.
+    Works with both sync and async views.
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped_view(request, *args, **kwargs):
+            token = request.COOKIES.get('auth_token')
+            if not token:
+                messages.add_message(request, constants.ERROR, 'Please inform your access token.')
+                return redirect('auth_mentee')
+
+            mentee = load_mentee(token)
+            if mentee and request.method not in SAFE_METHODS:
+                mentee = await acheck_mentee(mentee)
+            if not mentee:
+                messages.add_message(request, constants.ERROR, 'Invalid token')
+                return redirect('auth_mentee')
+
+            request.mentee = mentee
+            return await view_func(request, *args, **kwargs)
+        return _async_wrapped_view
+
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         token = request.COOKIES.get('auth_token')
         if not token:
             messages.add_message(request, constants.ERROR, 'Please inform your access token.')
-            return redirect('auth_mentee') 
+            return redirect('auth_mentee')
 
-        mentee = validate_token(token)
+        mentee = load_mentee(token)
+        if mentee and request.method not in SAFE_METHODS:
+            mentee = check_mentee(mentee)
         if not mentee:
             messages.add_message(request, constants.ERROR, 'Invalid token')
             return redirect('auth_mentee')
 
-        request.mentee = mentee 
+        request.mentee = mentee
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
@@ -46,9 +75,11 @@ def mentor_owns_mentee_required(view_func):
         except Mentorship.DoesNotExist:
             raise Http404('Mentee not found.')
 
-        if mentee.user != request.user:
+        if mentee.user_id != request.user.id:
             raise Http404('You are not authorized to access this page.')
 
+        # Reuse the request's user rather than loading it again
+        mentee.user = request.user
         request.mentee = mentee
         return view_func(request, id, *args, **kwargs)
     return _wrapped_view
@@ -66,11 +97,11 @@ def mentor_owns_task_mentee_required(view_func):
             return django_login_required(lambda r, *a, **k: None)(request) 
 
         try:
-            task = Task.objects.get(id=id)
+            task = Task.objects.select_related('mentee').get(id=id)
         except Task.DoesNotExist:
             raise Http404('Task not found.')
 
-        if task.mentee.user != request.user:
+        if task.mentee.user_id != request.user.id:
             raise Http404('You are not authorized to modify this task.')
 
         request.task = task
@@ -80,40 +111,45 @@ def mentor_owns_task_mentee_required(view_func):
 def task_status_checks_required(view_func):
     """
     Decorator specifically for the task_status view.
-    Checks:
-    1. User is authenticated.
-    2. Mentee auth token is valid.
-    3. Logged-in user is the mentor for the task's mentee.
-    Attaches the validated task object to request.task.
+    Checks the signed mentee cookie and its token version (task_status is
+    a write) and attaches the mentee to request.mentee. Task ownership is
+    left to the view, which only touches tasks of that mentee, so no task
+    is loaded here.
+    Works with both sync and async views.
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped_view(request, id, *args, **kwargs):
+            token = request.COOKIES.get('auth_token')
+            if not token:
+                messages.add_message(request, constants.ERROR, 'Please inform your access token.')
+                return redirect('auth_mentee')
+
+            mentee = load_mentee(token)
+            if mentee:
+                mentee = await acheck_mentee(mentee)
+            if not mentee:
+                messages.add_message(request, constants.ERROR, 'Invalid token')
+                return redirect('auth_mentee')
+
+            request.mentee = mentee
+            return await view_func(request, id, *args, **kwargs)
+        return _async_wrapped_view
+
     @wraps(view_func)
     def _wrapped_view(request, id, *args, **kwargs):
-        # This view is for the mentee, authenticated via token.
-        # Remove mentor login check.
-
-        # 1. Check token validity
         token = request.COOKIES.get('auth_token')
         if not token:
             messages.add_message(request, constants.ERROR, 'Please inform your access token.')
             return redirect('auth_mentee')
 
-        mentee_from_token = validate_token(token)
-        if not mentee_from_token:
+        mentee = load_mentee(token)
+        if mentee:
+            mentee = check_mentee(mentee)
+        if not mentee:
             messages.add_message(request, constants.ERROR, 'Invalid token')
             return redirect('auth_mentee')
-            
-        # 2. Fetch Task
-        try:
-            task = Task.objects.get(id=id)
-        except Task.DoesNotExist:
-            raise Http404('Task not found.')
 
-        # 3. Check if the mentee identified by the token owns this task
-        if task.mentee != mentee_from_token:
-             # Using Http404 for security (don't reveal task existence)
-            raise Http404('You are not authorized to modify this task.') 
-
-        # Attach the validated task to the request
-        request.task = task
+        request.mentee = mentee
         return view_func(request, id, *args, **kwargs)
     return _wrapped_view
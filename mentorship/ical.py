@@ -0,0 +1,264 @@
+"""
+iCalendar (RFC 5545) feeds of a mentor's schedule and of a mentee's meetings.
+
+Calendar clients subscribe without cookies, so feeds are addressed by a
+signed token in the URL. Tokens carry a link version (MentorFeed.version
+for mentors, the token version for mentees) that is bumped to revoke them.
+The ETag combines that counter with the mentor's version
+(services.mentor_version), which every change to the mentor's slots,
+rules, meetings and mentees bumps: a poll that finds nothing new is
+answered with 304 from the signature and cache reads, before any query
+runs. Feed bodies are rendered one event at a time while the rows are read
+with iterator(), so memory use does not grow with the schedule.
+
+Datetimes are stored naive (USE_TZ is off) and are written as floating
+local times.
+"""
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
+from core.caching import project_cache
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .auth import load_mentee, sign_mentee
+from .models import AppointmentAvailability, Meeting, MentorFeed
+from .services import mentor_rules
+
+FEED_SALT = 'mentorship.calendar.mentor'
+MENTEE_FEED_SALT = 'mentorship.calendar.mentee'
+FEED_HISTORY = timedelta(days=30)
+FEED_CHUNK_SIZE = 500
+# Events are sent in chunks of about this many characters
+FEED_BUFFER_SIZE = 16 * 1024
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+PRODID = '-//mentorship//Mentorship calendar//EN'
+LINE_LIMIT = 75
+TAGS = dict(Meeting.tag_choices)
+
+FEED_VERSION_KEY = 'mentorship:feed_version:{}'
+
+def feed_tag(mentor_id):
+    return f'feed:{mentor_id}'
+
+def mentor_feed_version(mentor_id):
+    """The version of the mentor's feed link, cached until reset_mentor_feed() bumps it."""
+    return project_cache.get_or_set(
+        FEED_VERSION_KEY.format(mentor_id),
+        lambda: MentorFeed.objects.filter(mentor_id=mentor_id).values_list('version', flat=True).first() or 0,
+        None,
+        tags=[feed_tag(mentor_id)],
+    )
+
+def reset_mentor_feed(mentor_id):
+    """Revokes every feed link signed for the mentor so far; sign_mentor_feed() then signs a new one."""
+    with transaction.atomic():
+        MentorFeed.objects.get_or_create(mentor_id=mentor_id)
+        MentorFeed.objects.filter(mentor_id=mentor_id).update(version=F('version') + 1)
+        transaction.on_commit(lambda: project_cache.invalidate_tags(feed_tag(mentor_id)))
+
+def sign_mentor_feed(mentor_id):
+    return signing.dumps({'mentor': mentor_id, 'version': mentor_feed_version(mentor_id)}, salt=FEED_SALT)
+
+def load_mentor_feed(value):
+    """
+    Returns the mentor id and link version behind a signed feed token, or
+    None if it was tampered with or the link was reset since signing.
+    """
+    try:
+        payload = signing.loads(value, salt=FEED_SALT)
+        # Links signed before feed versions existed are version 0
+        mentor_id, version = int(payload['mentor']), int(payload.get('version', 0))
+    except (signing.BadSignature, AttributeError, KeyError, TypeError, ValueError):
+        return None
+    if version != mentor_feed_version(mentor_id):
+        return None
+    return mentor_id, version
+
+def sign_mentee_feed(mentee):
+    """Feed links carry the mentee's token version, so revoke_tokens() also disables them."""
+    return sign_mentee(mentee, salt=MENTEE_FEED_SALT)
+
+def load_mentee_feed(value):
+    return load_mentee(value, salt=MENTEE_FEED_SALT, expires=False)
+
+def feed_etag(link_version, version):
+    """
+    The link version counter and the mentor version, so both a revoked
+    link and any change within the same second yield a new validator.
+    """
+    return f'"{link_version:x}-{version:x}"'
+
+def feed_last_modified(version):
+    """Tag versions are time.time_ns() of the last change; HTTP dates have whole seconds."""
+    return version // 10**9
+
+def escape(text):
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '')
+    )
+
+def fold(line):
+    """Splits a content line into CRLF-terminated lines of at most 75 octets, never inside a character."""
+    data = line.encode()
+    if len(data) <= LINE_LIMIT:
+        return line + '\r\n'
+    lines = []
+    limit = LINE_LIMIT
+    while len(data) > limit:
+        cut = limit
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        lines.append(data[:cut].decode())
+        data = data[cut:]
+        # continuation lines start with a space, which counts towards the limit
+        limit = LINE_LIMIT - 1
+    lines.append(data.decode())
+    return '\r\n '.join(lines) + '\r\n'
+
+def format_datetime(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+def event(uid, stamp, start, end, summary, description='', category='', transparent=False, extra=()):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{format_datetime(start)}',
+        f'DTEND:{format_datetime(end)}',
+        f'SUMMARY:{escape(summary)}',
+    ]
+    if description:
+        lines.append(f'DESCRIPTION:{escape(description)}')
+    if category:
+        lines.append(f'CATEGORIES:{escape(category)}')
+    if transparent:
+        lines.append('TRANSP:TRANSPARENT')
+    lines.extend(extra)
+    lines.append('END:VEVENT')
+    return ''.join(map(fold, lines))
+
+def meeting_event(meeting_id, start, tag, description, host, stamp, summary):
+    return event(
+        f'meeting-{meeting_id}@{host}',
+        stamp,
+        start,
+        start + AppointmentAvailability.SLOT_DURATION,
+        summary,
+        description,
+        TAGS.get(tag, tag),
+    )
+
+def rule_event(rule, host, stamp):
+    """One recurring event per availability rule, covering its whole window."""
+    first = rule.starts_on + timedelta(days=(rule.weekday - rule.starts_on.weekday()) % 7)
+    rrule = 'RRULE:FREQ=WEEKLY'
+    if rule.ends_on:
+        rrule += f';UNTIL={format_datetime(datetime.combine(rule.ends_on, rule.end_time))}'
+    exdates = [
+        f'EXDATE:{format_datetime(datetime.combine(date.fromisoformat(day), rule.start_time))}'
+        for day in sorted(rule.exceptions)
+    ]
+    return event(
+        f'rule-{rule.id}@{host}',
+        stamp,
+        datetime.combine(first, rule.start_time),
+        datetime.combine(first, rule.end_time),
+        'Open slots',
+        transparent=True,
+        extra=[rrule, *exdates],
+    )
+
+def calendar(name, events):
+    """Wraps ``events`` in a VCALENDAR, yielding FEED_BUFFER_SIZE chunks rather than one per event."""
+    buffer = [''.join(map(fold, [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape(name)}',
+    ]))]
+    size = 0
+    for text in events:
+        buffer.append(text)
+        size += len(text)
+        if size >= FEED_BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(fold('END:VCALENDAR'))
+    yield ''.join(buffer)
+
+def stamp_for(version):
+    return datetime.fromtimestamp(feed_last_modified(version), timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def mentor_feed(mentor_id, version, host):
+    """
+    Yields the mentor's feed: booked meetings and free one-off slots from
+    FEED_HISTORY ago on, and one recurring event per availability rule.
+    Rules come from the cached mentor_rules(); the two row queries are
+    streamed as plain tuples, in no particular order (clients sort events).
+    """
+    stamp = stamp_for(version)
+    since = datetime.now() - FEED_HISTORY
+    meetings = (
+        Meeting.objects.filter(date__mentor_id=mentor_id, date__appointment_date__gte=since)
+        .values_list('id', 'date__appointment_date', 'tag', 'description', 'mentee__name')
+        .iterator(chunk_size=FEED_CHUNK_SIZE)
+    )
+    free_slots = (
+        AppointmentAvailability.objects.filter(mentor_id=mentor_id, scheduled=False, appointment_date__gte=since)
+        .values_list('id', 'appointment_date')
+        .iterator(chunk_size=FEED_CHUNK_SIZE)
+    )
+    return calendar('Mentorship', chain(
+        (
+            meeting_event(meeting_id, start, tag, description, host, stamp, f'{name}: {TAGS.get(tag, tag)}')
+            for meeting_id, start, tag, description, name in meetings
+        ),
+        (
+            event(
+                f'slot-{slot_id}@{host}',
+                stamp,
+                start,
+                start + AppointmentAvailability.SLOT_DURATION,
+                'Open slot',
+                transparent=True,
+            )
+            for slot_id, start in free_slots
+        ),
+        (rule_event(rule, host, stamp) for rule in mentor_rules(mentor_id)),
+    ))
+
+def mentee_feed(mentee, version, host):
+    """Yields the mentee's meetings from FEED_HISTORY ago on."""
+    stamp = stamp_for(version)
+    meetings = (
+        Meeting.objects.filter(mentee_id=mentee.pk, date__appointment_date__gte=datetime.now() - FEED_HISTORY)
+        .values_list('id', 'date__appointment_date', 'tag', 'description')
+        .iterator(chunk_size=FEED_CHUNK_SIZE)
+    )
+    return calendar('Mentorship meetings', (
+        meeting_event(meeting_id, start, tag, description, host, stamp, f'Mentoring: {TAGS.get(tag, tag)}')
+        for meeting_id, start, tag, description in meetings
+    ))
+
+def feed_response(request, link_version, version, events):
+    """
+    Answers a feed request from the versions alone when the client already
+    has them (If-None-Match); otherwise streams ``events()``. Last-Modified
+    is informational: it has whole seconds, so If-Modified-Since alone
+    could hide a change made within the same second and always gets the
+    full feed. Either way the response asks caches to revalidate every time.
+    """
+    etag = feed_etag(link_version, version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = StreamingHttpResponse(events(), content_type=CONTENT_TYPE)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(feed_last_modified(version))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
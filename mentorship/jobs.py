@@ -0,0 +1,157 @@
+import logging
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from .media import extract_video_metadata, generate_photo_renditions
+from .models import MediaJob, Mentorship, Upload
+
+logger = logging.getLogger(__name__)
+
+RETRY_BACKOFF_SECONDS = 30
+
+def process_photo(object_id):
+    generate_photo_renditions(Mentorship.objects.get(id=object_id))
+
+def process_video(object_id):
+    extract_video_metadata(Upload.objects.get(id=object_id))
+
+HANDLERS = {
+    'photo': process_photo,
+    'video': process_video,
+}
+
+def enqueue(kind, object_id):
+    """
+    Queues a media job unless an identical one is already waiting. The
+    unique_pending_media_job constraint settles concurrent calls.
+    """
+    try:
+        job, _ = MediaJob.objects.get_or_create(kind=kind, object_id=object_id, status='pending')
+    except IntegrityError:
+        # A worker claimed the waiting job between our insert and lookup
+        job, _ = MediaJob.objects.get_or_create(kind=kind, object_id=object_id, status='pending')
+    return job
+
+def enqueue_photo(mentee):
+    if mentee.photo:
+        return enqueue('photo', mentee.id)
+
+def enqueue_video(upload):
+    return enqueue('video', upload.id)
+
+def claim_job():
+    """
+    Picks the oldest runnable job and marks it running. The claim is a
+    conditional UPDATE on status, so concurrent workers never run the same job.
+    """
+    now = timezone.now()
+    candidates = MediaJob.objects.filter(status='pending', run_after__lte=now).order_by('run_after', 'id')
+    for job_id in candidates.values_list('id', flat=True)[:10]:
+        claimed = MediaJob.objects.filter(id=job_id, status='pending').update(
+            status='running', started_at=now
+        )
+        if claimed:
+            return MediaJob.objects.get(id=job_id)
+    return None
+
+def run_job(job):
+    attempts = job.attempts + 1
+    try:
+        HANDLERS[job.kind](job.object_id)
+    except (Mentorship.DoesNotExist, Upload.DoesNotExist):
+        # The object is gone; nothing left to process
+        MediaJob.objects.filter(id=job.id).update(
+            status='done', attempts=attempts, finished_at=timezone.now(), last_error='Object deleted'
+        )
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Media job %s failed (attempt %s/%s)', job, attempts, job.max_attempts)
+        if attempts >= job.max_attempts:
+            MediaJob.objects.filter(id=job.id).update(
+                status='failed', attempts=attempts, finished_at=timezone.now(), last_error=error
+            )
+        else:
+            try:
+                with transaction.atomic():
+                    MediaJob.objects.filter(id=job.id).update(
+                        status='pending',
+                        attempts=attempts,
+                        last_error=error,
+                        run_after=timezone.now() + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)),
+                    )
+            except IntegrityError:
+                # The object was queued again while this job ran; that job does the work
+                MediaJob.objects.filter(id=job.id).update(
+                    status='done', attempts=attempts, finished_at=timezone.now(), last_error=error
+                )
+        return False
+
+    MediaJob.objects.filter(id=job.id).update(status='done', attempts=attempts, finished_at=timezone.now())
+    return True
+
+def drain(max_jobs=None):
+    """Runs jobs in the current thread until the queue is empty; returns (succeeded, failed)."""
+    succeeded = failed = 0
+    while max_jobs is None or succeeded + failed < max_jobs:
+        job = claim_job()
+        if job is None:
+            break
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+def _drain_in_thread(max_jobs):
+    try:
+        return drain(max_jobs)
+    finally:
+        connection.close()
+
+def process_batch(concurrency=2, max_jobs=None):
+    """
+    Drains the queue with ``concurrency`` worker threads and returns
+    throughput metrics for the batch.
+    """
+    close_old_connections()
+    start = time.perf_counter()
+    per_worker = None if max_jobs is None else -(-max_jobs // concurrency)
+    if concurrency == 1:
+        results = [drain(per_worker)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(_drain_in_thread, [per_worker] * concurrency))
+
+    elapsed = time.perf_counter() - start
+    succeeded = sum(result[0] for result in results)
+    failed = sum(result[1] for result in results)
+    return {
+        'succeeded': succeeded,
+        'failed': failed,
+        'seconds': elapsed,
+        'jobs_per_second': (succeeded + failed) / elapsed if elapsed else 0.0,
+    }
+
+def requeue_stale(older_than=timedelta(minutes=15)):
+    """Puts jobs left running by a crashed worker back on the queue."""
+    stale = MediaJob.objects.filter(status='running', started_at__lt=timezone.now() - older_than)
+    requeued = 0
+    for job_id in stale.values_list('id', flat=True):
+        try:
+            with transaction.atomic():
+                requeued += MediaJob.objects.filter(id=job_id, status='running').update(status='pending')
+        except IntegrityError:
+            # The object was queued again since; that job does the work
+            MediaJob.objects.filter(id=job_id).update(
+                status='done', finished_at=timezone.now(), last_error='Superseded by a newer job'
+            )
+    return requeued
+
+def queue_stats():
+    counts = dict(MediaJob.objects.values_list('status').annotate(total=Count('id')).order_by())
+    return {status: counts.get(status, 0) for status, _ in MediaJob.status_choices}
@@ -0,0 +1,240 @@
+"""
+In-process publish/subscribe of slot events, behind the schedule page's
+server-sent event stream.
+
+Each open stream is a small mailbox registered under its mentor, waited on
+by a suspended coroutine of the ASGI worker's event loop: an idle client
+costs about 10 KiB and no thread. The booking path publishes from
+whichever thread it runs on (sync_to_async's pool, a WSGI worker or a
+management command), after its transaction commits; publish() hands the
+event to every event loop with subscribers in one call_soon_threadsafe and
+the loop fans it out to its mailboxes.
+
+core.asgi serves the stream with slot_events_app(), outside Django's
+request handling: Django runs the sync hooks of each ASGI request's
+middleware in a thread that is kept until the response ends, which for a
+stream would be a thread per open client.
+
+Events only reach streams connected to the publishing process. Clients of
+other workers keep the snapshot they loaded and still get the booking
+error on conflict, as before.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict, deque
+from django.conf import settings
+from django.db import transaction
+from django.http.cookie import parse_cookie
+from .auth import load_mentee
+
+# Routed by core.asgi before Django's URLconf, which has no view for it
+SLOT_EVENTS_PATH = '/mentorship/schedule_meeting/events/'
+# Events a slow client may have queued before it is told to reload instead
+EVENT_QUEUE_SIZE = 100
+# Reconnect delay suggested to EventSource clients, in milliseconds
+EVENT_RETRY = 5000
+RESYNC = {'event': 'resync'}
+KEEPALIVE = {'event': None}
+
+class Subscription:
+    """
+    One stream's mailbox: a deque and, while the stream waits, a future.
+    Lighter than an asyncio.Queue, which matters with thousands of them.
+    Only touched from the subscription's own loop.
+    """
+    def __init__(self, mentor_id, loop, queue_size):
+        self.mentor_id = mentor_id
+        self.loop = loop
+        self.queue_size = queue_size
+        self.events = deque()
+        self.waiter = None
+
+    def put(self, event):
+        """A stream that falls queue_size events behind gets a single resync instead."""
+        if len(self.events) >= self.queue_size:
+            self.events.clear()
+            event = RESYNC
+        self.events.append(event)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    def idle(self):
+        return not self.events
+
+    async def get(self):
+        while not self.events:
+            self.waiter = self.loop.create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.events.popleft()
+
+class SlotEvents:
+    """
+    The subscriptions of this process, by mentor. Rather than a timer per
+    stream, each event loop runs one heartbeat task that drops a keepalive
+    into every idle mailbox it serves every ``heartbeat`` seconds, and stops
+    once the loop has no streams left.
+    """
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE, heartbeat=15):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._subscriptions = defaultdict(set)
+        self._heartbeats = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, mentor_id):
+        """Registers a stream for ``mentor_id`` on the running event loop."""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(mentor_id, loop, self.queue_size)
+        with self._lock:
+            self._subscriptions[mentor_id].add(subscription)
+            if loop not in self._heartbeats:
+                self._heartbeats[loop] = loop.create_task(self.keep_alive(loop))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.mentor_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.mentor_id]
+
+    def publish(self, mentor_id, event):
+        """Delivers ``event`` to every stream of ``mentor_id``; safe to call from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(mentor_id, ()))
+
+        by_loop = defaultdict(list)
+        for subscription in subscriptions:
+            by_loop[subscription.loop].append(subscription)
+        for loop, targets in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver, targets, event)
+            except RuntimeError:
+                # The loop was closed; its streams are gone with it
+                pass
+
+    async def keep_alive(self, loop):
+        try:
+            while True:
+                await asyncio.sleep(self.heartbeat)
+                with self._lock:
+                    streams = [
+                        subscription
+                        for subscriptions in self._subscriptions.values()
+                        for subscription in subscriptions
+                        if subscription.loop is loop
+                    ]
+                if not streams:
+                    return
+                deliver([subscription for subscription in streams if subscription.idle()], KEEPALIVE)
+        finally:
+            with self._lock:
+                self._heartbeats.pop(loop, None)
+
+    def subscriber_count(self, mentor_id=None):
+        with self._lock:
+            if mentor_id is not None:
+                return len(self._subscriptions.get(mentor_id, ()))
+            return sum(map(len, self._subscriptions.values()))
+
+def deliver(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.put(event)
+
+slot_events = SlotEvents(
+    getattr(settings, 'SLOT_EVENT_QUEUE_SIZE', EVENT_QUEUE_SIZE),
+    getattr(settings, 'SLOT_EVENT_HEARTBEAT', 15),
+)
+
+def slot_event(kind, slot_id, start=None, end=None):
+    return {
+        'event': kind,
+        'slot': slot_id,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+    }
+
+def publish_on_commit(mentor_id, event):
+    """Publishes once the surrounding transaction commits, so streams never see a rolled back booking."""
+    transaction.on_commit(lambda: slot_events.publish(mentor_id, event))
+
+def format_event(event):
+    data = {key: value for key, value in event.items() if key != 'event'}
+    return f'event: {event["event"]}\ndata: {json.dumps(data)}\n\n'
+
+async def event_stream(mentor_id):
+    """
+    Yields the server-sent event stream of ``mentor_id``'s slots: a retry
+    hint, then every booked/released event, and a comment line when the
+    heartbeat finds the stream idle so proxies keep the connection open.
+    Ends after a resync event; the client reconnects and reloads.
+    """
+    subscription = slot_events.subscribe(mentor_id)
+    try:
+        yield f'retry: {EVENT_RETRY}\n\n'
+        while True:
+            event = await subscription.get()
+            if event is KEEPALIVE:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+            if event is RESYNC:
+                return
+    finally:
+        slot_events.unsubscribe(subscription)
+
+EVENT_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    # Keep nginx from buffering the stream
+    (b'x-accel-buffering', b'no'),
+]
+
+async def send_status(send, status):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def slot_events_app(scope, receive, send):
+    """
+    ASGI application for the schedule page's event stream. The signed
+    mentee cookie is all it needs, so it skips Django's middleware and runs
+    entirely on the event loop: one waiting task per open stream and one
+    watching for the client to disconnect.
+    """
+    if scope['method'] not in ('GET', 'HEAD'):
+        return await send_status(send, 405)
+
+    cookies = parse_cookie(dict(scope['headers']).get(b'cookie', b'').decode('latin-1'))
+    mentee = load_mentee(cookies.get('auth_token'))
+    if mentee is None:
+        # Any status but 200 stops EventSource from reconnecting
+        return await send_status(send, 403)
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': EVENT_HEADERS})
+    if scope['method'] == 'HEAD':
+        return await send({'type': 'http.response.body', 'body': b''})
+
+    stream = event_stream(mentee.user_id)
+
+    async def pump():
+        async for chunk in stream:
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(disconnected())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await stream.aclose()
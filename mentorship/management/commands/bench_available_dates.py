@@ -0,0 +1,91 @@
+from datetime import datetime, time, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from mentorship.benchmarks import benchmark_database, timer
+from mentorship.models import AppointmentAvailability
+from mentorship.scheduling import SLOT_DURATION, create_rule
+from mentorship.services import available_calendar, available_days
+
+def legacy_available_dates(mentor_id):
+    """The original view loop: fetch every future free slot and dedupe in Python."""
+    rows = AppointmentAvailability.objects.filter(
+        mentor_id=mentor_id,
+        appointment_date__gte=datetime.now(),
+        scheduled=False
+    ).values('id', 'appointment_date')
+
+    fetched = 0
+    calendar = []
+    unique_dates = set()
+    for row in rows:
+        fetched += 1
+        date_only = row['appointment_date'].date()
+        if date_only in unique_dates:
+            continue
+        unique_dates.add(date_only)
+        calendar.append({
+            'month': row['appointment_date'].strftime('%B'),
+            'weekday': row['appointment_date'].strftime('%A'),
+            'appointment_date': row['appointment_date'].strftime('%d/%m/%Y'),
+        })
+    return calendar, fetched
+
+class Command(BaseCommand):
+    help = (
+        'Compares the legacy available-dates loop with the calendar built from stored slot '
+        'rows, the same calendar expanded from weekly availability rules, and its cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', nargs='+', type=int, default=[30, 180, 365])
+        parser.add_argument('--slots-per-day', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"days":>6} {"slots":>8} {"legacy rows":>12} {"legacy ms":>10} '
+            f'{"stored ms":>10} {"rules ms":>9} {"cached ms":>10}'
+        )
+
+        with benchmark_database():
+            for days in options['days']:
+                mentor = User.objects.create(username=f'bench_mentor_{days}')
+                first = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=1)
+                AppointmentAvailability.objects.bulk_create([
+                    AppointmentAvailability(
+                        appointment_date=first + timedelta(days=day, minutes=50 * slot),
+                        mentor=mentor
+                    )
+                    for day in range(days)
+                    for slot in range(options['slots_per_day'])
+                ], batch_size=5000)
+
+                # The same offer as one rule per weekday, with nothing stored
+                rules_mentor = User.objects.create(username=f'bench_rules_mentor_{days}')
+                end_time = (datetime.combine(first, time(8)) + SLOT_DURATION * options['slots_per_day']).time()
+                for weekday in range(7):
+                    create_rule(rules_mentor, weekday, time(8), end_time, first.date(), weeks=days // 7 + 1)
+
+                with timer() as legacy:
+                    for _ in range(repeat):
+                        _, legacy_rows = legacy_available_dates(mentor.pk)
+
+                with timer() as stored:
+                    for _ in range(repeat):
+                        available_days(mentor.pk)
+
+                with timer() as rules:
+                    for _ in range(repeat):
+                        available_days(rules_mentor.pk)
+
+                with timer() as cached:
+                    for _ in range(repeat):
+                        available_calendar(mentor.pk)
+
+                self.stdout.write(
+                    f'{days:>6} {days * options["slots_per_day"]:>8} {legacy_rows:>12} '
+                    f'{legacy["seconds"] / repeat * 1000:>10.2f} '
+                    f'{stored["seconds"] / repeat * 1000:>10.2f} {rules["seconds"] / repeat * 1000:>9.2f} '
+                    f'{cached["seconds"] / repeat * 1000:>10.3f}'
+                )
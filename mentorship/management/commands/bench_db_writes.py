@@ -0,0 +1,135 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import override_settings
+from mentorship.benchmarks import benchmark_database
+from mentorship.models import Mentorship
+from mentorship.scheduling import SLOT_DURATION, SlotUnavailable, book_slot, create_slots
+from mentorship.services import available_days, meeting_page
+
+@contextmanager
+def sqlite_defaults():
+    """Django's stock SQLite setup: rollback journal, deferred transactions, 5 s timeout."""
+    options = connection.settings_dict['OPTIONS']
+    saved = dict(options)
+    options.clear()
+    try:
+        with override_settings(SQLITE_PRAGMAS={'journal_mode': 'DELETE'}):
+            yield
+    finally:
+        options.clear()
+        options.update(saved)
+
+def run_workload(workers, writes, readers):
+    """
+    Each of ``workers`` threads opens ``writes`` slots for its own mentor
+    and books each one (a read-then-write transaction followed by an
+    UPDATE + INSERT transaction) while ``readers`` threads keep listing
+    meetings and free days. Returns (write latencies, elapsed seconds,
+    failed writes, reads completed).
+    """
+    pairs = []
+    for i in range(workers):
+        mentor = User.objects.create(username=f'bench_writer_{i}')
+        pairs.append((mentor, Mentorship.objects.create(name=f'Writer {i}', stage='E1', user=mentor)))
+    first = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    latencies = []
+    errors = []
+    reads = []
+    done = threading.Event()
+    barrier = threading.Barrier(workers + readers)
+
+    def writer(mentor, mentee):
+        timings, failures = [], 0
+        try:
+            barrier.wait()
+            for i in range(writes):
+                start = time.perf_counter()
+                try:
+                    slot, = create_slots(mentor, [first + SLOT_DURATION * i])
+                    book_slot(mentee, slot.id, 'D', 'Benchmark')
+                except (OperationalError, SlotUnavailable):
+                    # "database is locked": the write is lost
+                    failures += 1
+                    continue
+                timings.append(time.perf_counter() - start)
+        finally:
+            connection.close()
+            latencies.extend(timings)
+            errors.append(failures)
+
+    def reader(n):
+        mentor = pairs[n % workers][0]
+        count = 0
+        try:
+            barrier.wait()
+            while not done.is_set():
+                try:
+                    meeting_page(mentor)
+                    list(available_days(mentor.id))
+                    count += 1
+                except OperationalError:
+                    pass
+        finally:
+            connection.close()
+            reads.append(count)
+
+    writers = [threading.Thread(target=writer, args=pair) for pair in pairs]
+    threads = writers + [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+    return latencies, elapsed, sum(errors), sum(reads)
+
+class Command(BaseCommand):
+    help = (
+        'Measures concurrent write throughput (meeting bookings from several threads) '
+        'for the configured DATABASE_PROFILE. SQLite runs on a temporary file; with '
+        '--compare-defaults it is also run with Django\'s stock SQLite settings. Point '
+        'DATABASE_PROFILE=postgres at a local server to measure the pooled profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=100, help='Slots opened and booked per worker')
+        parser.add_argument('--readers', type=int, default=4, help='Threads reading while the workers write')
+        parser.add_argument('--compare-defaults', action='store_true')
+
+    def handle(self, *args, **options):
+        workers, writes, readers = options['workers'], options['writes'], options['readers']
+        runs = [(settings.DATABASE_PROFILE, None)]
+        if connection.vendor == 'sqlite' and options['compare_defaults']:
+            runs.insert(0, ('sqlite-defaults', sqlite_defaults))
+
+        self.stdout.write(f'{workers} writers x {writes} slots opened and booked, {readers} readers')
+        self.stdout.write(
+            f'{"profile":<16} {"writes/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"failed":>7} {"reads/s":>9}'
+        )
+        for label, setup in runs:
+            with tempfile.TemporaryDirectory() as tmp:
+                test_name = os.path.join(tmp, 'bench.sqlite3') if connection.vendor == 'sqlite' else None
+                with setup() if setup else nullcontext(), benchmark_database(test_name):
+                    latencies, elapsed, errors, reads = run_workload(workers, writes, readers)
+
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+            self.stdout.write(
+                f'{label:<16} {len(latencies) / elapsed:>9.1f} '
+                f'{statistics.median(latencies) * 1000 if latencies else 0:>8.2f} '
+                f'{p99 * 1000:>8.2f} {errors:>7} {reads / elapsed:>9.1f}'
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from mentorship.benchmarks import SCALES, SESSION_MODES, benchmark_database, generate_dataset, mentor_page_queries
+
+class Command(BaseCommand):
+    help = (
+        'Prints the queries each mentor page issues (warm page caches) under every '
+        'session engine / user cache combination, from Django\'s db sessions to '
+        'signed-cookie sessions with cached users.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='small')
+
+    def handle(self, *args, **options):
+        with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            mentor, mentee = generate_dataset(**SCALES[options['scale']])
+            results = mentor_page_queries(mentor, mentee)
+
+        pages = list(next(iter(results.values())))
+        self.stdout.write(f'{"mode":<22}' + ''.join(f'{page:>12}' for page in pages))
+        for mode in SESSION_MODES:
+            self.stdout.write(f'{mode:<22}' + ''.join(f'{results[mode][page]:>12}' for page in pages))
@@ -0,0 +1,116 @@
+import asyncio
+import statistics
+import threading
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from mentorship.auth import sign_mentee
+from mentorship.live import SLOT_EVENTS_PATH, slot_event, slot_events
+from mentorship.models import Mentorship
+
+class Stream:
+    """One idle EventSource client driving the ASGI application directly."""
+    def __init__(self, application, path, cookie):
+        self.application = application
+        self.path = path
+        self.cookie = cookie
+        self.connected = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.received = []
+        self.status = None
+        self.requested = False
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            if message.get('body', b'').startswith(b'event:'):
+                self.received.append(time.perf_counter())
+            self.connected.set()
+
+    async def run(self):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': self.path,
+            'raw_path': self.path.encode(),
+            'query_string': b'',
+            'headers': [(b'host', b'testserver'), (b'cookie', f'auth_token={self.cookie}'.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        await self.application(scope, self.receive, self.send)
+
+class Command(BaseCommand):
+    help = (
+        'Opens many idle server-sent event streams (/mentorship/schedule_meeting/events/) through the '
+        'ASGI application on a single event loop, publishes slot events from another thread and '
+        'reports the memory each open stream holds and how long each event took to reach every stream.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', nargs='+', type=int, default=[100, 1000, 5000])
+        parser.add_argument('--events', type=int, default=10)
+
+    def handle(self, *args, **options):
+        from core.asgi import application
+
+        # The stream only reads the signed cookie, so no database rows are needed
+        cookie = sign_mentee(Mentorship(id=1, user_id=1, token_version=0))
+        path = SLOT_EVENTS_PATH
+
+        self.stdout.write(
+            f'{"streams":>8} {"KiB/stream":>11} {"threads":>8} {"p50 ms":>8} {"max ms":>8} {"delivered":>10}'
+        )
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for clients in options['clients']:
+                row = asyncio.run(self.measure(application, path, cookie, clients, options['events']))
+                self.stdout.write(
+                    f'{clients:>8} {row["kib"]:>11.1f} {row["threads"]:>8} '
+                    f'{row["p50"]:>8.2f} {row["max"]:>8.2f} {row["delivered"]:>9.0%}'
+                )
+
+    async def measure(self, application, path, cookie, clients, events):
+        # The simulated clients are built first so only the server side is counted
+        streams = [Stream(application, path, cookie) for _ in range(clients)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        tasks = [asyncio.create_task(stream.run()) for stream in streams]
+        await asyncio.gather(*(stream.connected.wait() for stream in streams))
+        kib = (tracemalloc.get_traced_memory()[0] - before) / 1024 / clients
+        tracemalloc.stop()
+        threads = threading.active_count()
+
+        # Booking runs in a worker thread; time each event until the last stream has it
+        latencies = []
+        for n in range(events):
+            expected = n + 1
+            sent = time.perf_counter()
+            await asyncio.to_thread(slot_events.publish, 1, slot_event('booked', n))
+            while any(len(stream.received) < expected for stream in streams):
+                await asyncio.sleep(0.001)
+            latencies.append(max(stream.received[n] for stream in streams) - sent)
+
+        for stream in streams:
+            stream.disconnect.set()
+        await asyncio.gather(*tasks)
+
+        delivered = sum(len(stream.received) for stream in streams) / (clients * events)
+        return {
+            'kib': kib,
+            'threads': threads,
+            'p50': statistics.median(latencies) * 1000,
+            'max': max(latencies) * 1000,
+            'delivered': delivered,
+        }
@@ -0,0 +1,50 @@
+import random
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from mentorship.auth import load_mentee, sign_mentee
+from mentorship.benchmarks import benchmark_database, bulk_mentees, timer
+from mentorship.models import Mentorship
+
+class Command(BaseCommand):
+    help = (
+        'Measures mentee authentication cost as the number of mentees grows: the '
+        'indexed token lookup done once at login against verifying the signed cookie on every request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000, 1000000])
+        parser.add_argument('--lookups', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        lookups = options['lookups']
+
+        self.stdout.write(f'{"mentees":>10} {"lookup us/req":>14} {"signed us/req":>14} {"signed req/s":>13}')
+        with benchmark_database():
+            mentor = User.objects.create(username='bench_mentor')
+            tokens = []
+            for size in sizes:
+                tokens += bulk_mentees(mentor, size - len(tokens))
+                sample = random.choices(tokens, k=lookups)
+
+                # Login: the raw token is looked up through its unique index
+                with timer() as lookup:
+                    for token in sample:
+                        Mentorship.objects.filter(token=token).first()
+
+                # Signed: the cookie is verified without any lookup
+                cookies = [
+                    sign_mentee(mentee)
+                    for mentee in Mentorship.objects.filter(token__in=set(sample[:100]))
+                ]
+                signed_sample = random.choices(cookies, k=lookups)
+                with timer() as signed:
+                    for cookie in signed_sample:
+                        load_mentee(cookie)
+
+                self.stdout.write(
+                    f'{size:>10} '
+                    f'{lookup["seconds"] / lookups * 1e6:>14.1f} '
+                    f'{signed["seconds"] / lookups * 1e6:>14.1f} '
+                    f'{lookups / signed["seconds"]:>13.0f}'
+                )
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from mentorship.benchmarks import DEFAULT_SCALES, SCALES, compare_to_baseline, run_suite
+
+class Command(BaseCommand):
+    help = (
+        'Measures query counts, wall time and peak memory of every mentorship '
+        'endpoint at several data scales and compares them with the stored baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', dest='scales', choices=SCALES, help='Scale to run; may be repeated')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per endpoint')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmark_baseline.json'))
+        parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+        parser.add_argument('--time-budget', type=float, default=2.0, help='Allowed wall time as a multiple of the baseline')
+        parser.add_argument('--memory-budget', type=float, default=1.5, help='Allowed peak memory as a multiple of the baseline')
+
+    def handle(self, *args, **options):
+        scales = options['scales'] or DEFAULT_SCALES
+        if not settings.PASSWORD_HASHERS[0].endswith('MD5PasswordHasher'):
+            self.stderr.write(
+                'The login endpoint is timed with the production password hasher; the baseline '
+                'is recorded with DJANGO_SETTINGS_MODULE=core.settings_benchmark.'
+            )
+
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            results = run_suite(scales, options['repeat'])
+
+        self.stdout.write(f'{"scale":<8} {"endpoint":<18} {"q cold":>6} {"q warm":>6} {"ms":>9} {"peak KiB":>9}')
+        for scale, endpoints in results.items():
+            for name, m in endpoints.items():
+                self.stdout.write(
+                    f'{scale:<8} {name:<18} {m["queries_cold"]:>6} {m["queries_warm"]:>6} '
+                    f'{m["time_ms"]:>9.2f} {m["peak_kb"]:>9.1f}'
+                )
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+            baseline.update(results)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            raise CommandError(f'No baseline at {baseline_path}; run with --update-baseline first.')
+
+        failures = compare_to_baseline(
+            results,
+            json.loads(baseline_path.read_text()),
+            options['time_budget'],
+            options['memory_budget'],
+        )
+        if failures:
+            raise CommandError('Benchmark budget exceeded:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget.'))
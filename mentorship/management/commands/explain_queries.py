@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from mentorship.benchmarks import (
+    SCALES, analyze_database, benchmark_database, explain_endpoints, generate_dataset,
+)
+from mentorship.models import AppointmentAvailability, Mentorship, Task, Upload
+
+# Indexes added for the hot paths (migration 0012); --compare drops them
+HOT_PATH_INDEXES = [
+    (Mentorship, 'mentorship_user_stage_idx'),
+    (Mentorship, 'mentorship_user_name_idx'),
+    (AppointmentAvailability, 'availability_free_slots_idx'),
+    (Task, 'task_mentee_done_idx'),
+    (Upload, 'upload_mentee_created_idx'),
+]
+
+def drop_hot_path_indexes():
+    with connection.schema_editor() as editor:
+        for model, name in HOT_PATH_INDEXES:
+            index, = [index for index in model._meta.indexes if index.name == name]
+            editor.remove_index(model, index)
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN on every query each view issues (with cold caches) against a '
+        'generated dataset and reports full table scans and temporary sorts. With --compare the hot-path '
+        'composite indexes are then dropped and the plans and timings shown again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='xlarge')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per endpoint and per statement')
+        parser.add_argument('--compare', action='store_true', help='Also run without the composite indexes')
+        parser.add_argument('--plans', action='store_true', help='Print every statement with its plan')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit non-zero if any view does a full scan')
+
+    def handle(self, *args, **options):
+        with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            self.stdout.write(f'Generating the {options["scale"]} dataset...')
+            mentor, mentee = generate_dataset(**SCALES[options['scale']])
+            analyze_database()
+            reports = [('indexed', explain_endpoints(mentor, mentee, options['repeat']))]
+            if options['compare']:
+                drop_hot_path_indexes()
+                analyze_database()
+                reports.append(('no indexes', explain_endpoints(mentor, mentee, options['repeat'])))
+
+        for label, report in reports:
+            self.stdout.write(f'\n{label}')
+            self.stdout.write(f'{"endpoint":<16} {"queries":>8} {"scans":>6} {"sorts":>6} {"sql ms":>9} {"cold ms":>9}')
+            for name, result in report.items():
+                statements = result['statements']
+                scans = sum(len(statement['full_scans']) for statement in statements)
+                sorts = sum(len(statement['temp_sorts']) for statement in statements)
+                self.stdout.write(
+                    f'{name:<16} {len(statements):>8} {scans:>6} {sorts:>6} {result["sql_ms"]:>9.2f} {result["cold_ms"]:>9.2f}'
+                )
+                for statement in result['statements']:
+                    if options['plans'] or statement['full_scans']:
+                        self.stdout.write(f'    [{statement["ms"]} ms] {statement["sql"][:160]}')
+                        for line in statement['plan']:
+                            self.stdout.write(f'      {line}')
+
+        if options['fail_on_scan'] and any(
+            statement['full_scans']
+            for result in reports[0][1].values()
+            for statement in result['statements']
+        ):
+            raise CommandError('Full table scans found.')
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from mentorship.transfer import RESOURCES, export_lines, file_format
+
+class Command(BaseCommand):
+    help = 'Streams a mentor\'s navigators, mentees or slots to a CSV or JSON Lines file (or stdout).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=RESOURCES)
+        parser.add_argument('--mentor', required=True, help='Username of the mentor whose rows are exported')
+        parser.add_argument('--output', help='File to write; defaults to stdout')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the output extension, else csv')
+
+    def handle(self, *args, **options):
+        try:
+            mentor = User.objects.get(username=options['mentor'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["mentor"]!r}.')
+
+        fmt = options['format'] or (file_format(options['output']) if options['output'] else 'csv')
+        lines = export_lines(mentor, options['resource'], fmt)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+            f.writelines(lines)
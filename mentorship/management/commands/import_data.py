@@ -0,0 +1,37 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from mentorship.transfer import IMPORT_CHUNK_SIZE, RESOURCES, TransferError, file_format, import_file
+
+class Command(BaseCommand):
+    help = (
+        'Imports navigators, mentees or slots for a mentor from a CSV (header row) or JSON Lines '
+        'file, reading it in chunks and writing each chunk with bulk_create in one transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=RESOURCES)
+        parser.add_argument('path')
+        parser.add_argument('--mentor', required=True, help='Username of the mentor the rows belong to')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            mentor = User.objects.get(username=options['mentor'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["mentor"]!r}.')
+
+        start = time.perf_counter()
+        with open(options['path'], newline='', encoding='utf-8-sig') as f:
+            try:
+                created = import_file(
+                    mentor,
+                    options['resource'],
+                    f,
+                    options['format'] or file_format(options['path']),
+                    options['chunk_size'],
+                )
+            except TransferError as e:
+                raise CommandError(str(e))
+        self.stdout.write(f'{created} {options["resource"]} imported in {time.perf_counter() - start:.2f}s')
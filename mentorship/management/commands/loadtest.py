@@ -0,0 +1,160 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from mentorship.auth import sign_mentee
+from mentorship.benchmarks import benchmark_database
+from mentorship.models import Mentorship, Task
+from mentorship.scheduling import create_slots
+
+DEFAULT_PATHS = ['/mentorship/schedule_date/', '/mentorship/mentee_tasks/']
+
+def summarize(label, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+    return (
+        f'{label:<10} {len(latencies) / elapsed:>9.1f} req/s '
+        f'p50 {statistics.median(latencies) * 1000 if latencies else 0:>7.2f} ms '
+        f'p99 {p99 * 1000:>7.2f} ms  errors {errors}'
+    )
+
+async def http_get(reader, writer, host, path, token):
+    """Sends one keep-alive GET and returns the status code once the body has been read."""
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\nCookie: auth_token={token}\r\n'
+        f'Connection: keep-alive\r\n\r\n'.encode()
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection') == 'close'
+
+async def run_remote(url, token, paths, concurrency, requests):
+    """Drives a running server (uvicorn/daphne for ASGI, runserver/gunicorn for WSGI)."""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies = []
+    errors = 0
+
+    async def worker(n):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in range(n):
+                path = paths[i % len(paths)]
+                start = time.perf_counter()
+                status, closed = await http_get(reader, writer, parts.netloc, path, token)
+                latencies.append(time.perf_counter() - start)
+                if status >= 400:
+                    errors += 1
+                if closed:
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, errors
+
+def run_wsgi_in_process(token, paths, concurrency, requests):
+    def worker(n):
+        client = Client()
+        client.cookies['auth_token'] = token
+        timings, failures = [], 0
+        for i in range(n):
+            start = time.perf_counter()
+            response = client.get(paths[i % len(paths)])
+            timings.append(time.perf_counter() - start)
+            failures += response.status_code >= 400
+        return timings, failures
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, [requests // concurrency] * concurrency))
+    elapsed = time.perf_counter() - start
+    return [t for timings, _ in results for t in timings], elapsed, sum(f for _, f in results)
+
+async def run_asgi_in_process(token, paths, concurrency, requests):
+    latencies = []
+    errors = 0
+
+    async def worker(n):
+        nonlocal errors
+        client = AsyncClient()
+        client.cookies['auth_token'] = token
+        for i in range(n):
+            start = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, errors
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the mentee endpoints. Without --url both the WSGI and ASGI '
+        'handlers are driven in-process against a throwaway database; with --url '
+        'a running server is driven over HTTP (e.g. "uvicorn core.asgi:application" '
+        'versus "gunicorn core.wsgi").'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--token', help='Mentee auth token to send (required with --url)')
+        parser.add_argument('--path', action='append', dest='paths', help='Endpoint path; may be repeated')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        concurrency = options['concurrency']
+        requests = options['requests']
+
+        if options['url']:
+            if not options['token']:
+                raise CommandError('--token is required with --url')
+            mentee = Mentorship.objects.filter(token=options['token']).first()
+            if mentee is None:
+                raise CommandError('Unknown mentee token')
+            # The server must share this SECRET_KEY to accept the cookie
+            cookie = sign_mentee(mentee)
+            result = asyncio.run(run_remote(options['url'], cookie, paths, concurrency, requests))
+            self.stdout.write(summarize(urlsplit(options['url']).netloc, *result))
+            return
+
+        # DEBUG would record every query and skew the numbers
+        with benchmark_database(), override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+            mentor = User.objects.create(username='loadtest_mentor')
+            mentee = Mentorship.objects.create(name='Load test mentee', stage='E1', user=mentor)
+            first = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            create_slots(mentor, [first + timedelta(days=day, hours=hour) for day in range(30) for hour in range(4)])
+            Task.objects.bulk_create([Task(mentee=mentee, task=f'Task {i}') for i in range(20)])
+
+            self.stdout.write(f'{requests} requests, concurrency {concurrency}, paths {paths}')
+            cookie = sign_mentee(mentee)
+            self.stdout.write(summarize('wsgi', *run_wsgi_in_process(cookie, paths, concurrency, requests)))
+            self.stdout.write(summarize('asgi', *asyncio.run(run_asgi_in_process(cookie, paths, concurrency, requests))))
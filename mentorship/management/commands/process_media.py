@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from mentorship.jobs import process_batch, queue_stats, requeue_stale
+from mentorship.uploads import expire_uploads
+
+class Command(BaseCommand):
+    help = 'Runs the media job queue (photo renditions and video metadata) and expires abandoned chunked uploads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Worker threads per batch.')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Stop a batch after this many jobs.')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        try:
+            while True:
+                requeue_stale()
+                expire_uploads()
+                metrics = process_batch(concurrency, options['max_jobs'])
+                if metrics['succeeded'] or metrics['failed']:
+                    self.stdout.write(
+                        f'{metrics["succeeded"]} done, {metrics["failed"]} failed '
+                        f'in {metrics["seconds"]:.2f}s ({metrics["jobs_per_second"]:.1f} jobs/s); '
+                        f'queue: {queue_stats()}'
+                    )
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from mentorship.analytics import rebuild
+
+class Command(BaseCommand):
+    help = 'Recomputes the analytics rollups from slots, meetings and tasks (e.g. after a backfill or import).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mentor', type=int, action='append', dest='mentors', help='Mentor id; may be repeated.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        daily, mentees = rebuild(options['mentors'], options['batch_size'])
+        self.stdout.write(
+            f'{daily} daily rows and {mentees} mentee rows written in {time.perf_counter() - start:.2f}s'
+        )
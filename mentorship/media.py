@@ -0,0 +1,103 @@
+import os
+import struct
+from io import BytesIO
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+THUMBNAIL_SIZE = (128, 128)
+WEBP_MAX_SIZE = (1024, 1024)
+WEBP_QUALITY = 80
+
+def render_webp(source, size, quality=WEBP_QUALITY, crop=False):
+    image = ImageOps.exif_transpose(Image.open(source))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    if crop:
+        image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    else:
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+def generate_photo_renditions(mentee):
+    """Writes a square WebP thumbnail and a size-capped WebP copy of the mentee photo."""
+    if not mentee.photo:
+        return
+
+    stem = os.path.splitext(os.path.basename(mentee.photo.name))[0]
+    for field, size, crop in (
+        ('photo_thumbnail', THUMBNAIL_SIZE, True),
+        ('photo_webp', WEBP_MAX_SIZE, False),
+    ):
+        mentee.photo.open('rb')
+        try:
+            data = render_webp(mentee.photo, size, crop=crop)
+        finally:
+            mentee.photo.close()
+
+        rendition = getattr(mentee, field)
+        if rendition:
+            rendition.delete(save=False)
+        rendition.save(f'{stem}.webp', ContentFile(data), save=False)
+
+    mentee.save(update_fields=['photo_thumbnail', 'photo_webp'])
+
+def mp4_duration(f):
+    """
+    Reads the duration in seconds from an MP4/MOV 'mvhd' atom by walking
+    the box headers, without loading media data. Returns None for other
+    containers.
+    """
+    def boxes(end):
+        while f.tell() + 8 <= end:
+            start = f.tell()
+            size, kind = struct.unpack('>I4s', f.read(8))
+            header = 8
+            if size == 1:
+                size = struct.unpack('>Q', f.read(8))[0]
+                header = 16
+            elif size == 0:
+                size = end - start
+            if size < header:
+                return
+            yield kind, start + header, start + size
+            f.seek(start + size)
+
+    f.seek(0, os.SEEK_END)
+    file_end = f.tell()
+    f.seek(0)
+    for kind, body, end in boxes(file_end):
+        if kind != b'moov':
+            continue
+        f.seek(body)
+        for inner, inner_body, _ in boxes(end):
+            if inner != b'mvhd':
+                continue
+            f.seek(inner_body)
+            version = f.read(1)[0]
+            f.read(3)
+            if version == 1:
+                _, _, timescale, duration = struct.unpack('>QQIQ', f.read(28))
+            else:
+                _, _, timescale, duration = struct.unpack('>IIII', f.read(16))
+            return round(duration / timescale, 3) if timescale else None
+    return None
+
+def extract_video_metadata(upload):
+    upload.video.open('rb')
+    try:
+        metadata = {'size': upload.video.size}
+        try:
+            duration = mp4_duration(upload.video.file)
+        except (struct.error, IndexError):
+            duration = None
+        if duration is not None:
+            metadata['duration'] = duration
+    finally:
+        upload.video.close()
+
+    upload.metadata = metadata
+    upload.save(update_fields=['metadata'])
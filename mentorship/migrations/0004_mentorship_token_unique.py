@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0003_alter_meeting_tag_task_upload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mentorship',
+            name='token',
+            field=models.CharField(max_length=16, unique=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0004_mentorship_token_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentavailability',
+            index=models.Index(fields=['mentor', 'appointment_date'], name='availability_mentor_date_idx'),
+        ),
+    ]
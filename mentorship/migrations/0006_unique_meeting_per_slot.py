@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:08
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def split_double_bookings(apps, schema_editor):
+    """
+    Slots booked more than once (the old booking code allowed it) keep
+    their first meeting; every other meeting gets its own copy of the slot,
+    so no meeting is lost when the constraint is added.
+    """
+    AppointmentAvailability = apps.get_model('mentorship', 'AppointmentAvailability')
+    Meeting = apps.get_model('mentorship', 'Meeting')
+
+    duplicated = (
+        Meeting.objects.values('date_id')
+        .annotate(total=Count('id'), first=Min('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for row in duplicated:
+        slot = AppointmentAvailability.objects.get(id=row['date_id'])
+        for meeting in Meeting.objects.filter(date_id=slot.id).exclude(id=row['first']):
+            meeting.date = AppointmentAvailability.objects.create(
+                appointment_date=slot.appointment_date,
+                mentor_id=slot.mentor_id,
+                scheduled=True,
+            )
+            meeting.save(update_fields=['date'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0005_availability_mentor_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='meeting',
+            constraint=models.UniqueConstraint(fields=('date',), name='unique_meeting_per_slot'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0007_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorship',
+            name='photo_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='photos/thumbnails'),
+        ),
+        migrations.AddField(
+            model_name='mentorship',
+            name='photo_webp',
+            field=models.ImageField(blank=True, null=True, upload_to='photos/webp'),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('photo', 'Mentee photo renditions'), ('video', 'Video metadata')], max_length=5)),
+                ('object_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=7)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='mediajob_status_run_after_idx')],
+            },
+        ),
+    ]
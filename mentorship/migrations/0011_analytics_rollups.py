@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0010_task_updated_at_auto_now'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenteeTaskStats',
+            fields=[
+                ('mentee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='mentorship.mentorship')),
+                ('tasks', models.IntegerField(default=0)),
+                ('done', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MentorDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tag', models.CharField(blank=True, max_length=5)),
+                ('slots', models.IntegerField(default=0)),
+                ('meetings', models.IntegerField(default=0)),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('mentor', 'day', 'tag'), name='unique_mentor_day_tag')],
+            },
+        ),
+    ]
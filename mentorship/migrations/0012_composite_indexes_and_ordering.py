@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-18 07:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0011_analytics_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='appointmentavailability',
+            options={'ordering': ['appointment_date']},
+        ),
+        migrations.AlterModelOptions(
+            name='mentorship',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='upload',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddIndex(
+            model_name='appointmentavailability',
+            index=models.Index(fields=['mentor', 'scheduled', 'appointment_date'], name='availability_free_slots_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorship',
+            index=models.Index(fields=['user', 'stage'], name='mentorship_user_stage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorship',
+            index=models.Index(fields=['user', 'name'], name='mentorship_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['mentee', 'done'], name='task_mentee_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['mentee', 'created_at'], name='upload_mentee_created_idx'),
+        ),
+    ]
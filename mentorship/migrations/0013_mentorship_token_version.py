@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0012_composite_indexes_and_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorship',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
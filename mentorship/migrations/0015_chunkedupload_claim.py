@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0014_availabilityrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunkedupload',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chunkedupload',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:18
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicate_pending_jobs(apps, schema_editor):
+    """Identical pending jobs do the same work, so only the oldest of each is kept."""
+    MediaJob = apps.get_model('mentorship', 'MediaJob')
+    keep = (
+        MediaJob.objects.filter(status='pending')
+        .values('kind', 'object_id')
+        .annotate(first=Min('id'))
+        .values_list('first', flat=True)
+        .order_by()
+    )
+    MediaJob.objects.filter(status='pending').exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorship', '0015_chunkedupload_claim'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_pending_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mediajob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('kind', 'object_id'), name='unique_pending_media_job'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('mentorship', '0016_unique_pending_media_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentorFeed',
+            fields=[
+                ('mentor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
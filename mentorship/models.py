@@ -1,6 +1,8 @@
 from datetime import timedelta
 import secrets
+import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class Navigator(models.Model):
@@ -26,12 +28,25 @@ class Mentorship(models.Model):
     )
     name = models.CharField(max_length=255)
     photo = models.ImageField(upload_to='photos', null=True, blank=True)
+    photo_thumbnail = models.ImageField(upload_to='photos/thumbnails', null=True, blank=True)
+    photo_webp = models.ImageField(upload_to='photos/webp', null=True, blank=True)
     stage = models.CharField(max_length=2, choices=stage_choices)
     navigator = models.ForeignKey(Navigator, null=True, blank=True, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    token = models.CharField(max_length=16)
-    
+    token = models.CharField(max_length=16, unique=True)
+    # Bumped to revoke the signed auth_token cookies issued so far
+    token_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Covers the dashboard's per-stage counts
+            models.Index(fields=['user', 'stage'], name='mentorship_user_stage_idx'),
+            # The dashboard's mentee list, already in name order
+            models.Index(fields=['user', 'name'], name='mentorship_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -41,6 +56,22 @@ class Mentorship(models.Model):
 
         super().save(*args, **kwargs)
 
+    def photo_thumbnail_url(self):
+        """Small rendition for lists, falling back to the original until the media worker has run."""
+        if self.photo_thumbnail:
+            return self.photo_thumbnail.url
+        if self.photo:
+            return self.photo.url
+        return ''
+
+    def photo_url(self):
+        """Size-capped WebP copy for viewing the photo, falling back to the original like photo_thumbnail_url()."""
+        if self.photo_webp:
+            return self.photo_webp.url
+        if self.photo:
+            return self.photo.url
+        return ''
+
     def unique_token(self):         
         while True:
             token = secrets.token_urlsafe(8)
@@ -48,16 +79,64 @@ class Mentorship(models.Model):
                 return token            
 
 class AppointmentAvailability(models.Model):
+    SLOT_DURATION = timedelta(minutes=50)
+
     appointment_date = models.DateTimeField(null=True, blank=True) 
     mentor = models.ForeignKey(User, on_delete=models.CASCADE)
     scheduled = models.BooleanField(default=False)
 
+    class Meta:
+        ordering = ['appointment_date']
+        indexes = [
+            models.Index(fields=['mentor', 'appointment_date'], name='availability_mentor_date_idx'),
+            # Covers the free-slot lookups (calendar days and hours of a day)
+            models.Index(fields=['mentor', 'scheduled', 'appointment_date'], name='availability_free_slots_idx'),
+        ]
+
     def appointment_end_time(self):
-        return self.appointment_date + timedelta(minutes=50)
+        return self.appointment_date + self.SLOT_DURATION
     
     def __str__(self):
         return str(self.appointment_date)
     
+class AvailabilityRule(models.Model):
+    """
+    A weekly window in which a mentor offers back-to-back slots, from
+    starts_on until the ends_on horizon (open-ended when empty), skipping
+    the ISO dates listed in exceptions. Its slots are generated on demand
+    by mentorship.recurrence; only booked ones are stored, as scheduled
+    AppointmentAvailability rows.
+    """
+    weekday_choices = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    mentor = models.ForeignKey(User, on_delete=models.CASCADE)
+    weekday = models.PositiveSmallIntegerField(choices=weekday_choices)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    starts_on = models.DateField()
+    ends_on = models.DateField(null=True, blank=True)
+    exceptions = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+
+    def __str__(self):
+        return f'{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}'
+
+class MentorFeed(models.Model):
+    """The mentor's calendar feed link; a missing row is version 0."""
+    mentor = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE)
+    # Bumped to revoke the feed links signed so far
+    version = models.PositiveIntegerField(default=0)
+
 class Meeting(models.Model):
     tag_choices = (
     ('D', 'Django'),
@@ -88,20 +167,134 @@ class Meeting(models.Model):
     tag = models.CharField(max_length=5, choices=tag_choices)
     description = models.TextField()    
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date'], name='unique_meeting_per_slot'),
+        ]
+
 class Task(models.Model):
     mentee = models.ForeignKey(Mentorship, on_delete=models.DO_NOTHING)
     task = models.CharField(max_length=255)
     done = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Covers the per-mentee task and completion counts
+            models.Index(fields=['mentee', 'done'], name='task_mentee_done_idx'),
+        ]
 
     def __str__(self):
         return self.task
 
+class TaskTemplate(models.Model):
+    """A reusable list of task descriptions a mentor can assign to many mentees at once."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+    tasks = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
 class Upload(models.Model):
     mentee = models.ForeignKey(Mentorship, on_delete=models.DO_NOTHING)
     video = models.FileField(upload_to='videos')
+    metadata = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['mentee', 'created_at'], name='upload_mentee_created_idx'),
+        ]
+
     def __str__(self):
         return self.video.name
+
+class MentorDailyStats(models.Model):
+    """
+    Per-mentor, per-day rollup maintained by mentorship.analytics. Rows with
+    an empty tag count the slots opened that day; rows with a meeting tag
+    count the meetings booked on that day's slots.
+    """
+    mentor = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    tag = models.CharField(max_length=5, blank=True)
+    slots = models.IntegerField(default=0)
+    meetings = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mentor', 'day', 'tag'], name='unique_mentor_day_tag'),
+        ]
+
+    def __str__(self):
+        return f'{self.mentor} {self.day} {self.tag or "slots"}'
+
+class MenteeTaskStats(models.Model):
+    """Task totals per mentee, maintained by mentorship.analytics."""
+    mentee = models.OneToOneField(Mentorship, on_delete=models.CASCADE, primary_key=True)
+    tasks = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+
+    def completion_rate(self):
+        return self.done / self.tasks if self.tasks else 0.0
+
+    def __str__(self):
+        return f'{self.mentee}: {self.done}/{self.tasks}'
+
+class ChunkedUpload(models.Model):
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    mentee = models.ForeignKey(Mentorship, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Set while a request writes a chunk, see uploads.claim_chunk()
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size})'
+
+class MediaJob(models.Model):
+    kind_choices = (
+        ('photo', 'Mentee photo renditions'),
+        ('video', 'Video metadata'),
+    )
+    status_choices = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    kind = models.CharField(max_length=5, choices=kind_choices)
+    object_id = models.BigIntegerField()
+    status = models.CharField(max_length=7, choices=status_choices, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='mediajob_status_run_after_idx'),
+        ]
+        constraints = [
+            # enqueue() relies on it to never queue the same work twice
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_media_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.object_id} ({self.status})'
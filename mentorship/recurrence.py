@@ -0,0 +1,158 @@
+"""
+Slots generated from weekly availability rules.
+
+A mentor offering slots all year no longer stores one row per slot: an
+AvailabilityRule describes the weekly window and its slots are expanded
+here, in memory, for the window a page shows. Only a booking materializes
+its slot (see scheduling.book_rule_slot), so the stored slots around a
+window are the booked ones plus any one-off slots, and the generated slots
+overlapping them are left out.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from heapq import merge
+from django.db.models import Q
+from .models import AppointmentAvailability, AvailabilityRule
+
+SLOT_DURATION = AppointmentAvailability.SLOT_DURATION
+
+def rule_days(rule, start, end):
+    """Yields the days from ``start`` to ``end`` (dates, inclusive) on which ``rule`` applies."""
+    day = max(start, rule.starts_on)
+    last = end if rule.ends_on is None else min(end, rule.ends_on)
+    day += timedelta(days=(rule.weekday - day.weekday()) % 7)
+    exceptions = set(rule.exceptions)
+    while day <= last:
+        if day.isoformat() not in exceptions:
+            yield day
+        day += timedelta(weeks=1)
+
+def rule_starts(rule, start, end):
+    """Yields the slot starts ``rule`` offers in [start, end), in order."""
+    for day in rule_days(rule, start.date(), end.date()):
+        slot = datetime.combine(day, rule.start_time)
+        window_end = datetime.combine(day, rule.end_time)
+        while slot + SLOT_DURATION <= window_end:
+            if start <= slot < end:
+                yield slot
+            slot += SLOT_DURATION
+
+def generate_starts(rules, start, end, taken=()):
+    """
+    Yields the slot starts of all ``rules`` in [start, end) in order,
+    leaving out those that overlap one of the sorted ``taken`` starts
+    (stored slots) or a slot generated just before.
+    """
+    taken = list(taken)
+    i = 0
+    previous = None
+    for slot in merge(*(rule_starts(rule, start, end) for rule in rules)):
+        if previous is not None and slot - previous < SLOT_DURATION:
+            continue
+        while i < len(taken) and taken[i] <= slot - SLOT_DURATION:
+            i += 1
+        if i < len(taken) and taken[i] - slot < SLOT_DURATION:
+            continue
+        previous = slot
+        yield slot
+
+def window_rules(mentor_id, start, end):
+    """The mentor's rules that may offer slots in [start, end)."""
+    return AvailabilityRule.objects.filter(
+        Q(ends_on__isnull=True) | Q(ends_on__gte=start.date()),
+        mentor_id=mentor_id,
+        starts_on__lte=end.date(),
+    )
+
+def window_slots(mentor_id, start, end):
+    """The mentor's stored slots overlapping [start, end), read on the (mentor, appointment_date) index."""
+    return AppointmentAvailability.objects.filter(
+        mentor_id=mentor_id,
+        appointment_date__gt=start - SLOT_DURATION,
+        appointment_date__lt=end,
+    ).order_by('appointment_date')
+
+def open_slots(rules, slots, mentor_id, start, end, not_before=None):
+    """
+    Returns the free slots in [start, end): the free stored ``slots`` and an
+    unsaved AppointmentAvailability (no id) for every generated slot that
+    starts at or after ``not_before``, ordered by start.
+    """
+    free = [slot for slot in slots if not slot.scheduled and start <= slot.appointment_date < end]
+    generated = generate_starts(rules, max(start, not_before or start), end, [slot.appointment_date for slot in slots])
+    free += [AppointmentAvailability(appointment_date=when, mentor_id=mentor_id) for when in generated]
+    return sorted(free, key=lambda slot: slot.appointment_date)
+
+def rule_slot_count(rule):
+    """Number of slots ``rule`` offers on each day it applies."""
+    length = datetime.combine(date.min, rule.end_time) - datetime.combine(date.min, rule.start_time)
+    return max(length // SLOT_DURATION, 0)
+
+def rules_by_day(rules, start, end):
+    """Maps each day in [start, end) on which one of ``rules`` applies to those rules."""
+    days = defaultdict(list)
+    for rule in rules:
+        for day in rule_days(rule, start.date(), end.date()):
+            days[day].append(rule)
+    return days
+
+def day_window(day, taken, start, end):
+    """The part of ``day`` within [start, end) and the sorted ``taken`` starts that may overlap it."""
+    day_start = datetime.combine(day, time.min)
+    day_end = day_start + timedelta(days=1)
+    near = taken[bisect_left(taken, day_start - SLOT_DURATION):bisect_left(taken, day_end)]
+    return max(start, day_start), min(end, day_end), near
+
+def rule_open_days(rules, taken, start, end, known=()):
+    """
+    Sorted days in [start, end), other than the ``known`` ones, on which
+    ``rules`` generate a slot that does not overlap the sorted ``taken``
+    starts (stored slots). A whole day with nothing stored on it is open
+    without expanding it (rules hold at least one slot); other days are
+    expanded only until their first free slot.
+    """
+    known = set(known)
+    days = []
+    for day, day_rules in rules_by_day(rules, start, end).items():
+        if day in known:
+            continue
+        first, last, near = day_window(day, taken, start, end)
+        if not near and last - first == timedelta(days=1):
+            days.append(day)
+        elif next(generate_starts(day_rules, first, last, near), None) is not None:
+            days.append(day)
+    return sorted(days)
+
+def rule_slot_counts(rules, taken, start, end):
+    """
+    Maps each day in [start, end) to the number of slots ``rules`` generate
+    on it, leaving out those overlapping the sorted ``taken`` starts. Only
+    days with stored slots or cut by the window are expanded; the others
+    count rule_slot_count() per rule, so the cost follows the days, not the
+    slots.
+    """
+    counts = {}
+    for day, day_rules in rules_by_day(rules, start, end).items():
+        first, last, near = day_window(day, taken, start, end)
+        if not near and last - first == timedelta(days=1):
+            count = sum(map(rule_slot_count, day_rules))
+        else:
+            count = sum(1 for _ in generate_starts(day_rules, first, last, near))
+        if count:
+            counts[day] = count
+    return counts
+
+def rule_overlaps(rule, rules):
+    """Returns the first of ``rules`` whose weekly window overlaps ``rule`` on some common day, or None."""
+    for other in rules:
+        if (
+            other.pk != rule.pk
+            and other.weekday == rule.weekday
+            and other.start_time < rule.end_time
+            and rule.start_time < other.end_time
+            and (other.ends_on is None or other.ends_on >= rule.starts_on)
+            and (rule.ends_on is None or rule.ends_on >= other.starts_on)
+        ):
+            return other
+    return None
@@ -0,0 +1,204 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from .analytics import refresh_slot_days
+from .live import publish_on_commit, slot_event
+from .models import AppointmentAvailability, AvailabilityRule, Meeting
+from .recurrence import generate_starts, rule_overlaps, window_rules, window_slots
+from .services import bump_mentor_version, invalidate_available_calendar
+
+SLOT_DURATION = AppointmentAvailability.SLOT_DURATION
+
+class RuleConflict(Exception):
+    """Raised when a new availability rule overlaps another rule of the same mentor."""
+    def __init__(self, rule):
+        self.rule = rule
+        super().__init__(f'Overlaps the {rule} availability')
+
+class SlotConflict(Exception):
+    """Raised when a requested slot overlaps another slot of the same mentor."""
+    def __init__(self, start):
+        self.start = start
+        super().__init__(f'Slot at {start:%d/%m/%Y %H:%M} overlaps an existing slot')
+
+def find_conflict(starts, existing):
+    """
+    Returns the first start in ``starts`` that overlaps another requested
+    start or one of the sorted ``existing`` slot starts, or None.
+    """
+    previous = None
+    for start in starts:
+        if previous is not None and start - previous < SLOT_DURATION:
+            return start
+        previous = start
+
+        i = bisect_left(existing, start)
+        if i < len(existing) and existing[i] - start < SLOT_DURATION:
+            return start
+        if i > 0 and start - existing[i - 1] < SLOT_DURATION:
+            return start
+    return None
+
+def slots_changed(mentor_id):
+    """Drops the mentor's cached calendar and page fragments."""
+    invalidate_available_calendar(mentor_id)
+    bump_mentor_version(mentor_id)
+
+def create_slots(mentor, starts):
+    """
+    Validates and inserts a batch of slots for ``mentor`` in one transaction.
+    Two slots overlap when one starts before the other's
+    appointment_end_time(). Existing slots around the batch are read with a
+    single range query on the (mentor, appointment_date) index, and the
+    mentor row is locked so concurrent batches for the same mentor cannot
+    both pass validation. Raises SlotConflict without inserting anything if
+    any slot overlaps.
+    """
+    starts = sorted(starts)
+    if not starts:
+        return []
+
+    with transaction.atomic():
+        User.objects.select_for_update().only('pk').get(pk=mentor.pk)
+
+        existing = list(
+            AppointmentAvailability.objects.filter(
+                mentor=mentor,
+                appointment_date__gt=starts[0] - SLOT_DURATION,
+                appointment_date__lt=starts[-1] + SLOT_DURATION,
+            )
+            .order_by('appointment_date')
+            .values_list('appointment_date', flat=True)
+        )
+
+        conflict = find_conflict(starts, existing)
+        if conflict is not None:
+            raise SlotConflict(conflict)
+
+        slots = AppointmentAvailability.objects.bulk_create([
+            AppointmentAvailability(appointment_date=start, mentor=mentor)
+            for start in starts
+        ])
+        # bulk_create skips post_save, so recount the touched days for analytics
+        refresh_slot_days(mentor.pk, {start.date() for start in starts})
+
+    # and drop the cached calendar and fragments once the slots are visible
+    transaction.on_commit(lambda: slots_changed(mentor.pk))
+    return slots
+
+class SlotUnavailable(Exception):
+    """Raised when a mentee tries to book a slot that is taken or not offered to them."""
+
+def book_slot(mentee, slot_id, tag, description):
+    """
+    Books ``slot_id`` for ``mentee`` and returns the new Meeting. The slot is
+    claimed with a single conditional UPDATE (scheduled=False -> True) scoped
+    to the mentee's mentor, so concurrent bookings of the same slot race on
+    the database row and exactly one of them wins. The unique constraint on
+    Meeting.date backs this up should anything bypass the claim.
+    """
+    try:
+        with transaction.atomic():
+            claimed = AppointmentAvailability.objects.filter(
+                id=slot_id,
+                mentor_id=mentee.user_id,
+                scheduled=False,
+            ).update(scheduled=True)
+
+            if not claimed:
+                raise SlotUnavailable('This slot is no longer available')
+
+            meeting = Meeting.objects.create(
+                date_id=slot_id,
+                mentee=mentee,
+                tag=tag,
+                description=description,
+            )
+            # Schedule pages list stored slots by id
+            publish_on_commit(mentee.user_id, slot_event('booked', slot_id))
+    except IntegrityError:
+        raise SlotUnavailable('This slot is no longer available')
+
+    invalidate_available_calendar(mentee.user_id)
+    return meeting
+
+def book_rule_slot(mentee, start, tag, description):
+    """
+    Books the slot starting at ``start`` that one of the mentor's
+    availability rules offers. Generated slots have no row until now: the
+    slot is stored already scheduled, together with its Meeting. The mentor
+    row is locked as in create_slots, so of two bookings of the same
+    generated slot only the first passes the overlap check.
+    """
+    if start < datetime.now():
+        raise SlotUnavailable('This slot is no longer available')
+
+    end = start + SLOT_DURATION
+    with transaction.atomic():
+        User.objects.select_for_update().only('pk').get(pk=mentee.user_id)
+
+        rules = list(window_rules(mentee.user_id, start, end))
+        taken = window_slots(mentee.user_id, start, end).values_list('appointment_date', flat=True)
+        if start not in generate_starts(rules, start, end, taken):
+            raise SlotUnavailable('This slot is no longer available')
+
+        slot = AppointmentAvailability.objects.create(appointment_date=start, mentor_id=mentee.user_id, scheduled=True)
+        meeting = Meeting.objects.create(date=slot, mentee=mentee, tag=tag, description=description)
+        # and generated ones by start time
+        publish_on_commit(mentee.user_id, slot_event('booked', slot.id, start))
+
+    invalidate_available_calendar(mentee.user_id)
+    return meeting
+
+def cancel_meeting(meeting):
+    """
+    Deletes ``meeting`` and offers its slot again. The slot row is kept and
+    marked free, whether it was opened on its own or stored when a rule's
+    slot was booked: a stored slot hides the generated one at that time, so
+    either way it is listed once.
+    """
+    slot = meeting.date
+    with transaction.atomic():
+        meeting.delete()
+        AppointmentAvailability.objects.filter(id=slot.id).update(scheduled=False)
+        publish_on_commit(slot.mentor_id, slot_event('released', slot.id, slot.appointment_date, slot.appointment_end_time()))
+
+    slot.scheduled = False
+    invalidate_available_calendar(slot.mentor_id)
+
+def create_rule(mentor, weekday, start_time, end_time, starts_on, weeks=None):
+    """
+    Saves a weekly availability rule for ``mentor``, repeating for ``weeks``
+    weeks from ``starts_on`` or until removed. Raises ValueError if the
+    window is shorter than one slot and RuleConflict if it overlaps another
+    of the mentor's rules.
+    """
+    if weekday not in dict(AvailabilityRule.weekday_choices):
+        raise ValueError('Unknown weekday.')
+    if datetime.combine(starts_on, start_time) + SLOT_DURATION > datetime.combine(starts_on, end_time):
+        raise ValueError('The time window is shorter than one slot')
+    if weeks is not None and weeks < 1:
+        raise ValueError('Weeks must be at least 1.')
+
+    rule = AvailabilityRule(
+        mentor=mentor,
+        weekday=weekday,
+        start_time=start_time,
+        end_time=end_time,
+        starts_on=starts_on,
+        ends_on=starts_on + timedelta(weeks=weeks, days=-1) if weeks else None,
+    )
+    with transaction.atomic():
+        User.objects.select_for_update().only('pk').get(pk=mentor.pk)
+        other = rule_overlaps(rule, AvailabilityRule.objects.filter(mentor=mentor, weekday=weekday))
+        if other is not None:
+            raise RuleConflict(other)
+        rule.save()
+    return rule
+
+def skip_rule_day(rule, day):
+    """Adds ``day`` to the rule's exceptions; slots already booked that day stay booked."""
+    if day.isoformat() not in rule.exceptions:
+        rule.exceptions = sorted([*rule.exceptions, day.isoformat()])
+        rule.save(update_fields=['exceptions'])
@@ -0,0 +1,221 @@
+from datetime import datetime, timedelta
+from core.caching import project_cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.http import Http404
+from .models import AppointmentAvailability, AvailabilityRule, Meeting, Mentorship
+from .recurrence import rule_open_days, window_slots
+
+def mentees_tag(mentor_id):
+    return f'mentees:{mentor_id}'
+
+def availability_tag(mentor_id):
+    return f'availability:{mentor_id}'
+
+def mentor_tag(mentor_id):
+    return f'mentor:{mentor_id}'
+
+STAGE_SUMMARY_KEY = 'mentorship:stage_summary:{}'
+
+def stage_summary(user):
+    """
+    Returns the (stages_flat, stages_count) pair used by the dashboard chart.
+    Counts come from a single grouped query and are cached per mentor until
+    one of the mentor's mentees is saved or deleted.
+    """
+    return project_cache.get_or_set(
+        STAGE_SUMMARY_KEY.format(user.pk),
+        lambda: compute_stage_summary(user),
+        None,
+        tags=[mentees_tag(user.pk)],
+    )
+
+MENTEE_PROFILE_KEY = 'mentorship:mentee:{}'
+
+async def amentee_profile(mentee):
+    """
+    Returns the full Mentorship behind a signed cookie's ``mentee`` for the
+    mentee's own pages, cached until one of the mentor's mentees is saved or
+    deleted.
+    """
+    async def compute():
+        return await Mentorship.objects.aget(id=mentee.pk)
+
+    return await project_cache.aget_or_set(
+        MENTEE_PROFILE_KEY.format(mentee.pk),
+        compute,
+        None,
+        tags=[mentees_tag(mentee.user_id)],
+    )
+
+def compute_stage_summary(user):
+    counts = dict(
+        Mentorship.objects.filter(user=user)
+        .values_list('stage')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+    stages_flat = []
+    stages_count = []
+    for stage, label in Mentorship.stage_choices:
+        if counts.get(stage):
+            stages_flat.append(label)
+            stages_count.append(counts[stage])
+
+    return stages_flat, stages_count
+
+def invalidate_stage_summary(user_id):
+    project_cache.invalidate_tags(mentees_tag(user_id))
+
+MEETINGS_PER_PAGE = 20
+
+def meeting_page(mentor, cursor=None, page_size=MEETINGS_PER_PAGE):
+    """
+    Returns one page of the mentor's meetings, latest slot first, plus the
+    cursor for the next (older) page, None on the last page. Pages are
+    keyset paginated on (appointment_date, id) so deep pages cost the same
+    as the first one, and related rows are joined in the same query.
+    """
+    meetings = (
+        Meeting.objects.filter(date__mentor=mentor, date__appointment_date__isnull=False)
+        .select_related('date', 'mentee')
+        .order_by('-date__appointment_date', '-id')
+    )
+
+    if cursor:
+        try:
+            last_date, last_id = cursor.rsplit('_', 1)
+            last_date = datetime.fromisoformat(last_date)
+            last_id = int(last_id)
+        except ValueError:
+            raise Http404('Invalid page cursor.')
+
+        meetings = meetings.filter(
+            Q(date__appointment_date__lt=last_date)
+            | Q(date__appointment_date=last_date, id__lt=last_id)
+        )
+
+    page = list(meetings[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        last = page[-1]
+        next_cursor = f'{last.date.appointment_date.isoformat()}_{last.id}'
+
+    return page, next_cursor
+
+AVAILABLE_CALENDAR_KEY = 'mentorship:available_dates:{}'
+AVAILABLE_DATES_HORIZON = timedelta(days=90)
+AVAILABLE_DATES_TIMEOUT = 300
+
+MENTOR_RULES_KEY = 'mentorship:availability_rules:{}'
+
+def mentor_rules(mentor_id):
+    """The mentor's availability rules, cached until the mentor's availability changes."""
+    return project_cache.get_or_set(
+        MENTOR_RULES_KEY.format(mentor_id),
+        lambda: list(AvailabilityRule.objects.filter(mentor_id=mentor_id)),
+        None,
+        tags=[availability_tag(mentor_id)],
+    )
+
+async def amentor_rules(mentor_id):
+    async def compute():
+        return [rule async for rule in AvailabilityRule.objects.filter(mentor_id=mentor_id)]
+
+    return await project_cache.aget_or_set(
+        MENTOR_RULES_KEY.format(mentor_id),
+        compute,
+        None,
+        tags=[availability_tag(mentor_id)],
+    )
+
+def stored_days(mentor_id, start, end):
+    """Distinct days in [start, end) with a free stored slot, computed by the database."""
+    return (
+        AppointmentAvailability.objects.filter(
+            mentor_id=mentor_id,
+            scheduled=False,
+            appointment_date__gte=start,
+            appointment_date__lt=end,
+        )
+        .annotate(day=TruncDate('appointment_date'))
+        .values_list('day', flat=True)
+        .distinct()
+        .order_by('day')
+    )
+
+def available_days(mentor_id):
+    """
+    Days within AVAILABLE_DATES_HORIZON on which the mentor has a free slot.
+    Days with a free stored slot come from one DISTINCT query; when the
+    mentor has availability rules, the days those rules add are merged in,
+    which costs a read of the stored slot starts in the window.
+    """
+    now = datetime.now()
+    end = now + AVAILABLE_DATES_HORIZON
+    days = list(stored_days(mentor_id, now, end))
+    rules = mentor_rules(mentor_id)
+    if not rules:
+        return days
+    taken = list(window_slots(mentor_id, now, end).values_list('appointment_date', flat=True))
+    return sorted(days + rule_open_days(rules, taken, now, end, known=days))
+
+async def aavailable_days(mentor_id):
+    now = datetime.now()
+    end = now + AVAILABLE_DATES_HORIZON
+    days = [day async for day in stored_days(mentor_id, now, end)]
+    rules = await amentor_rules(mentor_id)
+    if not rules:
+        return days
+    taken = [when async for when in window_slots(mentor_id, now, end).values_list('appointment_date', flat=True)]
+    return sorted(days + rule_open_days(rules, taken, now, end, known=days))
+
+def format_calendar(days):
+    return [
+        {
+            'month': day.strftime('%B'),
+            'weekday': day.strftime('%A'),
+            'appointment_date': day.strftime('%d/%m/%Y'),
+        }
+        for day in days
+    ]
+
+def available_calendar(mentor_id):
+    """
+    Returns the formatted calendar of days on which the mentor still has a
+    free slot within AVAILABLE_DATES_HORIZON (see available_days()). The
+    result is cached per mentor until that mentor's slots or rules change
+    (or the short timeout lets slots that started in the meantime drop off).
+    """
+    return project_cache.get_or_set(
+        AVAILABLE_CALENDAR_KEY.format(mentor_id),
+        lambda: format_calendar(available_days(mentor_id)),
+        AVAILABLE_DATES_TIMEOUT,
+        tags=[availability_tag(mentor_id)],
+    )
+
+async def aavailable_calendar(mentor_id):
+    async def compute():
+        return format_calendar(await aavailable_days(mentor_id))
+
+    return await project_cache.aget_or_set(
+        AVAILABLE_CALENDAR_KEY.format(mentor_id),
+        compute,
+        AVAILABLE_DATES_TIMEOUT,
+        tags=[availability_tag(mentor_id)],
+    )
+
+def invalidate_available_calendar(mentor_id):
+    project_cache.invalidate_tags(availability_tag(mentor_id))
+
+def mentor_version(mentor_id):
+    """
+    Returns the version of everything shown on the mentor's pages, used to
+    key cached template fragments.
+    """
+    return project_cache.tag_version(mentor_tag(mentor_id))
+
+def bump_mentor_version(mentor_id):
+    project_cache.invalidate_tags(mentor_tag(mentor_id))
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.caching import project_cache
+from . import analytics
+from .models import AppointmentAvailability, AvailabilityRule, Meeting, Mentorship, Navigator, Task, Upload
+from .services import availability_tag, bump_mentor_version, mentees_tag, mentor_tag
+
+def mentee_mentor_id(instance):
+    """Mentor of a Meeting/Task/Upload, without a query when the mentee is already loaded."""
+    if type(instance).mentee.is_cached(instance):
+        return instance.mentee.user_id
+    return Mentorship.objects.filter(id=instance.mentee_id).values_list('user_id', flat=True).first()
+
+@receiver(post_save, sender=Mentorship)
+@receiver(post_delete, sender=Mentorship)
+def mentorship_changed(sender, instance, **kwargs):
+    project_cache.invalidate_tags(mentees_tag(instance.user_id), mentor_tag(instance.user_id))
+
+@receiver(post_save, sender=AppointmentAvailability)
+@receiver(post_delete, sender=AppointmentAvailability)
+@receiver(post_save, sender=AvailabilityRule)
+@receiver(post_delete, sender=AvailabilityRule)
+def availability_changed(sender, instance, **kwargs):
+    project_cache.invalidate_tags(availability_tag(instance.mentor_id), mentor_tag(instance.mentor_id))
+
+@receiver(post_save, sender=Navigator)
+@receiver(post_delete, sender=Navigator)
+def navigator_changed(sender, instance, **kwargs):
+    bump_mentor_version(instance.user_id)
+
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Upload)
+@receiver(post_delete, sender=Upload)
+def mentee_content_changed(sender, instance, **kwargs):
+    mentor_id = mentee_mentor_id(instance)
+    if mentor_id is not None:
+        bump_mentor_version(mentor_id)
+
+@receiver(post_save, sender=AppointmentAvailability)
+def slot_saved(sender, instance, created, **kwargs):
+    if created:
+        analytics.slot_changed(instance, 1)
+
+@receiver(post_delete, sender=AppointmentAvailability)
+def slot_deleted(sender, instance, **kwargs):
+    analytics.slot_changed(instance, -1)
+
+@receiver(post_save, sender=Meeting)
+def meeting_saved(sender, instance, created, **kwargs):
+    if created:
+        analytics.meeting_changed(instance, 1)
+
+@receiver(post_delete, sender=Meeting)
+def meeting_deleted(sender, instance, **kwargs):
+    analytics.meeting_changed(instance, -1)
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    if created:
+        analytics.task_changed(instance.mentee_id, tasks=1, done=int(instance.done))
+    else:
+        # The previous state is unknown here, so recount the mentee
+        analytics.refresh_mentee_tasks([instance.mentee_id])
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    analytics.task_changed(instance.mentee_id, tasks=-1, done=-int(instance.done))
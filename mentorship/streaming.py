@@ -0,0 +1,98 @@
+import mimetypes
+import os
+import re
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date
+
+STREAM_BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+def parse_range(header, size):
+    """
+    Parses a single-range ``Range`` header into an inclusive (start, end)
+    pair. Returns None when the header should be ignored and raises
+    ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if size == 0:
+        raise ValueError('Range not satisfiable')
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+def iter_file_range(path, start, end):
+    """Yields bytes start..end (inclusive) of ``path`` one block at a time."""
+    remaining = end - start + 1
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while remaining > 0:
+            block = f.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+def stream_file(request, path):
+    """
+    Serves ``path`` with ETag/If-None-Match revalidation and single byte-range
+    support. Whole-file responses go through FileResponse so the server's
+    wsgi.file_wrapper (sendfile) can send them without copying through Python;
+    partial responses are streamed in fixed-size blocks, so memory use does
+    not depend on the file or range size.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse(status=404)
+
+    etag = file_etag(stat)
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    size = stat.st_size
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(iter_file_range(path, start, end), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -1,3 +1,1566 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import json
+import struct
+import os
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from collections import Counter
+from unittest import mock
+from time import sleep
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from io import BytesIO, StringIO
+from PIL import Image
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from core.auth import USER_KEY, CachedModelBackend, user_tag
+from core.caching import project_cache
+from core.profiling import ProfilingMiddleware, metrics
+from django.urls import reverse
+from django.utils import timezone
+from .auth import load_mentee, revoke_tokens, sign_mentee
+from .analytics import mentor_analytics, rebuild
+from .bulk_tasks import MAX_BULK_TASKS, create_tasks, toggle_task
+from .benchmarks import (
+    analyze_database, compare_to_baseline, endpoint_requests, explain, explain_endpoints, full_scans,
+    generate_dataset, mentor_page_queries, record_statements,
+)
+from .ical import fold, sign_mentee_feed, sign_mentor_feed
+from .live import SLOT_EVENTS_PATH, slot_event, slot_events, slot_events_app
+from .jobs import enqueue, enqueue_photo, enqueue_video, process_batch, queue_stats, requeue_stale
+from .media import mp4_duration
+from .models import (
+    AppointmentAvailability, AvailabilityRule, ChunkedUpload, MediaJob, Meeting, MenteeTaskStats, MentorDailyStats, Mentorship, Navigator,
+    Task, Upload,
+)
+from .recurrence import generate_starts, rule_slot_counts, rule_starts
+from .scheduling import (
+    SLOT_DURATION, SlotConflict, SlotUnavailable, book_rule_slot, book_slot, cancel_meeting, create_rule, create_slots,
+    skip_rule_day,
+)
+from .uploads import (
+    STREAM_BLOCK_SIZE, UPLOAD_MAX_AGE, ChunkError, claim_chunk, expire_uploads, file_digests, part_path, start_upload,
+)
+from .transfer import TransferError, import_file
+from .services import (
+    AVAILABLE_DATES_HORIZON, MEETINGS_PER_PAGE, available_calendar, available_days, bump_mentor_version, compute_stage_summary,
+    meeting_page, mentees_tag, mentor_version, stage_summary,
+)
 
-# Create your tests here.
+class MentorshipDashboardTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.navigator = Navigator.objects.create(name='Navigator', user=self.mentor)
+        self.client.force_login(self.mentor)
+
+    def create_mentees(self, stages):
+        for i, stage in enumerate(stages):
+            Mentorship.objects.create(
+                name=f'Mentee {i}', stage=stage, navigator=self.navigator, user=self.mentor
+            )
+
+    def test_stage_summary_counts_per_stage(self):
+        self.create_mentees(['E1', 'E1', 'E3'])
+        self.assertEqual(stage_summary(self.mentor), (['10-100k', '200k-300k'], [2, 1]))
+
+    def test_stage_summary_invalidated_on_save_and_delete(self):
+        self.create_mentees(['E1'])
+        self.assertEqual(stage_summary(self.mentor), (['10-100k'], [1]))
+
+        self.create_mentees(['E2'])
+        self.assertEqual(stage_summary(self.mentor), (['10-100k', '100k-200k'], [1, 1]))
+
+        Mentorship.objects.filter(stage='E1').get().delete()
+        self.assertEqual(stage_summary(self.mentor), (['100k-200k'], [1]))
+
+    def test_dashboard_query_count_is_constant(self):
+        # user (cached from then on), stage summary, mentees (with navigators),
+        # navigators; the session was cached by force_login
+        self.create_mentees(['E1'])
+        with self.assertNumQueries(4):
+            self.client.get(reverse('mentorship'))
+
+        # Clearing the cache drops the session and user too
+        project_cache.clear()
+        self.create_mentees([stage for stage, _ in Mentorship.stage_choices] * 5)
+        with self.assertNumQueries(5):
+            self.client.get(reverse('mentorship'))
+
+        # Unchanged data: session, user, summary and fragments all come from the cache
+        with self.assertNumQueries(0):
+            self.client.get(reverse('mentorship'))
+
+    def test_dashboard_fragments_refresh_when_data_changes(self):
+        self.create_mentees(['E1'])
+        self.client.get(reverse('mentorship'))
+        version = mentor_version(self.mentor.id)
+
+        self.create_mentees(['E2', 'E2'])
+        self.assertNotEqual(mentor_version(self.mentor.id), version)
+        response = self.client.get(reverse('mentorship'))
+        self.assertContains(response, 'Mentee 1')
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        project_cache.reset_stats()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.local = caches[project_cache.aliases[0]]
+
+    def test_tests_never_touch_the_live_shared_tier(self):
+        for alias in project_cache.aliases:
+            location = str(settings.CACHES[alias].get('LOCATION', ''))
+            self.assertFalse(location.startswith(str(settings.BASE_DIR)), alias)
+
+    def test_get_or_set_computes_once(self):
+        calls = []
+        compute = lambda: calls.append(1) or 'value'
+        self.assertEqual(project_cache.get_or_set('key', compute), 'value')
+        self.assertEqual(project_cache.get_or_set('key', compute), 'value')
+        self.assertEqual(len(calls), 1)
+
+    def test_shared_hit_is_copied_to_local_tier(self):
+        if len(project_cache.aliases) < 2:
+            self.skipTest('no shared tier configured')
+        local, shared = project_cache.aliases[:2]
+        project_cache.set('key', 'value')
+        self.local.clear()
+
+        self.assertEqual(project_cache.get('key'), 'value')
+        self.assertEqual(project_cache.get('key'), 'value')
+        stats = project_cache.stats()
+        self.assertEqual(stats[local], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        self.assertEqual(stats[shared]['hits'], 1)
+
+    def test_tag_invalidation_skips_stale_local_copies(self):
+        project_cache.set('key', 'old', tags=['things'])
+        project_cache.invalidate_tags('things')
+        self.assertIsNone(project_cache.get('key', tags=['things']))
+        self.assertEqual(project_cache.get_or_set('key', lambda: 'new', tags=['things']), 'new')
+
+    def test_model_writes_invalidate_mentor_tags(self):
+        version = mentor_version(self.mentor.id)
+        for create in (
+            lambda: Task.objects.create(mentee=self.mentee, task='Read'),
+            lambda: Upload.objects.create(mentee=self.mentee, video='video.mp4'),
+            lambda: AppointmentAvailability.objects.create(mentor=self.mentor, appointment_date=datetime(2030, 1, 1, 9)),
+        ):
+            create()
+            self.assertNotEqual(mentor_version(self.mentor.id), version)
+            version = mentor_version(self.mentor.id)
+
+        summary_version = project_cache.tag_version(mentees_tag(self.mentor.id))
+        self.mentee.save()
+        self.assertNotEqual(project_cache.tag_version(mentees_tag(self.mentor.id)), summary_version)
+
+class DatabaseTuningTests(TestCase):
+    def test_new_sqlite_connections_get_the_pragmas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            default = connections['default']
+            wrapper = type(default)({**default.settings_dict, 'NAME': os.path.join(tmp, 'pragmas.sqlite3')}, 'pragmas')
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+                    cursor.execute('PRAGMA synchronous')
+                    # NORMAL
+                    self.assertEqual(cursor.fetchone()[0], 1)
+            finally:
+                wrapper.close()
+
+class SessionAuthTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.client.force_login(self.mentor)
+        self.client.get(reverse('mentorship'))
+
+    def test_warm_requests_skip_session_and_user_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('mentorship'))
+        self.assertEqual(response.context['user'], self.mentor)
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        self.mentor.is_active = False
+        self.mentor.save()
+        response = self.client.get(reverse('mentorship'))
+        self.assertRedirects(response, f'{reverse("login")}?next={reverse("mentorship")}', fetch_redirect_response=False)
+
+    def test_password_change_ends_other_sessions(self):
+        self.mentor.set_password('changed123')
+        self.mentor.save()
+        self.assertEqual(self.client.get(reverse('mentorship')).status_code, 302)
+
+    def test_cached_user_leaves_out_the_password_hash(self):
+        entry = project_cache.get(USER_KEY.format(self.mentor.pk), tags=[user_tag(self.mentor.pk)])
+        self.assertNotIn(self.mentor.password, repr(entry))
+
+        user = CachedModelBackend().get_user(self.mentor.pk)
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+        self.assertEqual(user.get_session_auth_hash(), self.mentor.get_session_auth_hash())
+
+    def test_permission_changes_drop_the_cached_user(self):
+        group = Group.objects.create(name='staff')
+        permission = Permission.objects.get(codename='view_meeting')
+        for change in (
+            lambda: self.mentor.groups.add(group),
+            lambda: group.permissions.add(permission),
+            lambda: permission.user_set.add(self.mentor),
+            lambda: group.user_set.clear(),
+        ):
+            version = project_cache.tag_version(user_tag(self.mentor.pk))
+            change()
+            self.assertNotEqual(project_cache.tag_version(user_tag(self.mentor.pk)), version)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        sessions = Session.objects.count()
+        client = self.client_class()
+        # Logging in saves last_login, so the user is loaded once more
+        client.force_login(self.mentor)
+        client.get(reverse('mentorship'))
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(reverse('mentorship')).status_code, 200)
+        self.assertEqual(Session.objects.count(), sessions)
+
+class SignedMenteeTokenTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.tomorrow = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.slot, = create_slots(self.mentor, [self.tomorrow])
+        self.task = Task.objects.create(mentee=self.mentee, task='Read the docs')
+
+    def test_login_sets_signed_cookie(self):
+        response = self.client.post(reverse('auth_mentee'), {'token': self.mentee.token})
+        self.assertRedirects(response, reverse('available_dates'), fetch_redirect_response=False)
+        cookie = response.cookies['auth_token']
+        self.assertNotIn(self.mentee.token, cookie.value)
+        self.assertTrue(cookie['httponly'])
+        self.assertEqual(load_mentee(cookie.value).pk, self.mentee.pk)
+
+    def test_reads_resolve_the_mentee_without_queries(self):
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+        self.client.get(reverse('available_dates'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('available_dates'))
+        self.assertContains(response, self.tomorrow.strftime('%d/%m/%Y'))
+
+    def test_tampered_and_expired_cookies_are_rejected(self):
+        cookie = sign_mentee(self.mentee)
+        self.assertIsNone(load_mentee(cookie[:-1] + ('A' if cookie[-1] != 'A' else 'B')))
+        self.assertIsNone(load_mentee(self.mentee.token))
+        with mock.patch('mentorship.auth.MENTEE_COOKIE_MAX_AGE', -1):
+            self.assertIsNone(load_mentee(cookie))
+
+        self.client.cookies['auth_token'] = self.mentee.token
+        self.assertRedirects(self.client.get(reverse('mentee_tasks')), reverse('auth_mentee'), fetch_redirect_response=False)
+
+    def test_revoked_cookie_cannot_write(self):
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+        revoke_tokens(self.mentee)
+
+        response = self.client.post(reverse('task_status', args=[self.task.id]))
+        self.assertRedirects(response, reverse('auth_mentee'), fetch_redirect_response=False)
+        response = self.client.post(reverse('schedule_meeting'), {'hour': self.slot.id, 'tag': 'D', 'description': 'Review'})
+        self.assertRedirects(response, reverse('auth_mentee'), fetch_redirect_response=False)
+        self.assertFalse(Meeting.objects.exists())
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.done)
+
+        # Signing in again issues a cookie with the new version
+        self.client.post(reverse('auth_mentee'), {'token': self.mentee.token})
+        response = self.client.post(reverse('task_status', args=[self.task.id]))
+        self.assertEqual(response.json(), {'id': self.task.id, 'done': True})
+
+    def test_mentor_revokes_sessions(self):
+        self.client.force_login(self.mentor)
+        response = self.client.post(reverse('revoke_mentee_tokens', args=[self.mentee.id]))
+        self.assertRedirects(response, f'/mentorship/task/{self.mentee.id}', fetch_redirect_response=False)
+        self.mentee.refresh_from_db()
+        self.assertEqual(self.mentee.token_version, 1)
+
+class MeetingListTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.client.force_login(self.mentor)
+        self.start = datetime(2030, 1, 1, 9, 0)
+
+    def create_meetings(self, count):
+        offset = AppointmentAvailability.objects.count()
+        slots = AppointmentAvailability.objects.bulk_create([
+            AppointmentAvailability(
+                appointment_date=self.start + timedelta(hours=offset + i),
+                mentor=self.mentor,
+                scheduled=True
+            )
+            for i in range(count)
+        ])
+        Meeting.objects.bulk_create([
+            Meeting(date=slot, mentee=self.mentee, tag='D', description='Review')
+            for slot in slots
+        ])
+        # bulk_create skips post_save, so the fragment version is bumped by hand
+        bump_mentor_version(self.mentor.id)
+
+    def test_meeting_list_query_count_is_constant(self):
+        # user, feed link version and availability rules (all cached from then on), one joined page of meetings
+        self.create_meetings(10)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('meeting'))
+
+        self.create_meetings(MEETINGS_PER_PAGE * 10)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('meeting'))
+        self.assertEqual(len(response.context['page']['meetings']), MEETINGS_PER_PAGE)
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse('meeting'), {'cursor': response.context['page']['next_cursor']})
+
+        # Unchanged page is served from the fragment cache
+        with self.assertNumQueries(0):
+            self.client.get(reverse('meeting'))
+
+    def test_keyset_pages_cover_every_meeting_in_order(self):
+        self.create_meetings(MEETINGS_PER_PAGE * 2 + 5)
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = meeting_page(self.mentor, cursor)
+            seen += [meeting.date.appointment_date for meeting in page]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), MEETINGS_PER_PAGE * 2 + 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_first_page_starts_with_latest_meetings(self):
+        # A long history of past meetings and one upcoming meeting
+        self.start = datetime.now() - timedelta(days=30)
+        self.create_meetings(MEETINGS_PER_PAGE * 2)
+        self.start = datetime.now() + timedelta(days=1)
+        self.create_meetings(1)
+        page, cursor = meeting_page(self.mentor)
+        latest = list(
+            Meeting.objects.order_by('-date__appointment_date').values_list('id', flat=True)[:MEETINGS_PER_PAGE]
+        )
+        self.assertEqual([meeting.id for meeting in page], latest)
+        self.assertGreater(page[0].date.appointment_date, datetime.now())
+        self.assertIsNotNone(cursor)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('meeting'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+class SlotCreationTests(TestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.client.force_login(self.mentor)
+
+    def tuesday_starts(self, weeks):
+        # 2030-01-01 is a Tuesday; 14:00-18:00 fits four 50 minute slots
+        return [
+            datetime(2030, 1, 1, 14, 0) + timedelta(weeks=week) + SLOT_DURATION * slot
+            for week in range(weeks)
+            for slot in range(4)
+        ]
+
+    def test_batch_is_inserted_with_constant_queries(self):
+        starts = self.tuesday_starts(12)
+        # savepoint, mentor lock, existing slots, bulk insert, analytics recount and upsert, release
+        with self.assertNumQueries(7):
+            create_slots(self.mentor, starts)
+        self.assertEqual(AppointmentAvailability.objects.filter(mentor=self.mentor).count(), 48)
+
+    def test_overlapping_batch_inserts_nothing(self):
+        create_slots(self.mentor, [datetime(2030, 1, 8, 15, 0)])
+        starts = self.tuesday_starts(2)
+        with self.assertRaises(SlotConflict):
+            create_slots(self.mentor, starts)
+        with self.assertRaises(SlotConflict):
+            create_slots(self.mentor, [datetime(2030, 2, 1, 9, 0), datetime(2030, 2, 1, 9, 30)])
+        self.assertEqual(AppointmentAvailability.objects.filter(mentor=self.mentor).count(), 1)
+
+    def test_slots_may_touch_end_to_start(self):
+        create_slots(self.mentor, [datetime(2030, 1, 1, 9, 0)])
+        create_slots(self.mentor, [datetime(2030, 1, 1, 9, 50), datetime(2030, 1, 1, 8, 10)])
+        self.assertEqual(AppointmentAvailability.objects.filter(mentor=self.mentor).count(), 3)
+
+    def test_meeting_slots_view_opens_recurring_slots(self):
+        response = self.client.post(reverse('meeting_slots'), {
+            'start_date': '2030-01-01',
+            'weekday': '1',
+            'start_time': '14:00',
+            'end_time': '18:00',
+            'weeks': '12',
+        })
+        self.assertRedirects(response, reverse('meeting'))
+        # A rule, not 48 slot rows
+        rule = AvailabilityRule.objects.get(mentor=self.mentor)
+        self.assertEqual(rule.ends_on, date(2030, 3, 25))
+        self.assertFalse(AppointmentAvailability.objects.exists())
+        starts = list(rule_starts(rule, datetime(2030, 1, 1), datetime(2031, 1, 1)))
+        self.assertEqual(starts, self.tuesday_starts(12))
+        self.assertEqual(starts[3] + SLOT_DURATION, datetime(2030, 1, 1, 17, 20))
+        self.assertEqual(starts[-1].date(), date(2030, 3, 19))
+
+        # Overlapping windows on the same weekday are rejected
+        self.client.post(reverse('meeting_slots'), {
+            'start_date': '2030-03-01', 'weekday': '1', 'start_time': '17:00', 'end_time': '19:00', 'weeks': '',
+        })
+        self.assertEqual(AvailabilityRule.objects.count(), 1)
+
+    def test_meeting_view_rejects_overlapping_slot(self):
+        self.client.post(reverse('meeting'), {'date': '2030-01-01T09:00'})
+        self.client.post(reverse('meeting'), {'date': '2030-01-01T09:30'})
+        self.assertEqual(AppointmentAvailability.objects.filter(mentor=self.mentor).count(), 1)
+
+class RecurrenceTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.monday = date.today() + timedelta(days=7 - date.today().weekday())
+        # Every Monday 09:00-11:30 (three slots), open-ended
+        self.rule = create_rule(self.mentor, 0, time(9), time(11, 30), self.monday)
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+
+    def test_slots_are_generated_not_stored(self):
+        start = datetime.combine(self.monday, time())
+        starts = list(generate_starts([self.rule], start, start + timedelta(weeks=52)))
+        self.assertEqual(len(starts), 52 * 3)
+        self.assertEqual(starts[:2], [start.replace(hour=9), start.replace(hour=9, minute=50)])
+        self.assertFalse(AppointmentAvailability.objects.exists())
+
+        # Exceptions, the horizon and stored slots hide generated ones
+        skip_rule_day(self.rule, self.monday)
+        self.rule.ends_on = self.monday + timedelta(weeks=2)
+        taken = [start + timedelta(weeks=1, hours=9, minutes=20)]
+        starts = list(generate_starts([self.rule], start, start + timedelta(weeks=52), taken))
+        self.assertEqual(starts, [
+            start + timedelta(weeks=1, hours=10, minutes=40),
+            start + timedelta(weeks=2, hours=9),
+            start + timedelta(weeks=2, hours=9, minutes=50),
+            start + timedelta(weeks=2, hours=10, minutes=40),
+        ])
+
+    def test_calendar_and_hours_come_from_rules(self):
+        calendar = available_calendar(self.mentor.pk)
+        self.assertEqual(calendar[0]['appointment_date'], self.monday.strftime('%d/%m/%Y'))
+        self.assertEqual(len(calendar), len({entry['appointment_date'] for entry in calendar}))
+
+        response = self.client.get(reverse('schedule_meeting'), {'date': self.monday.strftime('%d/%m/%Y')})
+        self.assertContains(response, f'value="{self.monday.isoformat()}T09:50:00"')
+
+    def test_booking_materializes_only_the_booked_slot(self):
+        start = datetime.combine(self.monday, time(9, 50))
+        response = self.client.post(reverse('schedule_meeting'), {
+            'hour': start.isoformat(), 'tag': 'D', 'description': 'Review'
+        })
+        self.assertRedirects(response, reverse('available_dates'), fetch_redirect_response=False)
+        slot = AppointmentAvailability.objects.get()
+        self.assertEqual((slot.appointment_date, slot.scheduled), (start, True))
+        self.assertEqual(Meeting.objects.get().date, slot)
+
+        # The booked slot is no longer offered and cannot be booked twice
+        response = self.client.get(reverse('schedule_meeting'), {'date': self.monday.strftime('%d/%m/%Y')})
+        self.assertNotContains(response, f'value="{start.isoformat()}"')
+        with self.assertRaises(SlotUnavailable):
+            book_rule_slot(self.mentee, start, 'D', 'Again')
+        # nor can a time the rule does not offer
+        with self.assertRaises(SlotUnavailable):
+            book_rule_slot(self.mentee, start + timedelta(minutes=10), 'D', 'Off grid')
+        self.assertEqual(AppointmentAvailability.objects.count(), 1)
+
+    def test_analytics_count_open_generated_slots(self):
+        book_rule_slot(self.mentee, datetime.combine(self.monday, time(9)), 'D', 'Review')
+        report = mentor_analytics(self.mentor, self.monday, self.monday)
+        self.assertEqual(report['days'], [{'day': self.monday, 'slots': 3, 'meetings': 1, 'utilization': 1 / 3}])
+
+    def test_available_days_merge_stored_and_rule_days(self):
+        # A free one-off slot on a Wednesday, and the first Monday fully booked
+        wednesday = self.monday + timedelta(days=2)
+        create_slots(self.mentor, [datetime.combine(wednesday, time(15))])
+        for hour, minute in ((9, 0), (9, 50), (10, 40)):
+            book_rule_slot(self.mentee, datetime.combine(self.monday, time(hour, minute)), 'D', 'Review')
+
+        days = available_days(self.mentor.pk)
+        self.assertEqual(days[:2], [wednesday, self.monday + timedelta(weeks=1)])
+        self.assertEqual(days, sorted(set(days)))
+
+    def test_rule_slot_counts_match_expansion(self):
+        start = datetime.combine(self.monday, time())
+        end = start + timedelta(weeks=8, hours=10)
+        skip_rule_day(self.rule, self.monday + timedelta(weeks=2))
+        self.rule.refresh_from_db()
+        taken = [start + timedelta(weeks=1, hours=9, minutes=20)]
+        expanded = Counter(when.date() for when in generate_starts([self.rule], start, end, taken))
+        self.assertEqual(rule_slot_counts([self.rule], taken, start, end), dict(expanded))
+
+    def test_analytics_rule_slots_are_cached(self):
+        mentor_analytics(self.mentor, self.monday, self.monday + timedelta(days=30))
+        # daily rollups and mentee rollups only
+        with self.assertNumQueries(2):
+            report = mentor_analytics(self.mentor, self.monday, self.monday + timedelta(days=30))
+        self.assertEqual(report['slots'], 5 * 3)
+
+        book_rule_slot(self.mentee, datetime.combine(self.monday, time(9)), 'D', 'Review')
+        report = mentor_analytics(self.mentor, self.monday, self.monday + timedelta(days=30))
+        self.assertEqual((report['slots'], report['meetings']), (5 * 3, 1))
+
+class BulkTaskTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentees = [
+            Mentorship.objects.create(name=f'Mentee {i}', stage='E1', user=self.mentor) for i in range(3)
+        ]
+        self.other = Mentorship.objects.create(
+            name='Other', stage='E1', user=User.objects.create_user(username='other', password='secret123')
+        )
+        self.client.force_login(self.mentor)
+
+    def post(self, name, body):
+        return self.client.post(reverse(name), json.dumps(body), content_type='application/json')
+
+    def test_bulk_create_query_count_does_not_grow_with_batch(self):
+        # mentee ownership, savepoint, inserts, analytics recount and upsert,
+        # release, plus the user on the first request; SQLite takes up to 199
+        # task rows per INSERT, so a full batch needs three
+        for size, queries in ((10, 7), (MAX_BULK_TASKS, 8)):
+            with self.assertNumQueries(queries):
+                response = self.post('tasks_bulk', {
+                    'tasks': [{'mentee': self.mentees[i % 3].id, 'task': f'Task {i}'} for i in range(size)]
+                })
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json(), {'created': size})
+        self.assertEqual(Task.objects.count(), 10 + MAX_BULK_TASKS)
+
+    def test_template_is_applied_to_many_mentees(self):
+        response = self.post('task_templates', {'name': 'Onboarding', 'tasks': ['Read the guide', 'Set goals']})
+        template_id = response.json()['id']
+
+        with self.assertNumQueries(7):
+            response = self.post('tasks_bulk', {'template': template_id, 'mentees': [m.id for m in self.mentees]})
+        self.assertEqual(response.json(), {'created': 6})
+        self.assertEqual(
+            sorted(Task.objects.filter(mentee=self.mentees[2]).values_list('task', flat=True)),
+            ['Read the guide', 'Set goals'],
+        )
+
+    def test_invalid_template_id_is_rejected(self):
+        for template_id in ('abc', {'id': 1}, [1]):
+            response = self.post('tasks_bulk', {'template': template_id, 'mentees': [self.mentees[0].id]})
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+    def test_batch_with_foreign_mentee_is_rejected_whole(self):
+        response = self.post('tasks_bulk', {'mentees': [self.mentees[0].id, self.other.id], 'tasks': ['Read']})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+        response = self.post('tasks_bulk', {'tasks': [{'mentee': self.mentees[0].id, 'task': ''}]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_update_completes_and_reassigns_own_tasks_only(self):
+        tasks = Task.objects.bulk_create([Task(mentee=self.mentees[0], task=f'Task {i}') for i in range(5)])
+        foreign = Task.objects.create(mentee=self.other, task='Not mine')
+        ids = [task.id for task in tasks] + [foreign.id]
+
+        # user, savepoint, touched mentees, update, analytics recount and upsert, release
+        with self.assertNumQueries(7):
+            response = self.post('tasks_bulk_update', {'tasks': ids, 'done': True})
+        self.assertEqual(response.json(), {'updated': 5})
+        self.assertFalse(Task.objects.get(id=foreign.id).done)
+
+        response = self.post('tasks_bulk_update', {'tasks': ids, 'mentee': self.mentees[1].id})
+        self.assertEqual(response.json(), {'updated': 5})
+        self.assertEqual(Task.objects.filter(mentee=self.mentees[1], done=True).count(), 5)
+
+        response = self.post('tasks_bulk_update', {'tasks': ids, 'mentee': self.other.id})
+        self.assertEqual(response.status_code, 400)
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentees = [Mentorship.objects.create(name=f'Mentee {i}', stage='E1', user=self.mentor) for i in range(2)]
+        self.client.force_login(self.mentor)
+        self.day = date.today() + timedelta(days=1)
+
+    def build_history(self):
+        slots = create_slots(self.mentor, [datetime.combine(self.day, time(9 + i)) for i in range(4)])
+        book_slot(self.mentees[0], slots[0].id, 'D', 'Review')
+        book_slot(self.mentees[1], slots[1].id, 'D', 'Review')
+        book_slot(self.mentees[1], slots[2].id, 'SQL', 'Queries')
+        Task.objects.create(mentee=self.mentees[0], task='Read', done=True)
+        Task.objects.create(mentee=self.mentees[0], task='Write')
+        create_tasks(self.mentor, [(self.mentees[1].id, 'Plan')])
+
+    def snapshot(self):
+        return (
+            sorted(MentorDailyStats.objects.values_list('day', 'tag', 'slots', 'meetings')),
+            sorted(MenteeTaskStats.objects.values_list('mentee_id', 'tasks', 'done')),
+        )
+
+    def test_rollups_follow_writes(self):
+        self.build_history()
+        report = mentor_analytics(self.mentor)
+        self.assertEqual(report['tags'], [('Django', 2), ('SQL', 1)])
+        self.assertEqual(report['days'], [{'day': self.day, 'slots': 4, 'meetings': 3, 'utilization': 0.75}])
+        self.assertEqual(
+            [(row['mentee'], row['done'], row['tasks']) for row in report['mentees']],
+            [(self.mentees[0], 1, 2), (self.mentees[1], 0, 1)],
+        )
+
+        Meeting.objects.filter(tag='SQL').get().delete()
+        task = Task.objects.get(task='Plan')
+        self.client.cookies['auth_token'] = sign_mentee(self.mentees[1])
+        self.client.post(reverse('task_status', args=[task.id]))
+        report = mentor_analytics(self.mentor)
+        self.assertEqual(report['tags'], [('Django', 2)])
+        self.assertEqual(report['mentees'][1]['completion_rate'], 1.0)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.build_history()
+        incremental = self.snapshot()
+        MentorDailyStats.objects.all().delete()
+        MenteeTaskStats.objects.all().delete()
+        self.assertEqual(rebuild(), (3, 2))
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_view_reads_only_rollups(self):
+        self.build_history()
+        # user, daily rollups, availability rules, mentee rollups
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('analytics'))
+        self.assertContains(response, '75%')
+        self.assertContains(response, 'Mentee 0')
+
+    def test_view_rejects_unbounded_ranges(self):
+        create_rule(self.mentor, 0, time(9), time(11), self.day)
+        for params in (
+            {'start': '0001-01-01', 'end': '9999-12-30'},
+            {'start': '2030-01-01', 'end': '9999-12-31'},
+            {'start': '2030-01-01', 'end': '2031-06-01'},
+            {'start': '0001-01-01'},
+        ):
+            response = self.client.get(reverse('analytics'), params)
+            self.assertRedirects(response, reverse('analytics'), fetch_redirect_response=False)
+            self.assertIn('Invalid date range', [str(m) for m in response.wsgi_request._messages])
+        response = self.client.get(reverse('analytics'), {'start': '2030-01-01', 'end': '2030-12-31'})
+        self.assertEqual(response.status_code, 200)
+
+class TransferTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.navigator = Navigator.objects.create(name='Ana', user=self.mentor)
+        self.client.force_login(self.mentor)
+
+    def cohort_csv(self, size):
+        rows = ''.join(f'Mentee {i},E{i % 9 + 1},{"Ana" if i % 2 else ""}\n' for i in range(size))
+        return 'name,stage,navigator\n' + rows
+
+    def test_import_cost_does_not_grow_with_chunk(self):
+        # savepoint, navigator lookup, token check, insert, release
+        with self.assertNumQueries(5):
+            import_file(self.mentor, 'mentees', StringIO(self.cohort_csv(10)), 'csv')
+        # SQLite caps a single INSERT at 99 mentees
+        with self.assertNumQueries(5):
+            import_file(self.mentor, 'mentees', StringIO(self.cohort_csv(90)), 'csv')
+
+        mentees = Mentorship.objects.filter(user=self.mentor)
+        self.assertEqual(mentees.count(), 100)
+        self.assertEqual(len(set(mentees.values_list('token', flat=True))), 100)
+        self.assertEqual(mentees.filter(navigator=self.navigator).count(), 50)
+        self.assertEqual(stage_summary(self.mentor)[1][0], 12)
+
+    def test_invalid_row_rolls_back_the_whole_file(self):
+        data = self.cohort_csv(3) + 'Broken,E1,Nobody\n'
+        with self.assertRaisesMessage(TransferError, "Line 5: Unknown navigator 'Nobody'."):
+            import_file(self.mentor, 'mentees', StringIO(data), 'csv', chunk_size=2)
+        self.assertFalse(Mentorship.objects.exists())
+
+        taken = Mentorship.objects.create(name='Existing', stage='E1', user=self.mentor).token
+        with self.assertRaisesMessage(TransferError, 'Token already in use'):
+            import_file(self.mentor, 'mentees', StringIO(f'name,stage,token\nCopy,E1,{taken}\n'), 'csv')
+
+    def test_supplied_tokens_must_look_generated(self):
+        for token in ['short', 'x' * 17, 'has space1', 'semi;colon']:
+            with self.assertRaisesMessage(TransferError, 'Line 2: "token" must be'):
+                import_file(self.mentor, 'mentees', StringIO(f'name,stage,token\nCopy,E1,"{token}"\n'), 'csv')
+        import_file(self.mentor, 'mentees', StringIO('name,stage,token\nCopy,E1,Abc-def_123\n'), 'csv')
+        self.assertEqual(Mentorship.objects.get().token, 'Abc-def_123')
+
+    def test_caches_are_invalidated_after_commit(self):
+        self.assertEqual(stage_summary(self.mentor), ([], []))
+        with self.captureOnCommitCallbacks() as callbacks:
+            import_file(self.mentor, 'mentees', StringIO(self.cohort_csv(3)), 'csv')
+            # Still cached until the import commits
+            self.assertEqual(stage_summary(self.mentor), ([], []))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(sum(stage_summary(self.mentor)[1]), 3)
+
+        # A rolled back import leaves the caches alone
+        version = mentor_version(self.mentor.pk)
+        with self.captureOnCommitCallbacks() as callbacks, self.assertRaises(TransferError):
+            import_file(self.mentor, 'mentees', StringIO('name,stage\nBad,E0\n'), 'csv')
+        self.assertEqual(callbacks, [])
+        self.assertEqual(mentor_version(self.mentor.pk), version)
+
+    def test_slots_import_checks_overlaps_across_chunks(self):
+        day = datetime.combine(date.today() + timedelta(days=1), time(9))
+        lines = ''.join(json.dumps({'appointment_date': (day + SLOT_DURATION * i).isoformat()}) + '\n' for i in range(5))
+        self.assertEqual(import_file(self.mentor, 'slots', StringIO(lines), 'json', chunk_size=2), 5)
+        self.assertEqual(MentorDailyStats.objects.get(mentor=self.mentor).slots, 5)
+
+        overlap = json.dumps({'appointment_date': (day + timedelta(minutes=10)).isoformat()}) + '\n'
+        with self.assertRaises(TransferError):
+            import_file(self.mentor, 'slots', StringIO(overlap), 'json')
+        self.assertEqual(AppointmentAvailability.objects.count(), 5)
+
+    def test_views_stream_export_and_accept_uploads(self):
+        upload = SimpleUploadedFile('cohort.jsonl', b'{"name": "Bia", "stage": "E2", "navigator": "Ana"}\n')
+        response = self.client.post(reverse('import_data', args=['mentees']), {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 1})
+
+        response = self.client.get(reverse('export_data', args=['mentees']))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,name,stage,navigator,token,created_at')
+        self.assertIn(',Bia,E2,Ana,', lines[1])
+
+        response = self.client.get(reverse('export_data', args=['navigators']), {'format': 'json'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['name'], 'Ana')
+
+        upload = SimpleUploadedFile('cohort.csv', b'name,stage\nBad,E0\n')
+        response = self.client.post(reverse('import_data', args=['mentees']), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_data', args=['users'])).status_code, 404)
+
+    def test_jsonl_text_fields_must_be_strings(self):
+        for row, field in (({'token': 123}, 'token'), ({'navigator': 5}, 'navigator'), ({'token': ['x']}, 'token')):
+            lines = json.dumps({'name': 'Bia', 'stage': 'E2'}) + '\n' + json.dumps({'name': 'Caio', 'stage': 'E1', **row}) + '\n'
+            with self.assertRaisesMessage(TransferError, f'Line 2: "{field}" must be text.'):
+                import_file(self.mentor, 'mentees', StringIO(lines), 'json')
+        self.assertFalse(Mentorship.objects.exists())
+
+        # null is the same as leaving the field out
+        import_file(self.mentor, 'mentees', StringIO('{"name": "Bia", "stage": "E2", "token": null, "navigator": null}\n'), 'json')
+        self.assertIsNone(Mentorship.objects.get().navigator)
+
+    def test_non_utf8_upload_is_rejected_with_its_line(self):
+        upload = SimpleUploadedFile('cohort.csv', 'name,stage\nAna,E1\nJoão,E2\n'.encode('latin-1'))
+        response = self.client.post(reverse('import_data', args=['mentees']), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Line 3: File is not valid UTF-8.'})
+        self.assertFalse(Mentorship.objects.exists())
+
+    def test_commands_round_trip(self):
+        Mentorship.objects.create(name='Caio', stage='E3', navigator=self.navigator, user=self.mentor)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'mentees.csv')
+            call_command('export_data', 'mentees', mentor='mentor', output=path)
+            other = User.objects.create_user(username='other')
+            Navigator.objects.create(name='Ana', user=other)
+            # Tokens are unique across mentors, so import under fresh ones
+            with open(path) as f:
+                rows = f.read().replace(Mentorship.objects.get().token, '')
+            with open(path, 'w') as f:
+                f.write(rows)
+            call_command('import_data', 'mentees', path, mentor='other', stdout=StringIO())
+        self.assertEqual(Mentorship.objects.get(user=other).navigator.user, other)
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.tomorrow = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        booked, self.free = create_slots(self.mentor, [self.tomorrow, self.tomorrow + timedelta(hours=2)])
+        book_slot(self.mentee, booked.id, 'D', 'Review, models; and views ' * 5)
+        self.rule = create_rule(self.mentor, 0, time(14), time(16), date(2030, 1, 7), weeks=4)
+        skip_rule_day(self.rule, date(2030, 1, 14))
+        self.url = reverse('mentor_calendar', args=[sign_mentor_feed(self.mentor.id)])
+
+    def test_mentor_feed_lists_meetings_slots_and_rules(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn(f'DTSTART:{self.tomorrow:%Y%m%dT%H%M%S}', body)
+        self.assertIn('SUMMARY:Mentee: Django', body)
+        self.assertIn('DESCRIPTION:Review\\, models\\; and views', body)
+        self.assertIn(f'UID:slot-{self.free.id}@testserver', body)
+        self.assertIn('RRULE:FREQ=WEEKLY;UNTIL=20300203T160000', body)
+        self.assertIn('EXDATE:20300114T140000', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+    def test_unchanged_feed_is_not_modified_without_queries(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Last-Modified has whole seconds, so it alone never answers 304
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_slots(self.mentor, [self.tomorrow + timedelta(days=1)])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_replaced_mentor_feed_link_stops_working(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.client.force_login(self.mentor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('reset_mentor_calendar'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+        url = reverse('mentor_calendar', args=[sign_mentor_feed(self.mentor.id)])
+        self.assertNotEqual(url, self.url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_mentee_feed_stops_after_revocation(self):
+        other = Mentorship.objects.create(name='Other', stage='E1', user=self.mentor)
+        url = reverse('mentee_calendar', args=[sign_mentee_feed(other)])
+        body = b''.join(self.client.get(url).streaming_content).decode()
+        self.assertNotIn('BEGIN:VEVENT', body)
+
+        url = reverse('mentee_calendar', args=[sign_mentee_feed(self.mentee)])
+        response = self.client.get(url)
+        self.assertIn('SUMMARY:Mentoring: Django', b''.join(response.streaming_content).decode())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        revoke_tokens(self.mentee)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 404)
+
+    def test_invalid_tokens_and_folding(self):
+        self.assertEqual(self.client.get(self.url.replace('.ics', 'x.ics')).status_code, 404)
+        self.assertEqual(self.client.get(reverse('mentor_calendar', args=[sign_mentee_feed(self.mentee)])).status_code, 404)
+
+        folded = fold('DESCRIPTION:' + 'é' * 60)
+        lines = folded.split('\r\n')
+        self.assertEqual(lines[-1], '')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertEqual(''.join(line[1:] if i else line for i, line in enumerate(lines)), 'DESCRIPTION:' + 'é' * 60)
+
+class SlotEventTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.tomorrow = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.slot, = create_slots(self.mentor, [self.tomorrow])
+
+    def subscribe(self, mentor_id):
+        loop = asyncio.new_event_loop()
+
+        async def subscribe():
+            return slot_events.subscribe(mentor_id)
+
+        def close():
+            slot_events.unsubscribe(subscription)
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+        subscription = loop.run_until_complete(subscribe())
+        self.addCleanup(close)
+        return lambda: loop.run_until_complete(asyncio.wait_for(subscription.get(), 1))
+
+    def test_booking_and_cancelling_publish_after_commit(self):
+        next_event = self.subscribe(self.mentor.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            meeting = book_slot(self.mentee, self.slot.id, 'D', 'Review')
+            with self.assertRaises(SlotUnavailable):
+                book_slot(self.mentee, self.slot.id, 'D', 'Again')
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(next_event(), slot_event('booked', self.slot.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_meeting(meeting)
+        self.assertEqual(
+            next_event(),
+            slot_event('released', self.slot.id, self.tomorrow, self.tomorrow + SLOT_DURATION),
+        )
+        self.assertFalse(Meeting.objects.exists())
+        self.assertEqual(available_calendar(self.mentor.id)[0]['appointment_date'], self.tomorrow.strftime('%d/%m/%Y'))
+
+    def test_cancel_view_frees_the_slot(self):
+        meeting = book_slot(self.mentee, self.slot.id, 'D', 'Review')
+        other = User.objects.create_user(username='other', password='secret123')
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(reverse('meeting_cancel', args=[meeting.id])).status_code, 404)
+
+        self.client.force_login(self.mentor)
+        response = self.client.post(reverse('meeting_cancel', args=[meeting.id]))
+        self.assertRedirects(response, reverse('meeting'), fetch_redirect_response=False)
+        self.slot.refresh_from_db()
+        self.assertFalse(self.slot.scheduled)
+
+    def test_overflowing_stream_is_told_to_resync(self):
+        next_event = self.subscribe(self.mentor.id)
+        for n in range(slot_events.queue_size + 1):
+            slot_events.publish(self.mentor.id, slot_event('booked', n))
+        self.assertEqual(next_event()['event'], 'resync')
+
+    async def test_stream_app_pushes_events_of_the_mentors_slots(self):
+        body = asyncio.Queue()
+        disconnect = asyncio.Event()
+        requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            await body.put(message)
+
+        def scope(cookie):
+            headers = [(b'cookie', f'auth_token={cookie}'.encode())] if cookie else []
+            return {'type': 'http', 'method': 'GET', 'path': SLOT_EVENTS_PATH, 'headers': headers}
+
+        await slot_events_app(scope(None), receive, send)
+        self.assertEqual((await body.get())['status'], 403)
+        await body.get()
+
+        app = asyncio.create_task(slot_events_app(scope(sign_mentee(self.mentee)), receive, send))
+        start = await asyncio.wait_for(body.get(), 1)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertEqual((await body.get())['body'], b'retry: 5000\n\n')
+
+        await asyncio.to_thread(slot_events.publish, self.mentor.id + 1, slot_event('booked', 1))
+        await asyncio.to_thread(slot_events.publish, self.mentor.id, slot_event('booked', self.slot.id))
+        message = await asyncio.wait_for(body.get(), 1)
+        self.assertEqual(message['body'], f'event: booked\ndata: {{"slot": {self.slot.id}, "start": null, "end": null}}\n\n'.encode())
+        self.assertTrue(message['more_body'])
+
+        disconnect.set()
+        await asyncio.wait_for(app, 1)
+        self.assertEqual(slot_events.subscriber_count(self.mentor.id), 0)
+
+    async def test_idle_streams_get_keepalives(self):
+        from core.asgi import application
+        body = asyncio.Queue()
+        disconnect = asyncio.Event()
+        requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': SLOT_EVENTS_PATH,
+            'headers': [(b'cookie', f'auth_token={sign_mentee(self.mentee)}'.encode())],
+        }
+        with mock.patch.object(slot_events, 'heartbeat', 0.01):
+            # core.asgi routes the path to the stream, around Django
+            app = asyncio.create_task(application(scope, receive, body.put))
+            self.assertIn((b'content-type', b'text/event-stream'), (await asyncio.wait_for(body.get(), 1))['headers'])
+            self.assertEqual((await body.get())['body'], b'retry: 5000\n\n')
+            self.assertEqual((await asyncio.wait_for(body.get(), 1))['body'], b': keepalive\n\n')
+            disconnect.set()
+            await asyncio.wait_for(app, 1)
+
+    def test_django_does_not_serve_the_stream(self):
+        # Under WSGI the stream 404s, which stops EventSource from reconnecting
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+        self.assertEqual(self.client.get(SLOT_EVENTS_PATH).status_code, 404)
+
+class BookingTests(TestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.slot = AppointmentAvailability.objects.create(
+            appointment_date=datetime(2030, 1, 1, 9, 0), mentor=self.mentor
+        )
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+
+    def test_booking_claims_slot_once(self):
+        book_slot(self.mentee, self.slot.id, 'D', 'Review')
+        self.slot.refresh_from_db()
+        self.assertTrue(self.slot.scheduled)
+        with self.assertRaises(SlotUnavailable):
+            book_slot(self.mentee, self.slot.id, 'D', 'Again')
+        self.assertEqual(Meeting.objects.filter(date=self.slot).count(), 1)
+
+    def test_cannot_book_another_mentors_slot(self):
+        other = User.objects.create_user(username='other', password='secret123')
+        slot = AppointmentAvailability.objects.create(appointment_date=datetime(2030, 1, 1, 9, 0), mentor=other)
+        with self.assertRaises(SlotUnavailable):
+            book_slot(self.mentee, slot.id, 'D', 'Review')
+        slot.refresh_from_db()
+        self.assertFalse(slot.scheduled)
+
+    def test_schedule_meeting_view_books_slot(self):
+        response = self.client.post(reverse('schedule_meeting'), {
+            'hour': self.slot.id, 'tag': 'D', 'description': 'Review'
+        })
+        self.assertRedirects(response, reverse('available_dates'), fetch_redirect_response=False)
+        self.assertTrue(Meeting.objects.filter(date=self.slot, mentee=self.mentee).exists())
+
+class ConcurrentBookingTests(TransactionTestCase):
+    def test_concurrent_bookings_have_exactly_one_winner(self):
+        mentor = User.objects.create(username='mentor')
+        slot = AppointmentAvailability.objects.create(appointment_date=datetime(2030, 1, 1, 9, 0), mentor=mentor)
+        mentees = [
+            Mentorship.objects.create(name=f'Mentee {i}', stage='E1', user=mentor)
+            for i in range(16)
+        ]
+        barrier = threading.Barrier(len(mentees))
+        outcomes = []
+
+        def book(mentee):
+            try:
+                barrier.wait()
+                for _ in range(500):
+                    try:
+                        book_slot(mentee, slot.id, 'D', 'Review')
+                        outcomes.append('booked')
+                        return
+                    except OperationalError:
+                        # The in-memory test database reports table locks
+                        # instead of waiting on the busy timeout
+                        sleep(0.001)
+                    except SlotUnavailable:
+                        outcomes.append('rejected')
+                        return
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(mentee,)) for mentee in mentees]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('booked'), 1)
+        self.assertEqual(outcomes.count('rejected'), len(mentees) - 1)
+        self.assertEqual(Meeting.objects.filter(date=slot).count(), 1)
+
+class AvailableDatesTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.tomorrow = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    def test_calendar_has_one_entry_per_day_within_horizon(self):
+        create_slots(self.mentor, [self.tomorrow + SLOT_DURATION * i for i in range(5)])
+        create_slots(self.mentor, [self.tomorrow + timedelta(days=2)])
+        create_slots(self.mentor, [self.tomorrow + AVAILABLE_DATES_HORIZON + timedelta(days=1)])
+        # availability rules, stored slots in the horizon
+        with self.assertNumQueries(2):
+            calendar = available_calendar(self.mentor.pk)
+        self.assertEqual(
+            [entry['appointment_date'] for entry in calendar],
+            [self.tomorrow.strftime('%d/%m/%Y'), (self.tomorrow + timedelta(days=2)).strftime('%d/%m/%Y')]
+        )
+        self.assertEqual(calendar[0]['weekday'], self.tomorrow.strftime('%A'))
+
+    def test_calendar_cache_follows_availability_changes(self):
+        slot, = create_slots(self.mentor, [self.tomorrow])
+        self.assertEqual(len(available_calendar(self.mentor.pk)), 1)
+        with self.assertNumQueries(0):
+            available_calendar(self.mentor.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_slots(self.mentor, [self.tomorrow + timedelta(days=1)])
+        self.assertEqual(len(available_calendar(self.mentor.pk)), 2)
+
+        book_slot(self.mentee, slot.id, 'D', 'Review')
+        self.assertEqual(len(available_calendar(self.mentor.pk)), 1)
+
+        AppointmentAvailability.objects.get(scheduled=False).delete()
+        self.assertEqual(available_calendar(self.mentor.pk), [])
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.client.force_login(self.mentor)
+        self.data = os.urandom(STREAM_BLOCK_SIZE * 3 + 123)
+
+    def start(self, sha256=None):
+        response = self.client.post(reverse('upload_start', args=[self.mentee.id]), {
+            'filename': '../meeting.mp4',
+            'size': len(self.data),
+            'sha256': sha256 or hashlib.sha256(self.data).hexdigest(),
+        })
+        self.assertEqual(response.status_code, 201)
+        return reverse('upload_chunk', args=[response.json()['upload_id']])
+
+    def put(self, url, offset, chunk):
+        return self.client.put(url, chunk, content_type='application/octet-stream', headers={
+            'X-Upload-Offset': str(offset),
+            'X-Chunk-SHA256': hashlib.sha256(chunk).hexdigest(),
+        })
+
+    def test_chunks_are_assembled_into_upload(self):
+        url = self.start()
+        half = len(self.data) // 2
+        self.assertEqual(self.put(url, 0, self.data[:half]).json()['offset'], half)
+        self.assertEqual(self.client.get(url).json(), {'offset': half, 'size': len(self.data)})
+
+        response = self.put(url, half, self.data[half:])
+        self.assertEqual(response.status_code, 201)
+        upload = Upload.objects.get(id=response.json()['upload'])
+        self.assertEqual(upload.mentee, self.mentee)
+        self.assertTrue(upload.video.name.startswith('videos/meeting'))
+        with upload.video.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'chunked_uploads')), [])
+
+    def test_out_of_order_chunk_is_rejected_with_resume_offset(self):
+        url = self.start()
+        self.put(url, 0, self.data[:100])
+        response = self.put(url, 500, self.data[500:600])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 100)
+
+    def test_corrupted_chunk_is_not_recorded(self):
+        url = self.start()
+        response = self.client.put(url, self.data[:100], content_type='application/octet-stream', headers={
+            'X-Upload-Offset': '0', 'X-Chunk-SHA256': '0' * 64,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(url).json()['offset'], 0)
+
+    def test_file_checksum_mismatch_discards_upload(self):
+        # Every chunk matches its own checksum; only the whole file does not
+        url = self.start(sha256=hashlib.sha256(self.data[::-1]).hexdigest())
+        half = len(self.data) // 2
+        self.assertEqual(self.put(url, 0, self.data[:half]).status_code, 200)
+        response = self.put(url, half, self.data[half:])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'File checksum mismatch, upload discarded.')
+        self.assertFalse(Upload.objects.exists())
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'chunked_uploads')), [])
+
+    def test_file_checksum_is_required(self):
+        for sha256 in ('', 'abc', 'g' * 64):
+            response = self.client.post(reverse('upload_start', args=[self.mentee.id]), {
+                'filename': 'meeting.mp4', 'size': len(self.data), 'sha256': sha256,
+            })
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_other_mentors_cannot_touch_upload(self):
+        url = self.start()
+        other = User.objects.create_user(username='other', password='secret123')
+        self.client.force_login(other)
+        self.assertEqual(self.put(url, 0, self.data[:100]).status_code, 404)
+
+    def test_last_chunk_moves_the_part_file_without_rehashing(self):
+        url = self.start()
+        self.put(url, 0, self.data[:100])
+        part = os.path.join(self.media_root, 'chunked_uploads', os.listdir(os.path.join(self.media_root, 'chunked_uploads'))[0])
+        inode = os.stat(part).st_ino
+        # The file digest is carried over from the first chunk instead of being rebuilt from the part file
+        session = ChunkedUpload.objects.get()
+        self.assertEqual(file_digests._digests[session.upload_id][0], 100)
+
+        response = self.put(url, 100, self.data[100:])
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(session.upload_id, file_digests._digests)
+        upload = Upload.objects.get()
+        self.assertEqual(os.stat(upload.video.path).st_ino, inode)
+
+    def test_claimed_offset_turns_away_a_second_writer(self):
+        url = self.start()
+        session = ChunkedUpload.objects.get()
+        self.assertEqual(claim_chunk(session, 0), 1)
+        response = self.put(url, 0, self.data[:100])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(os.path.getsize(part_path(session)), 0)
+
+    def test_client_filename_is_sanitized(self):
+        session = start_upload(self.mentee, 'C:\\clips\\my talk;rm -rf.mp4', 10, '0' * 64)
+        self.assertEqual(session.filename, 'my_talkrm_-rf.mp4')
+        with self.assertRaises(ChunkError):
+            start_upload(self.mentee, '..', 10, '0' * 64)
+
+    def test_abandoned_uploads_expire(self):
+        url = self.start()
+        self.put(url, 0, self.data[:100])
+        session = ChunkedUpload.objects.get()
+        orphan = os.path.join(self.media_root, 'chunked_uploads', 'orphan.part')
+        open(orphan, 'wb').close()
+
+        self.assertEqual(expire_uploads(), 0)
+        self.assertTrue(os.path.exists(part_path(session)))
+
+        old = timezone.now() - UPLOAD_MAX_AGE - timedelta(minutes=1)
+        ChunkedUpload.objects.update(updated_at=old)
+        os.utime(orphan, (old.timestamp(), old.timestamp()))
+        self.assertEqual(expire_uploads(), 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'chunked_uploads')), [])
+
+class VideoStreamingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.data = os.urandom(256 * 1024)
+        self.upload = self.create_upload(self.data)
+        self.client.force_login(self.mentor)
+        self.url = reverse('video', args=[self.mentee.id, self.upload.id])
+
+    def create_upload(self, data):
+        upload = Upload(mentee=self.mentee)
+        upload.video.save('meeting.mp4', ContentFile(data))
+        return upload
+
+    def test_full_response_advertises_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        response.close()
+
+        not_modified = self.client.get(self.url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_partial_content(self):
+        response = self.client.get(self.url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(response.streaming_content), self.data[100:200])
+
+        suffix = self.client.get(self.url, headers={'Range': 'bytes=-10'})
+        self.assertEqual(b''.join(suffix.streaming_content), self.data[-10:])
+
+        stale = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+        stale.close()
+
+        unsatisfiable = self.client.get(self.url, headers={'Range': f'bytes={len(self.data)}-'})
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_partial_content_memory_is_independent_of_size(self):
+        def peak_for(size):
+            upload = self.create_upload(b'\0' * size)
+            url = reverse('video', args=[self.mentee.id, upload.id])
+            response = self.client.get(url, headers={'Range': 'bytes=0-'})
+            tracemalloc.start()
+            received = sum(len(block) for block in response.streaming_content)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.assertEqual(received, size)
+            return peak
+
+        small, large = peak_for(1024 * 1024), peak_for(16 * 1024 * 1024)
+        self.assertLess(large, 512 * 1024)
+        self.assertLess(large, small * 2)
+
+    def test_mentee_streams_own_videos_only(self):
+        self.client.logout()
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+        response = self.client.get(reverse('mentee_video', args=[self.upload.id]), headers={'Range': 'bytes=0-9'})
+        self.assertEqual(b''.join(response.streaming_content), self.data[:10])
+
+        other = Mentorship.objects.create(name='Other', stage='E1', user=self.mentor)
+        self.client.cookies['auth_token'] = sign_mentee(other)
+        self.assertEqual(self.client.get(reverse('mentee_video', args=[self.upload.id])).status_code, 404)
+
+    def test_other_mentor_cannot_stream(self):
+        other = User.objects.create_user(username='other', password='secret123')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+def mp4_bytes(duration, timescale=1000):
+    mvhd_body = struct.pack('>B3xIIII', 0, 0, 0, timescale, duration * timescale) + b'\0' * 80
+    mvhd = struct.pack('>I4s', 8 + len(mvhd_body), b'mvhd') + mvhd_body
+    moov = struct.pack('>I4s', 8 + len(mvhd), b'moov') + mvhd
+    ftyp = struct.pack('>I4s', 16, b'ftyp') + b'isom\0\0\0\0'
+    mdat = struct.pack('>I4s', 8 + 1024, b'mdat') + b'\0' * 1024
+    return ftyp + mdat + moov
+
+class MediaJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+
+    def set_photo(self, size=(800, 600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        self.mentee.photo.save('mentee.png', ContentFile(buffer.getvalue()))
+
+    def test_photo_job_creates_webp_renditions(self):
+        self.set_photo()
+        self.assertEqual(self.mentee.photo_thumbnail_url(), self.mentee.photo.url)
+        enqueue_photo(self.mentee)
+        enqueue_photo(self.mentee)
+        self.assertEqual(MediaJob.objects.count(), 1)
+
+        self.assertEqual(process_batch(concurrency=1)['succeeded'], 1)
+        self.mentee.refresh_from_db()
+        with Image.open(self.mentee.photo_thumbnail.path) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (128, 128)))
+        with Image.open(self.mentee.photo_webp.path) as webp:
+            self.assertEqual(webp.size, (800, 600))
+        self.assertEqual(self.mentee.photo_thumbnail_url(), self.mentee.photo_thumbnail.url)
+        self.assertEqual(self.mentee.photo_url(), self.mentee.photo_webp.url)
+
+    def test_pending_jobs_are_unique(self):
+        enqueue('photo', self.mentee.id)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MediaJob.objects.create(kind='photo', object_id=self.mentee.id)
+
+        # A job queued again while its predecessor is stale-running is not duplicated by the requeue
+        MediaJob.objects.update(status='running', started_at=timezone.now() - timedelta(hours=1))
+        enqueue('photo', self.mentee.id)
+        self.assertEqual(requeue_stale(), 0)
+        self.assertEqual(queue_stats()['pending'], 1)
+
+    def test_video_job_extracts_metadata(self):
+        upload = Upload(mentee=self.mentee)
+        upload.video.save('meeting.mp4', ContentFile(mp4_bytes(duration=90)))
+        enqueue_video(upload)
+        process_batch(concurrency=1)
+        upload.refresh_from_db()
+        self.assertEqual(upload.metadata, {'size': len(mp4_bytes(duration=90)), 'duration': 90.0})
+
+    def test_mp4_duration_ignores_other_containers(self):
+        self.assertIsNone(mp4_duration(BytesIO(b'\0' * 64)))
+
+    def test_failing_job_is_retried_then_marked_failed(self):
+        self.mentee.photo = 'photos/missing.png'
+        self.mentee.save()
+        job = enqueue('photo', self.mentee.id)
+
+        with self.assertLogs('mentorship.jobs', 'WARNING'):
+            self.assertEqual(process_batch(concurrency=1)['failed'], 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertGreater(job.run_after, job.created_at)
+
+        # Backoff keeps the job out of the next batch until it is due
+        self.assertEqual(process_batch(concurrency=1)['failed'], 0)
+        MediaJob.objects.update(run_after=job.created_at, attempts=job.max_attempts - 1)
+        with self.assertLogs('mentorship.jobs', 'WARNING'):
+            process_batch(concurrency=1)
+        self.assertEqual(queue_stats()['failed'], 1)
+
+class AsyncMenteeViewTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123')
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.tomorrow = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.slot, = create_slots(self.mentor, [self.tomorrow])
+        self.task = Task.objects.create(mentee=self.mentee, task='Read the docs')
+        # A logged-in session forces the async session/user loading path
+        self.async_client.force_login(self.mentor)
+        self.async_client.cookies['auth_token'] = sign_mentee(self.mentee)
+
+    async def test_available_dates(self):
+        response = await self.async_client.get(reverse('available_dates'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.tomorrow.strftime('%d/%m/%Y'))
+
+    async def test_schedule_meeting(self):
+        response = await self.async_client.get(reverse('schedule_meeting'), {'date': self.tomorrow.strftime('%d/%m/%Y')})
+        self.assertContains(response, f'value="{self.slot.id}"')
+
+        response = await self.async_client.post(reverse('schedule_meeting'), {
+            'hour': self.slot.id, 'tag': 'D', 'description': 'Review'
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await Meeting.objects.filter(date=self.slot, mentee=self.mentee).aexists())
+
+    async def test_mentee_tasks_and_task_status(self):
+        response = await self.async_client.get(reverse('mentee_tasks'))
+        self.assertContains(response, 'Read the docs')
+
+        response = await self.async_client.post(reverse('task_status', args=[self.task.id]))
+        self.assertEqual(response.json(), {'id': self.task.id, 'done': True})
+        await self.task.arefresh_from_db()
+        self.assertTrue(self.task.done)
+        self.assertGreater(self.task.updated_at, self.task.created_at)
+
+        response = await self.async_client.post(reverse('task_status', args=[self.task.id]))
+        self.assertEqual(response.json(), {'id': self.task.id, 'done': False})
+
+    def test_task_status_queries(self):
+        self.client.cookies['auth_token'] = sign_mentee(self.mentee)
+        # the token version check, the UPDATE ... RETURNING and the analytics counter
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse('task_status', args=[self.task.id]))
+        self.assertEqual(response.json(), {'id': self.task.id, 'done': True})
+
+    def test_toggles_are_counted_from_the_returned_state(self):
+        self.assertTrue(toggle_task(self.mentee.id, self.task.id))
+        self.assertFalse(toggle_task(self.mentee.id, self.task.id))
+        self.assertTrue(toggle_task(self.mentee.id, self.task.id))
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.done)
+        self.assertEqual(MenteeTaskStats.objects.get(mentee=self.mentee).done, 1)
+        self.assertIsNone(toggle_task(self.mentee.id + 1, self.task.id))
+
+    async def test_task_status_ignores_other_mentees_tasks(self):
+        other = await Mentorship.objects.acreate(name='Other', stage='E1', user=self.mentor)
+        task = await Task.objects.acreate(mentee=other, task='Not yours')
+        response = await self.async_client.post(reverse('task_status', args=[task.id]))
+        self.assertEqual(response.status_code, 404)
+        await task.arefresh_from_db()
+        self.assertFalse(task.done)
+
+    async def test_invalid_token_redirects(self):
+        self.async_client.cookies['auth_token'] = 'missing'
+        response = await self.async_client.get(reverse('mentee_tasks'))
+        self.assertRedirects(response, reverse('auth_mentee'), fetch_redirect_response=False)
+
+class BenchmarkSuiteTests(TestCase):
+    def test_generate_dataset_builds_requested_shape(self):
+        mentor, mentee = generate_dataset(mentors=2, mentees=3, slots=10, meetings=4, tasks=2, uploads=1)
+        self.assertEqual(Mentorship.objects.filter(user=mentor).count(), 3)
+        self.assertEqual(AppointmentAvailability.objects.filter(mentor=mentor, scheduled=True).count(), 4)
+        self.assertEqual(Meeting.objects.filter(date__mentor=mentor).count(), 4)
+        self.assertEqual(Task.objects.filter(mentee=mentee).count(), 2)
+        self.assertEqual(Upload.objects.count(), 6)
+        self.assertEqual(len(endpoint_requests(mentor, mentee)), 10)
+
+    def test_cached_sessions_and_users_save_two_queries_per_mentor_page(self):
+        mentor, mentee = generate_dataset(mentors=1, mentees=3, slots=10, meetings=4, tasks=2, uploads=1)
+        results = mentor_page_queries(mentor, mentee)
+        self.assertEqual(set(results['db']), {'mentorship', 'meeting', 'analytics', 'task'})
+        for page, queries in results['db'].items():
+            self.assertEqual(results['cached_db+user'][page], queries - 2, page)
+            self.assertEqual(results['signed_cookies+user'][page], queries - 2, page)
+
+    def test_compare_to_baseline_flags_regressions(self):
+        baseline = {'small': {'task': {'queries_cold': 5, 'queries_warm': 4, 'time_ms': 10.0, 'peak_kb': 100.0}}}
+        within = {'small': {'task': {'queries_cold': 5, 'queries_warm': 3, 'time_ms': 19.0, 'peak_kb': 140.0}}}
+        self.assertEqual(compare_to_baseline(within, baseline), [])
+
+        worse = {'small': {'task': {'queries_cold': 6, 'queries_warm': 4, 'time_ms': 25.0, 'peak_kb': 200.0}}}
+        failures = compare_to_baseline(worse, baseline)
+        self.assertEqual(len(failures), 3)
+        self.assertTrue(failures[0].startswith('small/task: queries_cold 6 > 5'))
+
+    def test_explain_endpoints_reports_plans_and_scans(self):
+        mentor, mentee = generate_dataset(mentors=2, mentees=3, slots=10, meetings=4, tasks=2, uploads=1)
+        report = explain_endpoints(mentor, mentee, repeat=1)
+        self.assertEqual(len(report), 10)
+        statement = report['mentee_tasks']['statements'][0]
+        self.assertIn('SEARCH mentorship_mentorship', statement['plan'][0])
+        self.assertEqual(statement['full_scans'], [])
+
+        self.assertEqual(full_scans(['SCAN mentorship_task', 'SCAN CONSTANT ROW']), ['SCAN mentorship_task'])
+        self.assertEqual(full_scans(['->  Seq Scan on mentorship_task  (cost=0.00..1.00)']), ['Seq Scan on mentorship_task'])
+
+    def test_mentee_list_queries_use_composite_indexes(self):
+        mentor, _ = generate_dataset(mentors=1, mentees=20, slots=5, meetings=0, tasks=0, uploads=0)
+        analyze_database()
+        with record_statements() as statements:
+            compute_stage_summary(mentor)
+            list(Mentorship.objects.filter(user=mentor))
+        (summary_sql, summary_params), (list_sql, list_params) = statements
+        summary_plan = ' '.join(explain(summary_sql, summary_params))
+        list_plan = ' '.join(explain(list_sql, list_params))
+        self.assertIn('mentorship_user_stage_idx', summary_plan)
+        self.assertIn('mentorship_user_name_idx', list_plan)
+        # The (user, name) index already yields the default ordering
+        self.assertNotIn('TEMP B-TREE', list_plan)
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        project_cache.clear()
+        metrics.reset()
+        self.mentor = User.objects.create_user(username='mentor', password='secret123', is_staff=True)
+        self.mentee = Mentorship.objects.create(name='Mentee', stage='E1', user=self.mentor)
+        self.client.force_login(self.mentor)
+
+    def test_server_timing_reports_queries_and_view(self):
+        response = self.client.get(reverse('mentorship'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="4 queries", view;dur=[\d.]+;desc="mentorship"$')
+
+    async def test_async_view_queries_are_attributed(self):
+        self.async_client.cookies['auth_token'] = sign_mentee(self.mentee)
+        response = await self.async_client.get(reverse('mentee_tasks'))
+        self.assertIn('desc="3 queries"', response['Server-Timing'])
+
+    def test_repeated_query_is_flagged(self):
+        def stage_loop(request):
+            for stage, _ in Mentorship.stage_choices:
+                Mentorship.objects.filter(stage=stage).filter(user=self.mentor).count()
+            return HttpResponse()
+
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            response = ProfilingMiddleware(stage_loop)(RequestFactory().get('/'))
+        self.assertIn('dup;desc="1 repeated queries"', response['Server-Timing'])
+        self.assertIn('ran the same query 9 times', logs.output[0])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_profiled(self):
+        response = self.client.get(reverse('mentorship'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_metrics_endpoint_aggregates_per_view(self):
+        self.client.get(reverse('mentorship'))
+        self.client.get(reverse('mentorship'))
+        snapshot = self.client.get(reverse('metrics')).json()
+        self.assertEqual(snapshot['views']['mentorship']['requests'], 2)
+        self.assertEqual(snapshot['views']['mentorship']['duplicate_requests'], 0)
+        self.assertEqual(set(snapshot['cache']), set(project_cache.aliases))
+
+        self.client.force_login(User.objects.create_user(username='plain', password='secret123'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
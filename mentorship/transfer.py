@@ -0,0 +1,263 @@
+"""
+Streaming CSV / JSON Lines import and export of a mentor's navigators,
+mentees and availability slots.
+
+Imports read the file row by row and write it in chunks: each chunk costs a
+fixed number of queries (one navigator lookup and one token collision check
+for mentees, then bulk_create), whatever its size. The whole import runs in
+one transaction, so a bad row leaves nothing behind. Exports read rows with
+iterator() and render them one line at a time, so memory use does not grow
+with the number of rows.
+"""
+import csv
+import io
+import json
+import re
+import secrets
+from datetime import datetime
+from itertools import islice
+from django.db import transaction
+from .models import AppointmentAvailability, Mentorship, Navigator
+from .scheduling import SlotConflict, create_slots
+from .services import bump_mentor_version, invalidate_stage_summary
+
+FORMATS = {'csv': 'text/csv', 'json': 'application/x-ndjson'}
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+NAME_MAX_LENGTH = Mentorship._meta.get_field('name').max_length
+TOKEN_MAX_LENGTH = Mentorship._meta.get_field('token').max_length
+# Generated tokens are 11 URL-safe characters; shorter ones would be guessable
+TOKEN_MIN_LENGTH = 8
+TOKEN_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+STAGES = dict(Mentorship.stage_choices)
+
+class TransferError(Exception):
+    """Raised when an import file is rejected; nothing is written."""
+    def __init__(self, message, line=None):
+        self.line = line
+        super().__init__(f'Line {line}: {message}' if line else message)
+
+def decoded_lines(file):
+    """
+    Decodes a binary file one line at a time, so invalid UTF-8 is reported
+    with its line number instead of surfacing mid-import.
+    """
+    for line_number, line in enumerate(file, 1):
+        try:
+            yield line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise TransferError('File is not valid UTF-8.', line_number)
+
+def read_rows(file, fmt):
+    """
+    Yields (line number, row dict) from a CSV file with a header row or a
+    JSON Lines file (one object per line). ``file`` may be opened in text or
+    binary mode; it is read incrementally.
+    """
+    if isinstance(file.read(0), bytes):
+        file = decoded_lines(file)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'json':
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                raise TransferError('Invalid JSON.', line_number)
+            if not isinstance(row, dict):
+                raise TransferError('Expected a JSON object.', line_number)
+            yield line_number, row
+    else:
+        raise TransferError(f'Unknown format {fmt!r}.')
+
+def file_format(name):
+    return 'json' if name.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv'
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+def required(row, field, line, max_length=None):
+    value = row.get(field)
+    value = value.strip() if isinstance(value, str) else ''
+    if not value:
+        raise TransferError(f'"{field}" is required.', line)
+    if max_length and len(value) > max_length:
+        raise TransferError(f'"{field}" is limited to {max_length} characters.', line)
+    return value
+
+def optional(row, field, line):
+    """A text field that may be left out or empty; returns '' then."""
+    value = row.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise TransferError(f'"{field}" must be text.', line)
+    return value.strip()
+
+def clean_token(row, line):
+    """A supplied token must look like a generated one: URL-safe and long enough not to be guessed."""
+    token = optional(row, 'token', line)
+    if token and not (
+        TOKEN_MIN_LENGTH <= len(token) <= TOKEN_MAX_LENGTH and TOKEN_PATTERN.fullmatch(token)
+    ):
+        raise TransferError(
+            f'"token" must be {TOKEN_MIN_LENGTH} to {TOKEN_MAX_LENGTH} letters, digits, "-" or "_".', line
+        )
+    return token
+
+def assign_tokens(mentees):
+    """
+    Gives every mentee without a token a fresh one. Generated and supplied
+    tokens of the whole chunk are checked against the table with a single
+    query; only a (practically impossible) collision with an existing token
+    costs another round for the affected mentees.
+    """
+    supplied = [mentee.token for mentee in mentees if mentee.token]
+    tokens = set(supplied)
+    if len(tokens) != len(supplied):
+        raise TransferError('Duplicate token in file.')
+
+    pending = [mentee for mentee in mentees if not mentee.token]
+    check = set(tokens)
+    while True:
+        for mentee in pending:
+            mentee.token = secrets.token_urlsafe(8)
+            while mentee.token in tokens:
+                mentee.token = secrets.token_urlsafe(8)
+            tokens.add(mentee.token)
+            check.add(mentee.token)
+
+        taken = set(Mentorship.objects.filter(token__in=check).order_by().values_list('token', flat=True))
+        if taken.intersection(supplied):
+            raise TransferError('Token already in use: ' + ', '.join(sorted(taken.intersection(supplied))))
+        pending = [mentee for mentee in pending if mentee.token in taken]
+        if not pending:
+            return
+        check = set()
+
+def import_navigators(mentor, rows):
+    count = 0
+    for chunk in rows:
+        Navigator.objects.bulk_create([
+            Navigator(name=required(row, 'name', line, NAME_MAX_LENGTH), user=mentor)
+            for line, row in chunk
+        ])
+        count += len(chunk)
+    # bulk_create skips post_save, so drop the cached fragments once the rows are visible
+    transaction.on_commit(lambda: bump_mentor_version(mentor.pk))
+    return count
+
+def import_mentees(mentor, rows):
+    count = 0
+    for chunk in rows:
+        names = {optional(row, 'navigator', line) for line, row in chunk} - {''}
+        navigators = dict(
+            Navigator.objects.filter(user=mentor, name__in=names).values_list('name', 'id')
+        ) if names else {}
+
+        mentees = []
+        for line, row in chunk:
+            stage = required(row, 'stage', line)
+            if stage not in STAGES:
+                raise TransferError(f'Unknown stage {stage!r}.', line)
+            navigator = optional(row, 'navigator', line)
+            if navigator and navigator not in navigators:
+                raise TransferError(f'Unknown navigator {navigator!r}.', line)
+            mentees.append(Mentorship(
+                name=required(row, 'name', line, NAME_MAX_LENGTH),
+                stage=stage,
+                navigator_id=navigators.get(navigator),
+                token=clean_token(row, line),
+                user=mentor,
+            ))
+
+        assign_tokens(mentees)
+        Mentorship.objects.bulk_create(mentees)
+        count += len(mentees)
+    # bulk_create skips post_save, so refresh the stage chart and fragments
+    # once the rows are visible; earlier, another request could re-cache
+    # the old data before the commit
+    transaction.on_commit(lambda: invalidate_stage_summary(mentor.pk))
+    transaction.on_commit(lambda: bump_mentor_version(mentor.pk))
+    return count
+
+def import_slots(mentor, rows):
+    """Opens a free slot per row; the booked state of exported slots is not carried over."""
+    count = 0
+    for chunk in rows:
+        starts = []
+        for line, row in chunk:
+            try:
+                starts.append(datetime.fromisoformat(required(row, 'appointment_date', line)))
+            except ValueError:
+                raise TransferError('"appointment_date" must be an ISO date and time.', line)
+        try:
+            # create_slots checks overlaps against earlier chunks, keeps the
+            # analytics in step and drops the cached calendar on commit
+            count += len(create_slots(mentor, starts))
+        except SlotConflict as e:
+            raise TransferError(str(e))
+    return count
+
+RESOURCES = {
+    'navigators': {
+        'import': import_navigators,
+        'queryset': lambda mentor: Navigator.objects.filter(user=mentor).order_by('id'),
+        'fields': ['id', 'name', 'created_at'],
+    },
+    'mentees': {
+        'import': import_mentees,
+        'queryset': lambda mentor: Mentorship.objects.filter(user=mentor).order_by('id'),
+        'fields': ['id', 'name', 'stage', 'navigator__name', 'token', 'created_at'],
+        'headers': ['id', 'name', 'stage', 'navigator', 'token', 'created_at'],
+    },
+    'slots': {
+        'import': import_slots,
+        'queryset': lambda mentor: AppointmentAvailability.objects.filter(mentor=mentor).order_by('appointment_date', 'id'),
+        'fields': ['id', 'appointment_date', 'scheduled'],
+    },
+}
+
+def import_file(mentor, resource, file, fmt, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Imports ``file`` into ``resource`` for ``mentor`` in one transaction and
+    returns the number of rows created. Raises TransferError on the first
+    invalid row.
+    """
+    rows = chunked(read_rows(file, fmt), chunk_size)
+    with transaction.atomic():
+        return RESOURCES[resource]['import'](mentor, rows)
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def export_rows(mentor, resource):
+    """Yields the header and then one tuple per row, reading the table in chunks."""
+    spec = RESOURCES[resource]
+    yield spec.get('headers', spec['fields'])
+    yield from spec['queryset'](mentor).values_list(*spec['fields']).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+def export_lines(mentor, resource, fmt):
+    """Renders export_rows() as CSV or JSON Lines, one line at a time."""
+    rows = export_rows(mentor, resource)
+    headers = next(rows)
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        for row in rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(map(export_value, row))
+        yield buffer.getvalue()
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(headers, map(export_value, row)))) + '\n'
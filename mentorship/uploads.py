@@ -0,0 +1,228 @@
+import hashlib
+import os
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.move import file_move_safe
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from .jobs import enqueue_video
+from .models import ChunkedUpload, Upload
+
+CHUNK_MAX_SIZE = getattr(settings, 'CHUNK_UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024)
+STREAM_BLOCK_SIZE = 64 * 1024
+# A chunk claim older than this belongs to a request that died mid-write
+CHUNK_CLAIM_TIMEOUT = timedelta(minutes=10)
+# Sessions without a chunk for this long are discarded by expire_uploads()
+UPLOAD_MAX_AGE = timedelta(hours=getattr(settings, 'CHUNK_UPLOAD_MAX_AGE_HOURS', 24))
+FILENAME_MAX_LENGTH = ChunkedUpload._meta.get_field('filename').max_length
+
+class ChunkError(Exception):
+    """Raised when a chunk cannot be accepted; ``status`` is the HTTP status to answer with."""
+    def __init__(self, message, status=400):
+        self.status = status
+        super().__init__(message)
+
+class FileDigests:
+    """
+    Running SHA-256 of each session's part file, advanced as chunks are
+    written so the last chunk does not re-read the file. hashlib state
+    cannot be stored in the database, so it lives in the process; a chunk
+    served by another process first catches up from the part file, once.
+    """
+    def __init__(self):
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def at(self, session):
+        """A copy of the digest of the first ``session.offset`` bytes."""
+        with self._lock:
+            offset, digest = self._digests.get(session.upload_id, (None, None))
+        if offset == session.offset:
+            return digest.copy()
+
+        digest = hashlib.sha256()
+        remaining = session.offset
+        with open(part_path(session), 'rb') as part:
+            while remaining:
+                block = part.read(min(STREAM_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest
+
+    def store(self, session, digest):
+        with self._lock:
+            self._digests[session.upload_id] = (session.offset, digest)
+
+    def discard(self, session):
+        with self._lock:
+            self._digests.pop(session.upload_id, None)
+
+file_digests = FileDigests()
+
+def chunk_upload_dir():
+    return getattr(settings, 'CHUNK_UPLOAD_DIR', os.path.join(settings.MEDIA_ROOT, 'chunked_uploads'))
+
+def part_path(session):
+    return os.path.join(chunk_upload_dir(), f'{session.upload_id}.part')
+
+def clean_filename(filename):
+    """Drops any client path and characters unsafe in a file name; raises ChunkError when nothing is left."""
+    name = os.path.basename(filename.replace('\\', '/'))
+    try:
+        name = get_valid_filename(name)
+    except SuspiciousFileOperation:
+        raise ChunkError('Invalid file name.')
+    root, ext = os.path.splitext(name)
+    return root[:FILENAME_MAX_LENGTH - len(ext)] + ext
+
+def start_upload(mentee, filename, size, sha256):
+    """
+    Opens an upload session. ``sha256`` is the hex digest of the whole
+    file, which finish_upload() checks before the file is kept.
+    """
+    if size <= 0:
+        raise ChunkError('File size must be positive.')
+    sha256 = sha256.lower()
+    if len(sha256) != 64 or sha256.strip('0123456789abcdef'):
+        raise ChunkError('A SHA-256 checksum of the whole file is required.')
+
+    os.makedirs(chunk_upload_dir(), exist_ok=True)
+    session = ChunkedUpload.objects.create(
+        mentee=mentee,
+        filename=clean_filename(filename),
+        size=size,
+        sha256=sha256,
+    )
+    open(part_path(session), 'wb').close()
+    return session
+
+def claim_chunk(session, offset):
+    """
+    Marks the session as being written at ``offset`` with a conditional
+    UPDATE, so a second request for the same offset is turned away before
+    it touches the part file.
+    """
+    now = timezone.now()
+    return ChunkedUpload.objects.filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - CHUNK_CLAIM_TIMEOUT),
+        pk=session.pk,
+        offset=offset,
+    ).update(claimed_at=now, updated_at=now)
+
+def write_chunk(session, stream, offset, length, sha256=None):
+    """
+    Streams ``length`` bytes from ``stream`` into the session's part file at
+    ``offset`` in STREAM_BLOCK_SIZE blocks, so memory use does not depend on
+    the chunk or file size. Chunks must arrive in order; a client that lost
+    track of its position can resume from ``session.offset``. When the last
+    chunk lands the file is verified and turned into an Upload, which is
+    returned (None otherwise).
+    """
+    if offset != session.offset:
+        raise ChunkError(f'Expected offset {session.offset}.', status=409)
+    if length <= 0 or length > CHUNK_MAX_SIZE:
+        raise ChunkError(f'Chunks must be between 1 and {CHUNK_MAX_SIZE} bytes.', status=413)
+    if offset + length > session.size:
+        raise ChunkError('Chunk extends past the declared file size.', status=413)
+    if not claim_chunk(session, offset):
+        raise ChunkError('Chunk is already being received.', status=409)
+
+    try:
+        file_digest = file_digests.at(session)
+        digest = hashlib.sha256()
+        written = 0
+        with open(part_path(session), 'r+b') as part:
+            part.seek(offset)
+            while written < length:
+                block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                part.write(block)
+                digest.update(block)
+                file_digest.update(block)
+                written += len(block)
+            part.truncate(offset + written)
+
+        if written != length:
+            raise ChunkError('Chunk was shorter than its Content-Length.')
+        if sha256 and digest.hexdigest() != sha256.lower():
+            raise ChunkError('Chunk checksum mismatch.')
+    except BaseException:
+        ChunkedUpload.objects.filter(pk=session.pk, offset=offset).update(claimed_at=None)
+        raise
+
+    ChunkedUpload.objects.filter(pk=session.pk, offset=offset).update(
+        offset=offset + length, claimed_at=None, updated_at=timezone.now()
+    )
+    session.offset = offset + length
+
+    if session.offset == session.size:
+        return finish_upload(session, file_digest)
+    file_digests.store(session, file_digest)
+    return None
+
+def finish_upload(session, file_digest):
+    """
+    Checks the whole-file digest accumulated by write_chunk() against the
+    one given to start_upload() and moves the part file into the storage
+    of the mentee's new Upload.
+    """
+    file_digests.discard(session)
+    if file_digest.hexdigest() != session.sha256:
+        discard_upload(session)
+        raise ChunkError('File checksum mismatch, upload discarded.')
+
+    upload = Upload(mentee=session.mentee)
+    field = upload.video.field
+    with transaction.atomic():
+        # Same volume as MEDIA_ROOT by default, so this is a rename, not a copy
+        while True:
+            name = field.storage.get_available_name(
+                field.generate_filename(upload, session.filename), max_length=field.max_length
+            )
+            path = field.storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                file_move_safe(part_path(session), path)
+                break
+            except FileExistsError:
+                continue
+        upload.video.name = name
+        upload.save()
+        session.delete()
+        enqueue_video(upload)
+    return upload
+
+def discard_upload(session):
+    file_digests.discard(session)
+    path = part_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+    session.delete()
+
+def expire_uploads(max_age=UPLOAD_MAX_AGE):
+    """
+    Discards sessions that received nothing for ``max_age`` and part files
+    left without a session; returns the number of sessions removed.
+    """
+    cutoff = timezone.now() - max_age
+    expired = list(ChunkedUpload.objects.filter(updated_at__lt=cutoff))
+    for session in expired:
+        discard_upload(session)
+
+    directory = chunk_upload_dir()
+    if os.path.isdir(directory):
+        live = {f'{upload_id}.part' for upload_id in ChunkedUpload.objects.values_list('upload_id', flat=True)}
+        for entry in os.scandir(directory):
+            if (
+                entry.name.endswith('.part') and entry.name not in live
+                and entry.stat().st_mtime < cutoff.timestamp()
+            ):
+                os.remove(entry.path)
+    return len(expired)
@@ -4,12 +4,29 @@ from . import views
 urlpatterns = [
     path('', views.mentorship, name='mentorship'),
     path('meeting/', views.meeting, name='meeting'),
+    path('meeting/slots/', views.meeting_slots, name='meeting_slots'),
+    path('meeting/<int:id>/cancel/', views.meeting_cancel, name='meeting_cancel'),
+    path('meeting/rules/<int:id>/', views.availability_rule, name='availability_rule'),
+    path('analytics/', views.analytics, name='analytics'),
     path('auth/', views.auth, name="auth_mentee"),
     path('schedule_date/', views.available_dates, name='available_dates'),
     path('schedule_meeting/', views.schedule_meeting, name='schedule_meeting'),
     path('mentee_tasks/', views.mentee_tasks, name='mentee_tasks'),
     path('task/<int:id>', views.task, name='task'),
+    path('task/<int:id>/revoke/', views.revoke_mentee_tokens, name='revoke_mentee_tokens'),
+    path('tasks/bulk/', views.tasks_bulk, name='tasks_bulk'),
+    path('tasks/bulk/update/', views.tasks_bulk_update, name='tasks_bulk_update'),
+    path('task_templates/', views.task_templates, name='task_templates'),
+    path('export/<str:resource>/', views.export_data, name='export_data'),
+    path('calendar/<str:token>.ics', views.mentor_calendar, name='mentor_calendar'),
+    path('calendar/reset/', views.reset_mentor_calendar, name='reset_mentor_calendar'),
+    path('calendar/mentee/<str:token>.ics', views.mentee_calendar, name='mentee_calendar'),
+    path('import/<str:resource>/', views.import_data, name='import_data'),
     path('upload/<int:id>', views.upload, name='upload'),
+    path('upload/<int:id>/chunked/', views.upload_start, name='upload_start'),
+    path('upload/chunked/<uuid:upload_id>', views.upload_chunk, name='upload_chunk'),
+    path('video/<int:id>/<int:upload_id>', views.video, name='video'),
+    path('mentee_video/<int:upload_id>', views.mentee_video, name='mentee_video'),
     path('task_status/<int:id>', views.task_status, name='task_status'),
     path('mentee_logout/', views.mentee_logout, name='mentee_logout'), 
 ]
@@ -1,37 +1,55 @@
-from datetime import datetime, timedelta
-from datetime import datetime, timedelta
-from django.http import Http404, HttpResponse
-from django.shortcuts import redirect, render
+from datetime import date, datetime, timedelta
+import json
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from mentorship.models import Mentorship
-from .models import AppointmentAvailability, Meeting, Mentorship, Navigator, Task, Upload
+from .models import AvailabilityRule, ChunkedUpload, Meeting, Mentorship, Navigator, Task, TaskTemplate, Upload
 from .decorators import mentee_token_required, mentor_owns_mentee_required, task_status_checks_required 
+from .services import (
+    aavailable_calendar, amentee_profile, amentor_rules, bump_mentor_version, meeting_page, mentor_rules, mentor_version,
+    stage_summary,
+)
+from .analytics import mentor_analytics, report_range
+from .auth import MENTEE_COOKIE_MAX_AGE, check_mentee, revoke_tokens, sign_mentee
+from .ical import (
+    feed_response, load_mentee_feed, load_mentor_feed, mentee_feed, mentor_feed, reset_mentor_feed, sign_mentee_feed,
+    sign_mentor_feed,
+)
+from .bulk_tasks import (
+    BulkTaskError, apply_template, assign_tasks, clean_description, create_tasks, toggle_task, update_tasks,
+)
+from .jobs import enqueue_photo, enqueue_video
+from .streaming import stream_file
+from .transfer import FORMATS, RESOURCES, TransferError, export_lines, file_format, import_file
+from .uploads import CHUNK_MAX_SIZE, ChunkError, discard_upload, start_upload, write_chunk
+from .recurrence import open_slots, window_slots
+from .scheduling import (
+    RuleConflict, SlotConflict, SlotUnavailable, book_rule_slot, book_slot, cancel_meeting, create_rule, create_slots, skip_rule_day,
+)
+from .live import SLOT_EVENTS_PATH
 from django.contrib import messages
 from django.contrib.messages import constants
-from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_safe
 from django.contrib.auth.decorators import login_required
 
 @login_required
 def mentorship(request):  
     if request.method == 'GET':
-        mentees = Mentorship.objects.filter(user=request.user)
+        mentees = Mentorship.objects.filter(user=request.user).select_related('navigator')
         navigators = Navigator.objects.filter(user=request.user)
-
-        stages_flat = []
-        stages_count = []
-
-        for i, j in Mentorship.stage_choices:
-            count = Mentorship.objects.filter(stage=i).filter(user=request.user).count()
-            if count > 0:
-                stages_flat.append(j)
-                stages_count.append(count)
+        stages_flat, stages_count = stage_summary(request.user)
 
         return render(request, 'mentorship.html', {
             'stages': Mentorship.stage_choices,
             'stages_flat': stages_flat,
             'stages_count': stages_count,
             'navigators': navigators,
-            'mentees': mentees
+            'mentees': mentees,
+            'version': mentor_version(request.user.id),
             })
     elif request.method == 'POST':
         name = request.POST.get('name')
@@ -54,119 +72,180 @@ def mentorship(request):
         )
 
         mentor.save()
+        enqueue_photo(mentor)
         messages.add_message(request, constants.SUCCESS, 'Mentee registered successfully')
         return redirect('mentorship')
 
 @login_required        
 def meeting(request):
     if request.method == 'GET':
-        meetings = Meeting.objects.filter(date__mentor=request.user)
-        return render(request, 'meeting.html', {'meetings': meetings})
+        cursor = request.GET.get('cursor', '')
+        # Only queried when the cached meeting list fragment is missing
+        page = SimpleLazyObject(lambda: dict(zip(('meetings', 'next_cursor'), meeting_page(request.user, cursor))))
+        rules = SimpleLazyObject(lambda: mentor_rules(request.user.id))
+        return render(request, 'meeting.html', {
+            'page': page,
+            'rules': rules,
+            'cursor': cursor,
+            'calendar_url': request.build_absolute_uri(reverse('mentor_calendar', args=[sign_mentor_feed(request.user.id)])),
+            'version': mentor_version(request.user.id),
+        })
     elif request.method == 'POST':
         date = request.POST.get('date')
         date = datetime.strptime(date, '%Y-%m-%dT%H:%M')
 
-        availability = AppointmentAvailability.objects.filter(mentor=request.user).filter(appointment_date__gte=date - timedelta(minutes=52), appointment_date__lte=date + timedelta(minutes=52)) 
-
-        if availability.exists():
+        try:
+            create_slots(request.user, [date])
+        except SlotConflict:
             messages.add_message(request, constants.ERROR, 'Meeting slot not available')
             return redirect('meeting')
 
-        availability = AppointmentAvailability(
-            appointment_date=date,
-            mentor=request.user
-        )
-
-        availability.save()
         messages.add_message(request, constants.SUCCESS, 'Meeting slot scheduled successfully')
         return redirect('meeting')
 
+@require_POST
+@login_required
+def meeting_cancel(request, id):
+    """Cancels one of the mentor's meetings; the slot is offered again and open schedule pages are told."""
+    meeting = get_object_or_404(Meeting.objects.select_related('date'), id=id, date__mentor=request.user)
+    cancel_meeting(meeting)
+    messages.add_message(request, constants.SUCCESS, 'Meeting cancelled')
+    return redirect('meeting')
+
+@login_required
+def analytics(request):
+    """Meetings per tag, slot utilization per day and task completion per mentee, read from the rollups."""
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        start, end = report_range(start, end)
+    except ValueError:
+        messages.add_message(request, constants.ERROR, 'Invalid date range')
+        return redirect('analytics')
+
+    report = mentor_analytics(request.user, start, end)
+    report['tag_labels'] = [label for label, _ in report['tags']]
+    report['tag_counts'] = [count for _, count in report['tags']]
+    return render(request, 'analytics.html', report)
+
+@login_required
+def meeting_slots(request):
+    """
+    Opens a recurring weekly window of slots (e.g. every Tuesday 14:00-18:00
+    for 12 weeks, or until removed when no weeks are given) as an
+    availability rule; its slots are only stored once booked.
+    """
+    if request.method != 'POST':
+        return redirect('meeting')
+
+    try:
+        start_time = datetime.strptime(request.POST.get('start_time'), '%H:%M').time()
+        end_time = datetime.strptime(request.POST.get('end_time'), '%H:%M').time()
+        starts_on = datetime.strptime(request.POST.get('start_date'), '%Y-%m-%d').date()
+        weekday = int(request.POST.get('weekday'))
+        weeks = int(request.POST['weeks']) if request.POST.get('weeks') else None
+    except (TypeError, ValueError):
+        messages.add_message(request, constants.ERROR, 'Invalid recurring slot parameters')
+        return redirect('meeting')
+
+    try:
+        create_rule(request.user, weekday, start_time, end_time, starts_on, weeks)
+    except (ValueError, RuleConflict) as e:
+        messages.add_message(request, constants.ERROR, str(e))
+        return redirect('meeting')
+
+    messages.add_message(request, constants.SUCCESS, 'Recurring slots opened successfully')
+    return redirect('meeting')
+
+@require_POST
+@login_required
+def availability_rule(request, id):
+    """Skips one "day" of a recurring availability (action=skip) or removes it (action=remove)."""
+    rule = get_object_or_404(AvailabilityRule, id=id, mentor=request.user)
+    if request.POST.get('action') == 'remove':
+        rule.delete()
+        messages.add_message(request, constants.SUCCESS, 'Recurring slots removed')
+        return redirect('meeting')
+
+    try:
+        skip_rule_day(rule, datetime.strptime(request.POST.get('day'), '%Y-%m-%d').date())
+    except (TypeError, ValueError):
+        messages.add_message(request, constants.ERROR, 'Invalid date')
+        return redirect('meeting')
+
+    messages.add_message(request, constants.SUCCESS, 'Day skipped')
+    return redirect('meeting')
+
 def auth(request):
     if request.method == 'GET':
         return render(request, 'auth_mentee.html')
     elif request.method == 'POST':
         token = request.POST.get('token')
-        try:
-            mentee = Mentorship.objects.get(token=token)
-            response = redirect('available_dates')
-            response.set_cookie('auth_token', token, max_age=3600 ,httponly=True)
-            return response
-        except Mentorship.DoesNotExist:
+        # Read the current token version, not a cached one, so a cookie
+        # signed right after a revocation is accepted by the write endpoints
+        mentee = Mentorship.objects.filter(token=token).first() if token else None
+        if not mentee:
             messages.add_message(request, constants.ERROR, 'Invalid token')
             return redirect('auth_mentee')
 
+        response = redirect('available_dates')
+        response.set_cookie('auth_token', sign_mentee(mentee), max_age=MENTEE_COOKIE_MAX_AGE, httponly=True)
+        return response
+
+async def arender(request, template_name, context):
+    """
+    Renders a template from an async view. The session and user are loaded
+    through their async APIs first so the messages and auth context
+    processors never hit the database from the event loop.
+    """
+    await request.session.aitems()
+    request.user = await request.auser()
+    return render(request, template_name, context)
+
 @mentee_token_required 
-def available_dates(request):
+async def available_dates(request):
     mentee = request.mentee # Get mentee attached by decorator
 
     if request.method == 'GET':
-        availability_queryset = AppointmentAvailability.objects.filter(
-            mentor=mentee.user,
-            appointment_date__gte=datetime.now(), 
-            scheduled=False
-        ).values('id', 'appointment_date')
-
-
-        key='appointment_date'    
-        availability_formatted = []
-        unique_dates = set()
-
-        for avail in availability_queryset:
-            date_only = avail[key].date()
-            if date_only in unique_dates:
-                continue
-            
-            unique_dates.add(date_only)
-            month_name = avail[key].strftime('%B')
-            weekday = avail[key].strftime('%A')
-            
-            availability_formatted.append({
-                'id': avail['id'],
-                'month': month_name,
-                'weekday': weekday,
-                'appointment_date': avail[key].strftime('%d/%m/%Y')
-            })
-        
-        return render(request, 'available_dates.html', {'availability': availability_formatted})
+        availability_formatted = await aavailable_calendar(mentee.user_id)
+        return await arender(request, 'available_dates.html', {'availability': availability_formatted})
 
 @mentee_token_required 
-def schedule_meeting(request):
+async def schedule_meeting(request):
     mentee = request.mentee # Get mentee attached by decorator
 
     if request.method == 'GET':
         date = request.GET.get('date')
         date = date.replace('/', '-')
         date = datetime.strptime(date, '%d-%m-%Y')
+        end = date + timedelta(days=1)
+
+        # Free stored slots plus the day's slots expanded from the mentor's rules
+        rules = await amentor_rules(mentee.user_id)
+        slots = [slot async for slot in window_slots(mentee.user_id, date, end)]
+        hours = open_slots(rules, slots, mentee.user_id, date, end, not_before=datetime.now())
 
-        hours = AppointmentAvailability.objects.filter(
-            mentor=mentee.user,
-            appointment_date__gte=date,
-            appointment_date__lt=date + timedelta(days=1),
-            scheduled=False
-            )       
-                     
-        return render(request, 'schedule_meeting.html', {'hours': hours, 'tags': Meeting.tag_choices}) 
+        return await arender(request, 'schedule_meeting.html', {
+            'hours': hours, 'day': date, 'tags': Meeting.tag_choices, 'events_url': SLOT_EVENTS_PATH,
+        })
     elif request.method == 'POST':
         hour_id = request.POST.get('hour')
         tag = request.POST.get('tag')
         description = request.POST.get('description')
-        with transaction.atomic():
-            availability = AppointmentAvailability.objects.get(id=hour_id)
-            
-            if availability.mentor != mentee.user:
-                messages.add_message(request, constants.ERROR, 'You cannot schedule meetings with this mentor')
-                return redirect('available_dates')
-            
-            meeting = Meeting(
-                date=availability,
-                tag=tag,
-                description=description,
-                mentee=mentee
-            )
-
-            meeting.save()
-            availability.scheduled = True
-            availability.save()
+
+        try:
+            # Booking needs a transaction, which the async ORM does not offer yet
+            if hour_id and hour_id.isdigit():
+                await sync_to_async(book_slot)(mentee, int(hour_id), tag, description)
+            else:
+                # Slots generated by a rule have no row yet and are picked by start time
+                await sync_to_async(book_rule_slot)(mentee, datetime.fromisoformat(hour_id), tag, description)
+        except (TypeError, ValueError):
+            messages.add_message(request, constants.ERROR, 'Please pick an available timeslot')
+            return redirect('available_dates')
+        except SlotUnavailable as e:
+            messages.add_message(request, constants.ERROR, str(e))
+            return redirect('available_dates')
 
         messages.add_message(request, constants.SUCCESS, 'Meeting scheduled successfully')
         return redirect('available_dates')
@@ -178,7 +257,12 @@ def task(request , id):
     if request.method == 'GET':
         tasks = Task.objects.filter(mentee=mentee)
         videos = Upload.objects.filter(mentee=mentee)
-        return render(request, 'task.html', { 'mentee': mentee, 'tasks': tasks, 'videos': videos })
+        return render(request, 'task.html', {
+            'mentee': mentee,
+            'tasks': tasks,
+            'videos': videos,
+            'version': mentor_version(request.user.id),
+        })
     
     elif request.method == 'POST':
         task_description = request.POST.get('task')
@@ -190,6 +274,170 @@ def task(request , id):
         messages.add_message(request, constants.SUCCESS, 'Task registered successfully')
         return redirect(f'/mentorship/task/{mentee.id}')
 
+def json_body(request):
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        raise BulkTaskError('Request body must be JSON.')
+    if not isinstance(body, dict):
+        raise BulkTaskError('Request body must be a JSON object.')
+    return body
+
+def id_list(values):
+    if not isinstance(values, list):
+        raise BulkTaskError('Expected a list of ids.')
+    try:
+        return [int(value) for value in values]
+    except (TypeError, ValueError):
+        raise BulkTaskError('Expected a list of ids.')
+
+@require_POST
+@login_required
+def tasks_bulk(request):
+    """
+    Creates many tasks in one transaction. The JSON body is one of
+    {"tasks": [{"mentee": id, "task": "..."}, ...]},
+    {"mentees": [ids], "tasks": ["...", ...]} or
+    {"mentees": [ids], "template": id}.
+    """
+    try:
+        body = json_body(request)
+        if 'mentees' in body:
+            mentee_ids = id_list(body['mentees'])
+            if 'template' in body:
+                tasks = apply_template(request.user, id_list([body['template']])[0], mentee_ids)
+            else:
+                if not isinstance(body.get('tasks'), list):
+                    raise BulkTaskError('Expected "tasks" or "template".')
+                tasks = assign_tasks(request.user, body['tasks'], mentee_ids)
+        else:
+            items = body.get('tasks')
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise BulkTaskError('Expected a list of {"mentee", "task"} objects.')
+            mentee_ids = id_list([item.get('mentee') for item in items])
+            tasks = create_tasks(request.user, zip(mentee_ids, [item.get('task') for item in items]))
+    except BulkTaskError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'created': len(tasks)}, status=201)
+
+@require_POST
+@login_required
+def tasks_bulk_update(request):
+    """Marks tasks done/undone and/or reassigns them: {"tasks": [ids], "done": bool, "mentee": id}."""
+    try:
+        body = json_body(request)
+        done = body.get('done')
+        if done is not None and not isinstance(done, bool):
+            raise BulkTaskError('"done" must be true or false.')
+        mentee_id = id_list([body['mentee']])[0] if body.get('mentee') is not None else None
+        updated = update_tasks(request.user, id_list(body.get('tasks')), done=done, mentee_id=mentee_id)
+    except BulkTaskError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'updated': updated})
+
+@login_required
+def task_templates(request):
+    """Lists the mentor's task templates, or saves one from {"name": "...", "tasks": ["...", ...]}."""
+    if request.method == 'GET':
+        templates = TaskTemplate.objects.filter(user=request.user).values('id', 'name', 'tasks')
+        return JsonResponse({'templates': list(templates)})
+    elif request.method == 'POST':
+        try:
+            body = json_body(request)
+            name = body.get('name')
+            if not isinstance(name, str) or not name.strip() or len(name) > 100:
+                raise BulkTaskError('Template name must be 1-100 characters.')
+            if not isinstance(body.get('tasks'), list) or not body['tasks']:
+                raise BulkTaskError('Expected a non-empty list of tasks.')
+            tasks = [clean_description(task) for task in body['tasks']]
+        except BulkTaskError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        template = TaskTemplate.objects.create(user=request.user, name=name.strip(), tasks=tasks)
+        return JsonResponse({'id': template.id, 'name': template.name, 'tasks': template.tasks}, status=201)
+
+    return HttpResponseNotAllowed(['GET', 'POST'])
+
+@login_required
+def export_data(request, resource):
+    """Streams the mentor's navigators, mentees or slots as CSV, or JSON Lines with ?format=json."""
+    fmt = request.GET.get('format', 'csv')
+    if resource not in RESOURCES or fmt not in FORMATS:
+        raise Http404('Unknown export.')
+
+    response = StreamingHttpResponse(export_lines(request.user, resource, fmt), content_type=FORMATS[fmt])
+    extension = 'csv' if fmt == 'csv' else 'jsonl'
+    response['Content-Disposition'] = f'attachment; filename="{resource}.{extension}"'
+    return response
+
+@require_safe
+def mentor_calendar(request, token):
+    """The mentor's iCalendar feed; the signed token in the URL stands in for a login."""
+    feed = load_mentor_feed(token)
+    if feed is None:
+        raise Http404('Unknown calendar.')
+
+    mentor_id, link_version = feed
+    # Read before the rows, so a change made meanwhile is served again on the next poll
+    version = mentor_version(mentor_id)
+    return feed_response(request, link_version, version, lambda: mentor_feed(mentor_id, version, request.get_host()))
+
+@require_POST
+@login_required
+def reset_mentor_calendar(request):
+    """Replaces the mentor's feed link; calendars subscribed to the old one stop updating."""
+    reset_mentor_feed(request.user.id)
+    messages.add_message(request, constants.SUCCESS, 'Calendar feed link replaced')
+    return redirect('meeting')
+
+@require_safe
+def mentee_calendar(request, token):
+    """The mentee's meetings as an iCalendar feed, until the mentee's tokens are revoked."""
+    mentee = load_mentee_feed(token)
+    if mentee is None:
+        raise Http404('Unknown calendar.')
+
+    version = mentor_version(mentee.user_id)
+
+    def events():
+        # Only a changed feed gets here, so the revocation check costs no query on a 304
+        if check_mentee(mentee) is None:
+            raise Http404('Unknown calendar.')
+        return mentee_feed(mentee, version, request.get_host())
+
+    return feed_response(request, mentee.token_version, version, events)
+
+@require_POST
+@login_required
+def import_data(request, resource):
+    """
+    Imports the uploaded "file" (CSV with a header row, or JSON Lines when
+    "format" is json or the file name ends in .json/.jsonl) in one transaction.
+    """
+    if resource not in RESOURCES:
+        raise Http404('Unknown import.')
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': 'No file uploaded.'}, status=400)
+
+    try:
+        created = import_file(request.user, resource, upload, request.POST.get('format') or file_format(upload.name))
+    except TransferError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'created': created}, status=201)
+
+@require_POST
+@mentor_owns_mentee_required
+def revoke_mentee_tokens(request, id):
+    """Signs the mentee out everywhere: cookies issued so far can no longer book meetings or change tasks."""
+    revoke_tokens(request.mentee)
+    messages.add_message(request, constants.SUCCESS, 'Mentee sessions revoked')
+    return redirect(f'/mentorship/task/{id}')
+
 @mentor_owns_mentee_required
 def upload(request, id):
     mentee = request.mentee # Get mentee attached by decorator
@@ -200,25 +448,110 @@ def upload(request, id):
         mentee=mentee
     )
     new_upload.save()
+    enqueue_video(new_upload)
     messages.add_message(request, constants.SUCCESS, 'Video uploaded successfully')        
     return redirect(f'/mentorship/task/{mentee.id}')
 
+@require_POST
+@mentor_owns_mentee_required
+def upload_start(request, id):
+    """Opens a resumable chunked upload; the file itself arrives through upload_chunk."""
+    try:
+        session = start_upload(
+            request.mentee,
+            request.POST.get('filename', ''),
+            int(request.POST.get('size')),
+            request.POST.get('sha256', ''),
+        )
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid file size.'}, status=400)
+    except ChunkError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    return JsonResponse({
+        'upload_id': str(session.upload_id),
+        'offset': session.offset,
+        'chunk_size': CHUNK_MAX_SIZE,
+    }, status=201)
+
+@login_required
+def upload_chunk(request, upload_id):
+    """
+    GET reports how far a chunked upload got so clients can resume, PUT
+    appends the raw request body at X-Upload-Offset, DELETE abandons it.
+    The body is streamed to disk, bypassing Django's upload handlers.
+    """
+    session = get_object_or_404(ChunkedUpload, upload_id=upload_id, mentee__user=request.user)
+
+    if request.method == 'GET':
+        return JsonResponse({'offset': session.offset, 'size': session.size})
+    elif request.method == 'PUT':
+        try:
+            offset = int(request.headers.get('X-Upload-Offset'))
+            length = int(request.headers.get('Content-Length'))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'X-Upload-Offset and Content-Length are required.'}, status=400)
+
+        try:
+            upload = write_chunk(session, request, offset, length, request.headers.get('X-Chunk-SHA256'))
+        except ChunkError as e:
+            return JsonResponse({'error': str(e), 'offset': session.offset}, status=e.status)
+
+        if upload is None:
+            return JsonResponse({'offset': session.offset, 'size': session.size})
+
+        messages.add_message(request, constants.SUCCESS, 'Video uploaded successfully')
+        return JsonResponse({'offset': session.size, 'size': session.size, 'upload': upload.id}, status=201)
+    elif request.method == 'DELETE':
+        discard_upload(session)
+        return HttpResponse(status=204)
+
+    return HttpResponseNotAllowed(['GET', 'PUT', 'DELETE'])
+
+@mentor_owns_mentee_required
+def video(request, id, upload_id):
+    upload = get_object_or_404(Upload, id=upload_id, mentee=request.mentee)
+    return stream_file(request, upload.video.path)
+
+@mentee_token_required
+def mentee_video(request, upload_id):
+    upload = get_object_or_404(Upload, id=upload_id, mentee=request.mentee)
+    return stream_file(request, upload.video.path)
+
 @mentee_token_required 
-def mentee_tasks(request):
+async def mentee_tasks(request):
     mentee = request.mentee # Get mentee attached by decorator
     
     if request.method == 'GET':
-        tasks = Task.objects.filter(mentee=mentee)
-        videos = Upload.objects.filter(mentee=mentee)
-        return render(request, 'mentee_tasks.html', { 'mentee': mentee, 'tasks': tasks, 'videos': videos })
+        calendar_url = request.build_absolute_uri(reverse('mentee_calendar', args=[sign_mentee_feed(mentee)]))
+        # The cookie only carries the mentee's id; the page shows its profile
+        try:
+            mentee = await amentee_profile(mentee)
+        except Mentorship.DoesNotExist:
+            messages.add_message(request, constants.ERROR, 'Invalid token')
+            return redirect('auth_mentee')
+        tasks = [task async for task in Task.objects.filter(mentee=mentee)]
+        videos = [video async for video in Upload.objects.filter(mentee=mentee)]
+        return await arender(request, 'mentee_tasks.html', {
+            'mentee': mentee, 'tasks': tasks, 'videos': videos, 'calendar_url': calendar_url,
+        })
     
 @csrf_exempt
 @task_status_checks_required 
-def task_status(request, id):
-    task = request.task # Get task attached by decorator
-    task.done = not task.done
-    task.save()
-    return HttpResponse('Task status updated successfully')
+async def task_status(request, id):
+    """
+    Toggles one of the mentee's tasks with a single UPDATE ... RETURNING
+    scoped to the mentee (see bulk_tasks.toggle_task) and returns the new
+    state as JSON.
+    """
+    mentee = request.mentee # Get mentee attached by decorator
+    done = await sync_to_async(toggle_task)(mentee.id, id)
+    if done is None:
+        raise Http404('Task not found.')
+
+    # update() skips post_save, so refresh the mentor's cached task lists here
+    await sync_to_async(bump_mentor_version)(mentee.user_id)
+    return JsonResponse({'id': id, 'done': done})
 
 def mentee_logout(request):
     """Logs out the mentee by deleting the auth token cookie and redirecting."""